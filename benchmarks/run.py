@@ -0,0 +1,209 @@
+"""
+Benchmarks of parsing and stats on generated logs, every benchmark runs in a fresh interpreter,
+so its peak memory is not affected by the others.
+
+    python -m benchmarks.run --lines 200000 --out results.json --compare old_results.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None  # type: ignore
+
+from benchmarks.generator import START, LogGenerator
+from guniparse.order import OrderEnum
+from guniparse.parser import LogLineParser, LogParser
+
+Result = Tuple[int, int]  # number of lines (or operations) and bytes processed
+DATA_FILES = {
+    "asc": ("access.log", False, False),
+    "desc": ("access.desc.log", True, False),
+    "gzip": ("access.log.gz", False, True),
+}
+
+
+def data_path(data_dir: str, name: str, lines: int, seed: int) -> str:
+    """Generates the log file if it is not there yet, file names include lines and seed, so they are reused."""
+    file_name, descending, compress = DATA_FILES[name]
+    path = os.path.join(data_dir, f"{lines}-{seed}-{file_name}")
+    if not os.path.exists(path):
+        LogGenerator(seed).save(path + ".tmp", lines, descending, compress)
+        os.replace(path + ".tmp", path)
+    return path
+
+
+def read_lines(path: str) -> List[bytes]:
+    with open(path, "rb") as f:
+        return f.readlines()
+
+
+def bench_parse_line(paths: Dict[str, str], lines: int) -> Result:
+    raw_lines = read_lines(paths["asc"])
+    text_lines = [line.decode() for line in raw_lines]
+    parser = LogLineParser()
+    for line in text_lines:
+        try:
+            parser.parse_line(line)
+        except ValueError:
+            pass  # looks like a log, but a value is broken
+    return len(raw_lines), sum(map(len, raw_lines))
+
+
+def bench_parse_bytes(paths: Dict[str, str], lines: int) -> Result:
+    raw_lines = read_lines(paths["asc"])
+    parser = LogParser()
+    for line in raw_lines:
+        parser.parse_line(line)
+    return len(raw_lines), sum(map(len, raw_lines))
+
+
+def _bisect(path: str, order: OrderEnum, lines: int) -> Result:
+    parser = LogParser()
+    rnd = random.Random(0)
+    span = lines / LogGenerator().requests_per_second
+    opens = 200
+    for _ in range(opens):
+        with parser._open(path, START + timedelta(seconds=rnd.uniform(0, span)), order) as f:
+            f.readline()
+    return opens, 0
+
+
+def bench_open_asc(paths: Dict[str, str], lines: int) -> Result:
+    return _bisect(paths["asc"], OrderEnum.asc, lines)
+
+
+def bench_open_desc(paths: Dict[str, str], lines: int) -> Result:
+    return _bisect(paths["desc"], OrderEnum.desc, lines)
+
+
+def _stats(paths: Dict[str, str], name: str, order: OrderEnum, lines: int, jobs: int = 1, half: bool = False) -> Result:
+    """:return: number of logs in stats and size of the whole decompressed log"""
+    _from: Optional[datetime] = None
+    if half:
+        _from = START + timedelta(seconds=lines / LogGenerator().requests_per_second / 2)
+    with contextlib.redirect_stderr(io.StringIO()):  # progress
+        stats = LogParser().stats(paths[name], _from, None, order, jobs)
+    return stats.requests, os.path.getsize(paths["asc" if name == "gzip" else name])  # gzip has the same logs
+
+
+def bench_stats_asc(paths: Dict[str, str], lines: int) -> Result:
+    return _stats(paths, "asc", OrderEnum.asc, lines)
+
+
+def bench_stats_desc(paths: Dict[str, str], lines: int) -> Result:
+    return _stats(paths, "desc", OrderEnum.desc, lines)
+
+
+def bench_stats_gzip(paths: Dict[str, str], lines: int) -> Result:
+    return _stats(paths, "gzip", OrderEnum.asc, lines)
+
+
+def bench_stats_half_range(paths: Dict[str, str], lines: int) -> Result:
+    return _stats(paths, "asc", OrderEnum.asc, lines, half=True)
+
+
+def bench_stats_jobs4(paths: Dict[str, str], lines: int) -> Result:
+    return _stats(paths, "asc", OrderEnum.asc, lines, jobs=4)
+
+
+BENCHMARKS: Dict[str, Callable[[Dict[str, str], int], Result]] = {
+    "parse_line": bench_parse_line,
+    "parse_bytes": bench_parse_bytes,
+    "open_asc": bench_open_asc,
+    "open_desc": bench_open_desc,
+    "stats_asc": bench_stats_asc,
+    "stats_desc": bench_stats_desc,
+    "stats_gzip": bench_stats_gzip,
+    "stats_half_range": bench_stats_half_range,
+    "stats_jobs4": bench_stats_jobs4,
+}
+
+
+def run_single(name: str, data_dir: str, lines: int, seed: int) -> Dict[str, Any]:
+    """Runs one benchmark in this process, data files have to exist already."""
+    paths = {key: data_path(data_dir, key, lines, seed) for key in DATA_FILES}
+    start = time.perf_counter()
+    count, size = BENCHMARKS[name](paths, lines)
+    seconds = time.perf_counter() - start
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    peak = None if resource is None else resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if peak is not None and sys.platform == "darwin":
+        peak //= 1024
+    return {
+        "name": name,
+        "seconds": round(seconds, 4),
+        "lines": count,
+        "bytes": size,
+        "lines_per_sec": round(count / seconds, 1),
+        "mb_per_sec": round(size / seconds / 1024 / 1024, 2) if size else None,
+        "peak_rss_kib": peak,
+    }
+
+
+def compare(results: List[Dict[str, Any]], old_path: str) -> None:
+    with open(old_path) as f:
+        old = {result["name"]: result for result in json.load(f)["results"]}
+    for result in results:
+        before = old.get(result["name"])
+        if before:
+            ratio = result["lines_per_sec"] / before["lines_per_sec"]
+            print(f"{result['name']:<18} {before['lines_per_sec']:>12.0f} -> {result['lines_per_sec']:>12.0f} "
+                  f"lines/sec ({ratio:.2f}x)")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--lines", type=int, default=200000, help="lines of generated logs")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--data-dir", default=os.path.join("benchmarks", "data"), help="generated logs")
+    arg_parser.add_argument("--out", default="benchmark_results.json", help="machine readable results")
+    arg_parser.add_argument("--compare", help="results file of an earlier run")
+    arg_parser.add_argument("--only", nargs="*", choices=sorted(BENCHMARKS), help="run only these benchmarks")
+    arg_parser.add_argument("--single", choices=sorted(BENCHMARKS), help=argparse.SUPPRESS)
+    args = arg_parser.parse_args(argv)
+
+    if args.single:
+        print(json.dumps(run_single(args.single, args.data_dir, args.lines, args.seed)))
+        return
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    for key in DATA_FILES:
+        data_path(args.data_dir, key, args.lines, args.seed)
+    results = []
+    for name in args.only or BENCHMARKS:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.run", "--single", name, "--data-dir", args.data_dir,
+             "--lines", str(args.lines), "--seed", str(args.seed)],
+            check=True, stdout=subprocess.PIPE, text=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        results.append(result)
+        print(f"{name:<18} {result['lines_per_sec']:>12.0f} lines/sec {result['mb_per_sec'] or '-':>8} MB/sec "
+              f"{result['peak_rss_kib']} KiB peak")
+    with open(args.out, "w") as f:
+        json.dump({
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "lines": args.lines,
+            "seed": args.seed,
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "results": results,
+        }, f, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
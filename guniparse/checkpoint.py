@@ -0,0 +1,88 @@
+import hashlib
+import os
+import pickle
+import struct
+from typing import Optional, Tuple
+
+from guniparse.stats import Stats
+
+# magic, device, inode, processed bytes, hash of the bytes right before the processed offset
+HEADER = struct.Struct("=6sqqq20s")
+MAGIC = b"GPCKP1"
+TAIL_SIZE = 4096
+
+
+def tail_hash(path: str, offset: int) -> bytes:
+    """:return: hash of up to TAIL_SIZE bytes before the offset"""
+    with open(path, "rb") as f:
+        f.seek(max(0, offset - TAIL_SIZE))
+        return hashlib.sha1(f.read(min(offset, TAIL_SIZE))).digest()
+
+
+def stats_layout(stats_obj: Stats) -> Tuple:
+    """:return: what is counted by the Stats, saved stats can be continued only with the same layout"""
+    return (
+        sorted((name, summary.capacity) for name, summary in stats_obj.top.items()),
+        sorted((name, counter.precision) for name, counter in stats_obj.distinct.items()),
+        None if stats_obj.series is None else stats_obj.series.bucket,
+        None if stats_obj.groups is None else stats_obj.groups.layout,
+    )
+
+
+class ScanCheckpoint:
+    """
+    State of a scan of a growing log file: how many bytes were processed and Stats of them. A later scan of
+    the same file continues from the offset and parses only what was appended.
+
+    The checkpoint applies only to the same file (device and inode) that is at least as big as the processed
+    part and still has the same bytes right before the offset. Rotated (new inode) or truncated files
+    are scanned from the start. Stats are pickled, so checkpoint files must come from a trusted place.
+    """
+
+    def __init__(self, device: int, inode: int, offset: int, tail: bytes, stats_obj: Stats):
+        self.device = device
+        self.inode = inode
+        self.offset = offset
+        self.tail = tail
+        self.stats = stats_obj
+
+    @classmethod
+    def of(cls, path: str, offset: int, stats_obj: Stats) -> "ScanCheckpoint":
+        stat = os.stat(path)
+        return cls(stat.st_dev, stat.st_ino, offset, tail_hash(path, offset), stats_obj)
+
+    def applies_to(self, path: str, stats_obj: Stats) -> bool:
+        """:return: if the file still starts with the processed bytes and stats_obj counts the same things"""
+        stat = os.stat(path)
+        return (
+            (stat.st_dev, stat.st_ino) == (self.device, self.inode)
+            and stat.st_size >= self.offset
+            and tail_hash(path, self.offset) == self.tail
+            and stats_layout(stats_obj) == stats_layout(self.stats)
+        )
+
+    def save(self, path: str) -> None:
+        """Writes the checkpoint to a temporary file first, so a crash never leaves a broken checkpoint."""
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as f:
+            f.write(HEADER.pack(MAGIC, self.device, self.inode, self.offset, self.tail))
+            pickle.dump(self.stats, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["ScanCheckpoint"]:
+        """:return: checkpoint or None if there is no checkpoint or it is not readable"""
+        try:
+            with open(path, "rb") as f:
+                header = f.read(HEADER.size)
+                if len(header) < HEADER.size:
+                    return None
+                magic, device, inode, offset, tail = HEADER.unpack(header)
+                if magic != MAGIC:
+                    return None
+                stats_obj = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            return None
+        if not isinstance(stats_obj, Stats):
+            return None
+        return cls(device, inode, offset, tail, stats_obj)
@@ -1,19 +1,94 @@
+import glob
 import os.path
 import sys
 from datetime import datetime
-from typing import List, Any, Dict, Callable
+from typing import List, Any, Dict, Callable, Tuple
 
+from guniparse.endpoints import Rule, parse_rule
+from guniparse.filters import ClientFilter, LogFilter, MethodFilter, MinDurationFilter, PathPrefixFilter, StatusFilter
+from guniparse.groups import GROUP_KEYS
 from guniparse.parser import OrderEnum
+from guniparse.series import parse_bucket
+from guniparse.stream import STDIN, is_stream
 
+DISTINCT_FIELDS = ("h", "l", "u", "r", "f", "a")
 DATETIME_FORMATS = ["%d/%m/%Y:%H:%M:%S%z", "%d/%m/%Y:%H:%M:%S"]
 HELP_MSG = """
-usage: guniparse [--help] [--from FROM] [--to TO] [--order ORDER]
+usage: guniparse [--help] [--from FROM] [--to TO] [--order ORDER] [--jobs JOBS] [--index] [--follow]
+                 [--top K] [--top-capacity CAPACITY] [--distinct FIELDS]
+                 [--bucket BUCKET] [--group-by KEY] [--max-groups N] [--endpoint-rule RULE ...]
+                 [--checkpoint FILE] [--profile] [--malformed-samples N]
+                 [--status STATUS] [--method METHOD] [--path-prefix PREFIX] [--client NETWORK]
+                 [--min-duration DURATION] LOG_FILE [LOG_FILE ...]
 
+  LOG_FILE      log file, possibly compressed, or a glob like "access.log*". Logs of many files
+                (e.g. rotated ones or from many hosts) are merged by time. Files entirely out of
+                --from/--to are skipped. --jobs, --index, --follow and --checkpoint need a single file.
+                Logs can be streamed instead of read from a file: "-" reads stdin, e.g.
+                `gunicorn ... --access-logfile - | guniparse -`, "unix:PATH" and "unixgram:PATH" listen
+                on a Unix stream or datagram socket created at PATH. Live stats are printed to stderr
+                every few seconds, stats of stdin are printed at its end. If parsing can't keep up,
+                lines are dropped (and counted) instead of making gunicorn wait. --from and --to are ignored
   --help        prints this message
   --from FROM   from when should logs be parsed (format 12.07.2021:22:40:13+0100 or 12.07.2021:21:40:13)
   --to TO       to when should logs be parsed (format 12.07.2021:22:40:13+0100 or 12.07.2021:21:40:13)
   --order ORDER specify if newest logs are at the beginning of the file (descending) or at the end (ascending)
                 can be one of ["ascending", "descending"], default: "descending"
+  --jobs JOBS   number of processes parsing parts of the log file in parallel, default: 1
+  --index       find --from/--to with a sparse index stored next to the log file (LOG.gpidx),
+                the index is created if missing and extended when the log file grows
+  --follow      keep reading lines appended to the log file and print current stats every few seconds,
+                survives log rotation. --from, --to, --order, --jobs and --index are ignored
+  --top K       print K most frequent request lines, client addresses and user agents
+  --top-capacity CAPACITY
+                how many distinct values are counted for --top, counts may be too high
+                by at most requests / CAPACITY, default: 1000
+  --distinct FIELDS
+                count distinct values of comma separated fields, e.g. "h,u" for unique clients and users,
+                can be any of ["h", "l", "u", "r", "f", "a"]. Counts are approximate, within ~1.6% of
+                the exact ones in 95% of cases
+  --bucket BUCKET
+                print a CSV time series of requests, status classes, bytes and response times
+                per bucket instead of the summary, e.g. 30s, 1m, 1h or 1d
+  --group-by KEY
+                print requests, responses, bytes and response times per group of logs, KEY can be one of
+                ["endpoint", "method", "status", "client", "hour"]. Endpoints are methods and templates
+                of request paths without the query: UUIDs, dates, numbers and long hex ids in the path
+                are replaced by {uuid}, {date}, {id} and {hex}. Hit rate of the cache of templates is printed too
+  --max-groups N
+                how many of the busiest groups are printed, the rest is printed as "other", default: 50.
+                At most 2 * N groups are kept in memory
+  --endpoint-rule RULE
+                extra rule of endpoint templates, PLACEHOLDER=PATTERN, e.g. "{version}=v\\d+". Path segments
+                fully matching the pattern are replaced by the placeholder. Can be given many times,
+                extra rules are applied before the default ones
+  --checkpoint FILE
+                save stats of the whole log file to FILE and next time parse only lines appended since then,
+                e.g. for a cron job. Starts over if the log file was rotated or truncated.
+                Can't be used with --from, --to or compressed files
+  --profile     print time spent reading, parsing and counting stats, lines/sec, MB/sec and counters
+                of lines, malformed lines and seeks to stderr at the end. Can't be used with --follow
+  --malformed-samples N
+                print N randomly picked lines that were not logs (e.g. tracebacks or logs of another format)
+                to stderr. The number of such lines is printed there either way
+
+  Only logs matching all of the following filters are counted. Lines that can't match are rejected
+  before they are parsed, so filtering is faster than parsing everything. Can't be used with --checkpoint
+  --status STATUS
+                comma separated statuses or classes of statuses, e.g. "5xx" or "404,5xx"
+  --method METHOD
+                comma separated HTTP methods, e.g. "POST" or "PUT,DELETE"
+  --path-prefix PREFIX
+                paths starting with PREFIX, e.g. "/internal/"
+  --client NETWORK
+                comma separated client networks or addresses, e.g. "10.0.0.0/8" or "192.168.1.7"
+  --min-duration DURATION
+                requests that took at least DURATION, e.g. 500ms, 1.5s or 2m
+
+usage: guniparse convert LOG_FILE OUT_FILE
+
+  parses LOG_FILE once and saves it to OUT_FILE in a columnar format (e.g. access.gpcol).
+  OUT_FILE can be passed instead of the log file to get stats without parsing it again
 """
 
 
@@ -21,12 +96,30 @@ class Cli:
     # real quick and dirty
 
     def __init__(self):
-        self.args = ["--from", "--to", "--order", "help", "--help"]
-        self.needs_value = ["--from", "--to", "--order"]
+        self.args = ["--from", "--to", "--order", "--jobs", "--index", "--follow", "--top", "--top-capacity", "--distinct", "--bucket", "--group-by", "--max-groups", "--endpoint-rule", "--checkpoint", "--profile", "--malformed-samples", "--status", "--method", "--path-prefix", "--client", "--min-duration", "help", "--help"]
+        self.needs_value = ["--from", "--to", "--order", "--jobs", "--top", "--top-capacity", "--distinct", "--bucket", "--group-by", "--max-groups", "--endpoint-rule", "--checkpoint", "--malformed-samples", "--status", "--method", "--path-prefix", "--client", "--min-duration"]
         self.option2func: Dict[str, Callable] = {
             "--from": self.to_from,
             "--to": self.to_from,
             "--order": self.order,
+            "--jobs": self.jobs,
+            "--index": self.flag,
+            "--follow": self.flag,
+            "--top": self.positive,
+            "--top-capacity": self.positive,
+            "--distinct": self.distinct,
+            "--bucket": self.bucket,
+            "--group-by": self.group_by,
+            "--max-groups": self.positive,
+            "--endpoint-rule": self.endpoint_rule,
+            "--checkpoint": self.value,
+            "--profile": self.flag,
+            "--malformed-samples": self.positive,
+            "--status": self.status,
+            "--method": self.method,
+            "--path-prefix": self.path_prefix,
+            "--client": self.client,
+            "--min-duration": self.min_duration,
             "help": self.help,
             "--help": self.help,
         }
@@ -34,19 +127,40 @@ class Cli:
             "--from": "_from",
             "--to": "to",
             "--order": "order",
+            "--jobs": "jobs",
+            "--index": "use_index",
+            "--follow": "follow",
+            "--top": "top",
+            "--top-capacity": "top_capacity",
+            "--distinct": "distinct",
+            "--bucket": "bucket",
+            "--group-by": "group_by",
+            "--max-groups": "max_groups",
+            "--endpoint-rule": "endpoint_rules",
+            "--checkpoint": "checkpoint",
+            "--profile": "profile",
+            "--malformed-samples": "malformed_samples",
+            "--status": "status",
+            "--method": "method",
+            "--path-prefix": "path_prefix",
+            "--client": "client",
+            "--min-duration": "min_duration",
         }
+        self.repeatable = ["--endpoint-rule"]  # values of all occurrences are collected into a tuple
 
     def parse(self, argv: List[str]) -> Dict[str, Any]:
         i = 1
         if len(argv) < 2:
             self.help()
+        if argv[1] == "convert":
+            return self.parse_convert(argv)
         kwargs = {}
         while i < len(argv):
             option = argv[i]
             if option not in self.args:
-                if i == len(argv) - 1:
-                    break
-                sys.exit("Option not recognized. Try `guniparse help`")
+                if option.startswith("-") and option != STDIN:
+                    sys.exit("Option not recognized. Try `guniparse help`")
+                break  # paths of log files from here on
             val = None
             if argv[i] in self.needs_value:
                 if len(argv) <= i + 2:
@@ -54,12 +168,19 @@ class Cli:
                 i += 1
                 val = argv[i]
             val = self.option2func[option](val)
+            if option in self.repeatable:
+                val = kwargs.get(self.option2names[option], ()) + (val,)
             kwargs[self.option2names[option]] = val
             i += 1
 
-        kwargs["path"] = self.path(argv[-1])
+        kwargs["paths"] = self.paths(argv[i:])
         return kwargs
 
+    def parse_convert(self, argv: List[str]) -> Dict[str, Any]:
+        if len(argv) != 4:
+            sys.exit("Usage: guniparse convert LOG_FILE OUT_FILE")
+        return {"command": "convert", "path": self.path(argv[2]), "out": argv[3]}
+
     @staticmethod
     def to_from(arg: str) -> datetime:
         for dt_format in DATETIME_FORMATS:
@@ -76,6 +197,106 @@ class Cli:
         except ValueError:
             sys.exit("Invalid order. Should be either 'ascending' or 'descending'")
 
+    @staticmethod
+    def jobs(arg: str) -> int:
+        if arg.isdigit() and int(arg) > 0:
+            return int(arg)
+        sys.exit("Invalid number of jobs. Should be a positive integer")
+
+    @staticmethod
+    def positive(arg: str) -> int:
+        if arg.isdigit() and int(arg) > 0:
+            return int(arg)
+        sys.exit("Invalid number. Should be a positive integer")
+
+    @staticmethod
+    def distinct(arg: str) -> Tuple[str, ...]:
+        fields = tuple(arg.split(","))
+        if set(fields) <= set(DISTINCT_FIELDS):
+            return fields
+        sys.exit(f"Invalid fields. Should be comma separated fields out of {list(DISTINCT_FIELDS)}")
+
+    @staticmethod
+    def bucket(arg: str) -> int:
+        try:
+            return parse_bucket(arg)
+        except ValueError:
+            sys.exit("Invalid bucket. Should be a number with a unit, e.g. 30s, 1m, 1h or 1d")
+
+    @staticmethod
+    def group_by(arg: str) -> str:
+        if arg in GROUP_KEYS:
+            return arg
+        sys.exit(f"Invalid group by. Should be one of {list(GROUP_KEYS)}")
+
+    @staticmethod
+    def endpoint_rule(arg: str) -> Rule:
+        try:
+            return parse_rule(arg)
+        except ValueError:
+            sys.exit("Invalid endpoint rule. Should be PLACEHOLDER=PATTERN, e.g. {version}=v\\d+")
+
+    @staticmethod
+    def status(arg: str) -> LogFilter:
+        try:
+            return StatusFilter(arg)
+        except ValueError:
+            sys.exit("Invalid status. Should be comma separated statuses or classes, e.g. 404 or 5xx")
+
+    @staticmethod
+    def method(arg: str) -> LogFilter:
+        try:
+            return MethodFilter(arg)
+        except ValueError:
+            sys.exit("Invalid method. Should be comma separated HTTP methods, e.g. POST")
+
+    @staticmethod
+    def path_prefix(arg: str) -> LogFilter:
+        try:
+            return PathPrefixFilter(arg)
+        except ValueError:
+            sys.exit("Invalid path prefix. Should start with /")
+
+    @staticmethod
+    def client(arg: str) -> LogFilter:
+        try:
+            return ClientFilter(arg)
+        except ValueError:
+            sys.exit("Invalid client. Should be comma separated networks or addresses, e.g. 10.0.0.0/8")
+
+    @staticmethod
+    def min_duration(arg: str) -> LogFilter:
+        try:
+            return MinDurationFilter(arg)
+        except ValueError:
+            sys.exit("Invalid duration. Should be a number with a unit, e.g. 500ms, 1.5s or 2m")
+
+    @staticmethod
+    def value(arg: str) -> str:
+        return arg
+
+    @staticmethod
+    def flag(_: None = None) -> bool:
+        return True
+
+    @staticmethod
+    def paths(args: List[str]) -> List[str]:
+        paths = []
+        for arg in args:
+            if is_stream(arg):
+                paths.append(arg)
+                continue
+            if arg.startswith("-"):
+                sys.exit("Options have to come before paths of log files. Try `guniparse help`")
+            # a quoted glob is expanded here, e.g. "/var/log/gunicorn/access.log*"
+            matched = [arg] if os.path.isfile(arg) else sorted(filter(os.path.isfile, glob.glob(arg)))
+            if not matched:
+                sys.exit(f"Invalid path to a log file: {arg}")
+            paths.extend(matched)
+        if not paths:
+            sys.exit("You forgot to add path to a log file")
+        return paths
+
     @staticmethod
     def path(arg: str) -> str:
         if os.path.isfile(arg):
@@ -0,0 +1,224 @@
+import mmap
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from guniparse.columns import TEXT_FIELDS, TYPECODES, LogColumns
+from guniparse.timestamp import Timestamp
+
+# magic, byte order, number of rows, number of sections
+HEADER = struct.Struct("=6s1sqq")
+# name, array typecode, offset, size in bytes
+SECTION = struct.Struct("=16s1sqq")
+MAGIC = b"GPCOL2"
+ALIGNMENT = 8
+NUMERIC_COLUMNS = tuple(TYPECODES.items())
+# request lines are stored in parts: methods and protocols repeat, paths are mostly unique (ids in them),
+# so only the paths are stored as plain text
+DICTIONARY_COLUMNS = tuple(name for name in TEXT_FIELDS if name != "r") + ("r.method", "r.protocol")
+PLAIN_COLUMNS = ("r.path",)
+
+
+def split_request(request_line: str) -> Tuple[str, str, str]:
+    """
+    :return: method, path and protocol of the request line. Path and protocol keep the space before them,
+        so the request line is their concatenation even if it is malformed, e.g. "-" or without the protocol
+    """
+    method, *rest = request_line.split(" ", 2)
+    return method, " " + rest[0] if rest else "", " " + rest[1] if len(rest) > 1 else ""
+
+
+def _encode(values: Iterable[str]) -> Tuple[array, bytes]:
+    """:return: ends of the values and the values one after another"""
+    encoded = [value.encode("utf-8", "surrogateescape") for value in values]
+    ends = array("Q")
+    end = 0
+    for value in encoded:
+        end += len(value)
+        ends.append(end)
+    return ends, b"".join(encoded)
+
+
+def _decode(data: bytes, ends: Iterable[int], offset: int = 0) -> List[str]:
+    """:return: values of _encode, offset is where data starts in the whole text"""
+    values = []
+    start = offset
+    for end in ends:
+        values.append(data[start - offset:end - offset].decode("utf-8", "surrogateescape"))
+        start = end
+    return values
+
+
+def is_columnar(path: str) -> bool:
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+class ColumnarWriter:
+    """
+    Collects LogColumns and writes them as a columnar file (`.gpcol`). Numbers are stored as fixed width arrays,
+    text fields as uint32 codes into a dictionary of distinct values, so repeated addresses and user agents
+    are stored once. Request lines are split into a dictionary of methods, a dictionary of protocols and
+    plain text of paths. Rows are sorted by time, so a time range is found by binary search.
+    Arrays are stored in the native byte order, which is checked when the file is opened.
+    """
+
+    def __init__(self):
+        self.numeric = {name: array(typecode) for name, typecode in NUMERIC_COLUMNS}
+        self.codes = {name: array("I") for name in DICTIONARY_COLUMNS}
+        self.dictionaries: Dict[str, Dict[str, int]] = {name: {} for name in DICTIONARY_COLUMNS}
+        self.plain: Dict[str, List[str]] = {name: [] for name in PLAIN_COLUMNS}
+
+    def add(self, logs: LogColumns) -> None:
+        """:param logs: columns with every text field"""
+        for name, column in self.numeric.items():
+            column.extend(getattr(logs, name))
+        methods, paths, protocols = zip(*map(split_request, logs.text["r"])) if len(logs) else ((), (), ())
+        self.plain["r.path"].extend(paths)
+        texts = {**logs.text, "r.method": methods, "r.protocol": protocols}
+        for name, codes in self.codes.items():
+            dictionary = self.dictionaries[name]
+            for value in texts[name]:
+                code = dictionary.get(value)
+                if code is None:
+                    code = dictionary[value] = len(dictionary)
+                codes.append(code)
+
+    def _sections(self) -> List[Tuple[str, Union[array, bytes]]]:
+        t = self.numeric["t"]
+        rows = sorted(range(len(t)), key=t.__getitem__)  # stable, logs of the same second keep their order
+        sections: List[Tuple[str, Union[array, bytes]]] = []
+        for name, column in self.numeric.items():
+            sections.append((name, array(column.typecode, [column[i] for i in rows])))
+        for name, codes in self.codes.items():
+            ends, text = _encode(self.dictionaries[name])
+            sections.append((f"{name}.codes", array("I", [codes[i] for i in rows])))
+            sections.append((f"{name}.ends", ends))
+            sections.append((f"{name}.text", text))
+        for name, values in self.plain.items():
+            ends, text = _encode(values[i] for i in rows)
+            sections.append((f"{name}.ends", ends))
+            sections.append((f"{name}.text", text))
+        return sections
+
+    def save(self, path: str) -> None:
+        sections = self._sections()
+        offset = HEADER.size + SECTION.size * len(sections)
+        directory = []
+        for name, data in sections:
+            offset += -offset % ALIGNMENT
+            size = len(data) * (data.itemsize if isinstance(data, array) else 1)
+            typecode = data.typecode if isinstance(data, array) else "B"
+            directory.append(SECTION.pack(name.encode(), typecode.encode(), offset, size))
+            offset += size
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, sys.byteorder[0].encode(), len(self.numeric["t"]), len(sections)))
+            f.write(b"".join(directory))
+            for name, data in sections:
+                f.write(bytes(-f.tell() % ALIGNMENT))
+                if isinstance(data, array):
+                    data.tofile(f)
+                else:
+                    f.write(data)
+
+
+class ColumnarLog:
+    """
+    Memory mapped columnar file written by ColumnarWriter. Numeric columns are memoryviews straight into
+    the mapping, so reading them does not parse or copy anything.
+    """
+
+    BLOCK_ROWS = 256 * 1024
+
+    def __init__(self, path: str):
+        self._file: BinaryIO = open(path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, byteorder, self.rows, count = HEADER.unpack_from(self._mmap)
+        except (ValueError, struct.error):  # empty or too short file
+            magic = byteorder = None
+        if magic != MAGIC or byteorder != sys.byteorder[0].encode():
+            self.close()
+            raise ValueError(f"{path} is not a columnar log written on this machine")
+        self._view = memoryview(self._mmap)
+        self._sections: Dict[str, memoryview] = {}
+        for i in range(count):
+            name, typecode, offset, size = SECTION.unpack_from(self._mmap, HEADER.size + i * SECTION.size)
+            section = self._view[offset:offset + size]
+            self._sections[name.rstrip(b"\0").decode()] = section.cast(typecode.decode())
+        self._dictionaries: Dict[str, List[str]] = {}
+
+    def __enter__(self) -> "ColumnarLog":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for section in getattr(self, "_sections", {}).values():
+            section.release()
+        if hasattr(self, "_view"):
+            self._view.release()
+        if hasattr(self, "_mmap"):
+            try:
+                self._mmap.close()
+            except BufferError:
+                pass  # columns are still used somewhere, the mapping goes away with them
+        self._file.close()
+
+    def column(self, name: str) -> memoryview:
+        """:return: numeric column (t, s, b, b_missing, D) or codes of a text field (e.g. `h.codes`)"""
+        return self._sections[name]
+
+    def dictionary(self, name: str) -> List[str]:
+        """
+        :return: distinct values of the text field (or of a part of request lines, e.g. `r.method`),
+            codes of the field are indexes into this list
+        """
+        if name not in self._dictionaries:
+            self._dictionaries[name] = _decode(self._sections[f"{name}.text"].tobytes(), self._sections[f"{name}.ends"])
+        return self._dictionaries[name]
+
+    def _codes(self, name: str, start: int, end: int) -> List[str]:
+        values = self.dictionary(name)
+        return [values[code] for code in self._sections[f"{name}.codes"][start:end]]
+
+    def _plain(self, name: str, start: int, end: int) -> List[str]:
+        """:return: values of rows from start to end of a column stored as plain text"""
+        ends = self._sections[f"{name}.ends"]
+        text_start = ends[start - 1] if start else 0
+        text_end = ends[end - 1] if end > start else text_start
+        return _decode(self._sections[f"{name}.text"][text_start:text_end].tobytes(), ends[start:end], text_start)
+
+    def _text(self, name: str, start: int, end: int) -> List[str]:
+        if name != "r":
+            return self._codes(name, start, end)
+        return [
+            method + path + protocol
+            for method, path, protocol in zip(
+                self._codes("r.method", start, end), self._plain("r.path", start, end),
+                self._codes("r.protocol", start, end),
+            )
+        ]
+
+    def find(self, since: Timestamp) -> int:
+        """:return: first row not earlier than since"""
+        return bisect_left(self._sections["t"], since)
+
+    def blocks(
+            self, _from: Optional[Timestamp] = None, to: Optional[Timestamp] = None, text_fields: Iterable[str] = ()
+    ) -> Iterator[LogColumns]:
+        """:return: logs from _from (inclusive) to `to` (exclusive) in blocks of BLOCK_ROWS rows, in time order"""
+        text_fields = tuple(text_fields)
+        start = 0 if _from is None else self.find(_from)
+        end = self.rows if to is None else self.find(to)
+        for block_start in range(start, end, self.BLOCK_ROWS):
+            block_end = min(end, block_start + self.BLOCK_ROWS)
+            logs = LogColumns()
+            for name, _ in NUMERIC_COLUMNS:
+                setattr(logs, name, self._sections[name][block_start:block_end])
+            for name in text_fields:
+                logs.text[name] = self._text(name, block_start, block_end)
+            yield logs
@@ -0,0 +1,108 @@
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from guniparse.log_entry import LogEntry
+from guniparse.timestamp import Timestamp
+
+NUMERIC_FIELDS = ("t", "s", "b", "D")
+# array typecodes of numeric columns, they are arrays or memoryviews of the same format (see ColumnarLog)
+TYPECODES = {"t": "q", "s": "h", "b": "q", "b_missing": "B", "D": "q"}
+TEXT_FIELDS = ("h", "l", "u", "r", "f", "a")
+# ranges of the arrays numbers are stored in, e.g. a status of 99999 can't be stored at all
+INT16_MIN, INT16_MAX = -2 ** 15, 2 ** 15 - 1
+INT64_MIN, INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+
+def fits_columns(log: LogEntry) -> bool:
+    """
+    :return: if numbers of the log can be stored in LogColumns, fields that were not extracted are not checked.
+        A log that does not fit is treated as malformed
+    """
+    t, s, b, D = log.t, log.s, log.b, log.D
+    return (
+        (t is None or INT64_MIN <= t <= INT64_MAX) and (s is None or INT16_MIN <= s <= INT16_MAX)
+        and (b is None or INT64_MIN <= b <= INT64_MAX) and (D is None or INT64_MIN <= D <= INT64_MAX)
+    )
+
+
+class LogColumns:
+    """
+    Block of parsed logs stored column by column: timestamps, sizes and request times as int64 arrays, statuses as
+    int16. Sizes that were "-" are stored as 0 and marked in b_missing. Text fields are kept only if asked for,
+    as lists of str. Stats.update_columns computes aggregates over whole columns instead of line by line.
+    """
+
+    def __init__(self, text_fields: Iterable[str] = ()):
+        self.t = array(TYPECODES["t"])
+        self.s = array(TYPECODES["s"])
+        self.b = array(TYPECODES["b"])
+        self.b_missing = array(TYPECODES["b_missing"])  # 1 where the size was "-"
+        self.D = array(TYPECODES["D"])
+        self.text: Dict[str, List[str]] = {name: [] for name in text_fields}
+
+    def __len__(self) -> int:
+        return len(self.t)
+
+    def append(self, log: LogEntry) -> None:
+        """:raise ValueError: if a number does not fit its column, nothing is appended then"""
+        if not fits_columns(log):
+            raise ValueError(f"Values do not fit the columns: {log}")
+        self.t.append(log.t)
+        self.s.append(log.s)
+        self.b.append(log.b or 0)
+        self.b_missing.append(log.b is None)
+        self.D.append(log.D)
+        for name, column in self.text.items():
+            column.append(getattr(log, name))
+
+    def head(self, n: int) -> "LogColumns":
+        """:return: first n logs"""
+        columns = LogColumns()
+        columns.t, columns.s, columns.b = self.t[:n], self.s[:n], self.b[:n]
+        columns.b_missing, columns.D = self.b_missing[:n], self.D[:n]
+        columns.text = {name: column[:n] for name, column in self.text.items()}
+        return columns
+
+    def take(self, indices: List[int]) -> "LogColumns":
+        """:return: logs at the indices"""
+        columns = LogColumns()
+        for name, typecode in TYPECODES.items():
+            column = getattr(self, name)
+            setattr(columns, name, array(typecode, [column[i] for i in indices]))
+        columns.text = {name: [column[i] for i in indices] for name, column in self.text.items()}
+        return columns
+
+    def clip(
+            self, _from: Optional[Timestamp], to: Optional[Timestamp], descending: bool
+    ) -> Tuple["LogColumns", bool]:
+        """
+        Applies the time range the way LogParser reads lines: reading stops at the first log past the end of the range
+        (in the order of the file) and logs before the beginning of the range are skipped.
+        :return: logs in the time range and if reading should stop
+        """
+        t = self.t
+        past = None  # index of the first log past the end of the range
+        if t and descending and _from is not None and min(t) < _from:
+            past = next(i for i, v in enumerate(t) if v < _from)
+        elif t and not descending and to is not None and max(t) >= to:
+            past = next(i for i, v in enumerate(t) if v >= to)
+        columns = self if past is None else self.head(past)
+        t = columns.t
+        if t and descending and to is not None and max(t) >= to:
+            columns = columns.take([i for i, v in enumerate(t) if v < to])
+        elif t and not descending and _from is not None and min(t) < _from:
+            columns = columns.take([i for i, v in enumerate(t) if v >= _from])
+        return columns, past is not None
+
+    def rows(self) -> Iterator[LogEntry]:
+        """:return: logs as LogEntry, fields that are not kept are None"""
+        text = [(name, self.text.get(name)) for name in TEXT_FIELDS]
+        for i in range(len(self)):
+            values = {name: None if column is None else column[i] for name, column in text}
+            yield LogEntry(
+                t=Timestamp(self.t[i]),
+                s=self.s[i],
+                b=None if self.b_missing[i] else self.b[i],
+                D=self.D[i],
+                **values,  # type: ignore
+            )
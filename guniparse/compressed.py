@@ -0,0 +1,205 @@
+import bz2
+import io
+import lzma
+import zlib
+from bisect import bisect_right
+from typing import BinaryIO, Iterator, List, NamedTuple, Optional
+
+MAGIC_NUMBERS = {
+    b"\x1f\x8b": "gzip",
+    b"BZh": "bz2",
+    b"\xfd7zXZ\x00": "xz",
+}
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+READ_SIZE = 64 * 1024
+
+
+def detect_compression(path: str) -> Optional[str]:
+    """:return: "gzip", "bz2", "xz" or None for plain file"""
+    with open(path, "rb") as f:
+        head = f.read(6)
+    for magic, name in MAGIC_NUMBERS.items():
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def open_log(path: str) -> BinaryIO:
+    """Opens log file for streaming, decompressing it if needed."""
+    compression = detect_compression(path)
+    if compression == "gzip":
+        return GzipCheckpoints(path).open()
+    if compression == "bz2":
+        return bz2.open(path, "rb")  # type: ignore
+    if compression == "xz":
+        return lzma.open(path, "rb")  # type: ignore
+    return open(path, "rb")
+
+
+class Checkpoint(NamedTuple):
+    uncompressed: int  # offset in decompressed data
+    compressed: int  # offset in the file where the decompressor continues
+    decompressor: "zlib._Decompress"  # type: ignore  # state right before the compressed offset
+
+
+class GzipCheckpoints:
+    """
+    Random access into a gzip file. One streaming pass stores a copy of the decompressor state every SPACING bytes
+    of decompressed data, then reading from any offset only has to decompress from the closest checkpoint.
+    Decompressor states can't be serialized, so checkpoints live only in memory.
+
+    The pass is made only when it is needed, by the first seek or when the size is asked for. Reading the file
+    from the start to the end needs neither, so a full scan decompresses the file once.
+    """
+
+    SPACING = 4 * 1024 * 1024
+
+    def __init__(self, path: str, spacing: Optional[int] = None):
+        self.path = path
+        self.spacing = spacing or self.SPACING
+        self.points: List[Checkpoint] = [Checkpoint(0, 0, zlib.decompressobj(GZIP_WBITS))]
+        self._size: Optional[int] = None  # of decompressed data, known once checkpoints are built
+
+    @property
+    def built(self) -> bool:
+        return self._size is not None
+
+    @property
+    def size(self) -> int:
+        """Size of decompressed data, checkpoints are built to find it out"""
+        if self._size is None:
+            self._build()
+        return self._size  # type: ignore
+
+    def _inflate(self, f: BinaryIO, point: Checkpoint, build: bool = False) -> Iterator[bytes]:
+        """Decompresses from the checkpoint till the end, going through all gzip members."""
+        f.seek(point.compressed)
+        decompressor = point.decompressor.copy()
+        compressed, uncompressed = point.compressed, point.uncompressed
+        next_point = uncompressed + self.spacing
+        member_ended = False
+        while chunk := f.read(READ_SIZE):
+            compressed += len(chunk)
+            while chunk:
+                if member_ended and not b"\x1f\x8b".startswith(chunk[:2]):
+                    return  # padding or garbage after the last member
+                member_ended = False
+                data = decompressor.decompress(chunk)
+                chunk = b""
+                uncompressed += len(data)
+                if data:
+                    yield data
+                if decompressor.eof:
+                    chunk = decompressor.unused_data
+                    decompressor = zlib.decompressobj(GZIP_WBITS)
+                    member_ended = True
+            if build and uncompressed >= next_point:
+                self.points.append(Checkpoint(uncompressed, compressed, decompressor.copy()))
+                next_point = uncompressed + self.spacing
+
+    def _build(self) -> None:
+        size = 0
+        with open(self.path, "rb") as f:
+            for data in self._inflate(f, self.points[0], build=True):
+                size += len(data)
+        self._size = size
+
+    def point(self, offset: int) -> Checkpoint:
+        """:return: closest checkpoint at or before the offset of decompressed data, builds checkpoints if needed"""
+        if offset > 0 and not self.built:
+            self._build()
+        return self.points[bisect_right([p.uncompressed for p in self.points], offset) - 1]
+
+    def open(self) -> BinaryIO:
+        """:return: seekable buffered file of decompressed data"""
+        return io.BufferedReader(GzipCheckpointFile(self), READ_SIZE)  # type: ignore
+
+
+class GzipCheckpointFile(io.RawIOBase):
+    """Seekable raw file of decompressed data of a gzip file, see GzipCheckpoints."""
+
+    def __init__(self, checkpoints: GzipCheckpoints):
+        super().__init__()
+        self.checkpoints = checkpoints
+        self._f = open(checkpoints.path, "rb")
+        self._pos = 0
+        self._chunks: Iterator[bytes] = iter(())
+        self._chunk = b""
+        self._chunk_start = 0  # offset of _chunk in decompressed data
+        self._restart(0)
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def close(self) -> None:
+        self._f.close()
+        super().close()
+
+    def _restart(self, offset: int) -> None:
+        point = self.checkpoints.point(offset)
+        self._chunks = self.checkpoints._inflate(self._f, point)
+        self._chunk, self._chunk_start = b"", point.uncompressed
+
+    def _advance(self) -> bool:
+        self._chunk_start += len(self._chunk)
+        self._chunk = next(self._chunks, b"")
+        return bool(self._chunk)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self.checkpoints.size
+        offset = max(0, offset)
+        # going back or far ahead is cheaper from a checkpoint than by decompressing everything in between.
+        # Seeks close to where the file is read don't need the size, so they don't build checkpoints
+        if offset < self._chunk_start or offset - self._chunk_start > self.checkpoints.spacing:
+            offset = min(offset, self.checkpoints.size)
+            self._restart(offset)
+        self._pos = offset
+        return offset
+
+    def readinto(self, b: bytearray) -> int:  # type: ignore
+        while self._pos >= self._chunk_start + len(self._chunk):
+            if not self._advance():
+                return 0
+        start = self._pos - self._chunk_start
+        data = self._chunk[start:start + len(b)]
+        b[:len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+
+class FileBuffer:
+    """mmap-like view (len, slices, find) of a seekable file, so TimeSeeker can search files that can't be mapped."""
+
+    BLOCK = 64 * 1024
+
+    def __init__(self, f: BinaryIO, size: int):
+        self._f = f
+        self._size = size
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, item: slice) -> bytes:
+        start, stop, _ = item.indices(self._size)
+        self._f.seek(start)
+        return self._f.read(max(0, stop - start))
+
+    def find(self, sub: bytes, start: int = 0, end: Optional[int] = None) -> int:
+        end = self._size if end is None else min(end, self._size)
+        while start < end:
+            block_end = min(end, start + self.BLOCK)
+            # overlap blocks so sub crossing the block border is found too
+            found = self[start:min(end, block_end + len(sub) - 1)].find(sub)
+            if found != -1:
+                return start + found
+            start = block_end
+        return -1
@@ -0,0 +1,126 @@
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Match, NamedTuple, Optional, Tuple
+
+Rule = Tuple[str, str]  # placeholder and a pattern of whole path segments it replaces
+DEFAULT_RULES: Tuple[Rule, ...] = (
+    ("{uuid}", r"[0-9a-fA-F]{8}-(?:[0-9a-fA-F]{4}-){3}[0-9a-fA-F]{12}"),
+    ("{date}", r"\d{4}-\d{2}-\d{2}"),
+    ("{id}", r"\d+"),
+    ("{hex}", r"[0-9a-fA-F]{16,}"),
+)
+
+
+class RequestLine(NamedTuple):
+    method: str
+    path: str
+    query: Optional[str]  # without "?", None if there is no query
+    protocol: Optional[str]
+
+
+def split_request_line(request_line: str) -> RequestLine:
+    """
+    :return: parts of a request line like "GET /users/5?page=2 HTTP/1.1". If it is malformed
+        (e.g. "-" or garbage sent by a scanner), the whole line is the method and the path is empty
+    """
+    parts = request_line.split(" ", 2)
+    if len(parts) < 2:
+        return RequestLine(request_line, "", None, None)
+    path, question_mark, query = parts[1].partition("?")
+    return RequestLine(parts[0], path, query if question_mark else None, parts[2] if len(parts) > 2 else None)
+
+
+def parse_rule(rule: str) -> Rule:
+    """
+    :param rule: placeholder and pattern separated by "=", e.g. "{version}=v\\d+"
+    :raise ValueError: if the rule is not valid
+    """
+    placeholder, separator, pattern = rule.partition("=")
+    if not separator or not placeholder or not pattern:
+        raise ValueError(f"Invalid rule: {rule}")
+    try:
+        re.compile(pattern)
+    except re.error as e:
+        raise ValueError(f"Invalid pattern of rule {rule}: {e}") from None
+    return placeholder, pattern
+
+
+class EndpointNormalizer:
+    """
+    Turns request lines into endpoint templates, e.g. "GET /internal/user/5fdbb021-.../agenda/2019-12-01 HTTP/1.1"
+    into "GET /internal/user/{uuid}/agenda/{date}". The query and the protocol are left out. Every segment
+    of the path matching a pattern of a rule is replaced by its placeholder, the first matching rule wins.
+
+    Templates of paths are kept in an LRU cache of cache_size paths, real traffic hits the same paths over and over,
+    so most lines cost just a dict lookup. Paths with unique ids are evicted first as they are never hit again.
+    """
+
+    CACHE_SIZE = 4096
+
+    def __init__(self, rules: Iterable[Rule] = DEFAULT_RULES, cache_size: int = CACHE_SIZE):
+        """
+        :param rules: placeholders and patterns of path segments, e.g. [("{version}", r"v\\d+"), *DEFAULT_RULES]
+        :param cache_size: how many templates of paths are cached
+        """
+        self.rules = tuple(rules)
+        self.cache_size = cache_size
+        # all rules in one pattern, so a path is templated by a single substitution instead of a match per segment
+        # and rule. Alternatives are tried in the order of rules and must end where the segment ends
+        self._exp = re.compile(
+            "/(?:" + "|".join(f"(?P<_rule{i}>{pattern})" for i, (_, pattern) in enumerate(self.rules)) + ")(?=/|$)"
+        )
+        # the group of a rule closes after any groups inside of it, so it is the lastindex of a match
+        self._placeholders = {
+            self._exp.groupindex[f"_rule{i}"]: "/" + placeholder for i, (placeholder, _) in enumerate(self.rules)
+        }
+        self.template = lru_cache(maxsize=cache_size)(self._template)
+        self._merged_hits = 0  # of caches of other processes, see merge_counts
+        self._merged_misses = 0
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # the cache is not sent to worker processes, they count their own hits
+        return {"rules": self.rules, "cache_size": self.cache_size, "hits": self.hits, "misses": self.misses}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(state["rules"], state["cache_size"])  # type: ignore
+        self._merged_hits, self._merged_misses = state["hits"], state["misses"]
+
+    def _placeholder(self, match: Match) -> str:
+        return self._placeholders[match.lastindex]  # type: ignore
+
+    def _template(self, path: str) -> str:
+        """:return: path with segments matching the rules replaced by placeholders, template is cached"""
+        return self._exp.sub(self._placeholder, path)
+
+    def endpoint(self, request_line: str) -> str:
+        """:return: method and template of the path, the request line itself if it is malformed"""
+        method, _, rest = request_line.partition(" ")
+        if not rest:
+            return request_line
+        path = rest.split(" ", 1)[0].split("?", 1)[0]
+        return f"{method} {self.template(path)}"
+
+    @property
+    def hits(self) -> int:
+        return self.template.cache_info().hits + self._merged_hits
+
+    @property
+    def misses(self) -> int:
+        return self.template.cache_info().misses + self._merged_misses
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def merge_counts(self, other: "EndpointNormalizer") -> None:
+        """Adds hits and misses of the cache of other, e.g. of a worker process"""
+        self._merged_hits += other.hits
+        self._merged_misses += other.misses
+
+    def cache_fmt(self) -> str:
+        size = self.template.cache_info().currsize
+        return (
+            f"endpoint cache: {self.hit_rate:.1%} hits ({self.hits} hits, {self.misses} misses), "
+            f"{size} of {self.cache_size} paths cached\n"
+        )
@@ -0,0 +1,228 @@
+import ipaddress
+import re
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Callable, Iterable, Optional, Tuple, Union
+
+from guniparse.columns import LogColumns
+from guniparse.endpoints import split_request_line
+from guniparse.format_compiler import FIELD_EXP, group_name
+from guniparse.log_entry import LogEntry
+
+Prefilter = Callable[[bytes], bool]
+DURATION_UNITS = {"us": 1, "ms": 1000, "s": 1000 * 1000, "m": 60 * 1000 * 1000}
+DURATION_EXP = re.compile(r"^(\d+(?:\.\d+)?)(us|ms|s|m)?$")
+IPAddress = Union[ipaddress.IPv4Address, ipaddress.IPv6Address]
+
+
+def parse_duration(duration: str) -> int:
+    """
+    :param duration: number with a unit, e.g. 500ms, 1.5s, 250us or 2m. Microseconds if there is no unit
+    :return: duration in microseconds, the unit of request times
+    :raise ValueError: if the duration is not valid
+    """
+    match = DURATION_EXP.match(duration.strip())
+    if match is None:
+        raise ValueError(f"Invalid duration: {duration}")
+    number, unit = match.groups()
+    return int(float(number) * DURATION_UNITS[unit or "us"])
+
+
+def _bounds(log_format: str, name: str) -> Tuple[str, str]:
+    """
+    :return: patterns of the literal characters right before and right after the field in the format,
+        e.g. '" ' and ' ' for the status in the default format. Where the field is next to another one, the value
+        must just not continue a longer word or number. The first field may start the line or follow a prefix
+    """
+    fields = list(FIELD_EXP.finditer(log_format))
+    for i, match in enumerate(fields):
+        if group_name(match.group()[2:-2]) == name:
+            before = log_format[fields[i - 1].end() if i > 0 else 0:match.start()][-1:]
+            after = log_format[match.end():fields[i + 1].start() if i + 1 < len(fields) else len(log_format)][:1]
+            break
+    else:
+        before = after = ""
+    if before:
+        before_exp = re.escape(before)
+    elif fields and fields[0].start() == 0 and group_name(fields[0].group()[2:-2]) == name:
+        before_exp = "(?:^|(?<= ))"
+    else:
+        before_exp = r"(?<![\w.])"
+    return before_exp, re.escape(after) if after else r"(?![\w.])"
+
+
+@lru_cache(maxsize=4096)
+def _address(h: str) -> Optional[IPAddress]:
+    """Addresses repeat a lot, so they are not parsed for every line"""
+    try:
+        return ipaddress.ip_address(h)
+    except ValueError:
+        return None
+
+
+class LogFilter(ABC):
+    """
+    Condition logs have to meet to be counted. It is checked in two steps: a cheap prefilter on the raw line
+    rejects most lines that can't match before they are parsed, the exact check on parsed fields decides
+    about the rest. The prefilter may let through lines that do not match, but never rejects one that does.
+    """
+
+    fields: Tuple[str, ...] = ()  # LogEntry fields the exact check needs
+
+    def prefilter(self, log_format: str) -> Optional[Prefilter]:
+        """:return: cheap check of raw lines in the log format, None if there is none"""
+        return None
+
+    @abstractmethod
+    def accepts(self, log: LogEntry) -> bool:
+        """:return: if the log meets the condition, fields that are not in `fields` may be None"""
+
+    def mask(self, logs: LogColumns) -> Iterable[bool]:
+        """:return: accepts of every log of the block"""
+        return map(self.accepts, logs.rows())
+
+
+class StatusFilter(LogFilter):
+    """Statuses or classes of statuses, e.g. "5xx", "404" or "4xx,500" """
+
+    fields = ("s",)
+
+    def __init__(self, spec: str):
+        self.statuses = set()
+        self.classes = set()
+        for part in spec.split(","):
+            part = part.strip().lower()
+            if re.fullmatch(r"[1-5]xx", part):
+                self.classes.add(int(part[0]))
+            elif re.fullmatch(r"[1-5]\d\d", part):
+                self.statuses.add(int(part))
+            else:
+                raise ValueError(f"Invalid status: {part}")
+        self._exp = "|".join(
+            [rf"{status_class}\d\d" for status_class in sorted(self.classes)]
+            + [str(status) for status in sorted(self.statuses)]
+        )
+
+    def prefilter(self, log_format: str) -> Optional[Prefilter]:
+        before, after = _bounds(log_format, "s")
+        return re.compile(f"{before}(?:{self._exp}){after}".encode()).search  # type: ignore
+
+    def accepts(self, log: LogEntry) -> bool:
+        return log.s in self.statuses or log.s // 100 in self.classes
+
+    def mask(self, logs: LogColumns) -> Iterable[bool]:
+        return (s in self.statuses or s // 100 in self.classes for s in logs.s)
+
+
+class MethodFilter(LogFilter):
+    """HTTP methods, e.g. "POST" or "PUT,DELETE" """
+
+    fields = ("r",)
+
+    def __init__(self, spec: str):
+        self.methods = {method.strip().upper() for method in spec.split(",")}
+        if not all(method.isalpha() for method in self.methods):
+            raise ValueError(f"Invalid method: {spec}")
+
+    def prefilter(self, log_format: str) -> Optional[Prefilter]:
+        # the method starts the request line and is followed by a space
+        before, _ = _bounds(log_format, "r")
+        methods = "|".join(sorted(self.methods))
+        return re.compile(f"{before}(?:{methods}) ".encode()).search  # type: ignore
+
+    def accepts(self, log: LogEntry) -> bool:
+        return split_request_line(log.r).method in self.methods
+
+    def mask(self, logs: LogColumns) -> Iterable[bool]:
+        return (split_request_line(r).method in self.methods for r in logs.text["r"])
+
+
+class PathPrefixFilter(LogFilter):
+    """Requests of paths starting with the prefix, e.g. "/internal/" """
+
+    fields = ("r",)
+
+    def __init__(self, prefix: str):
+        if not prefix.startswith("/"):
+            raise ValueError(f"Invalid path prefix: {prefix}")
+        self.prefix = prefix
+        self._raw = b" " + prefix.encode()  # the path follows the method and a space
+
+    def prefilter(self, log_format: str) -> Optional[Prefilter]:
+        raw = self._raw
+        return lambda line: raw in line
+
+    def _matches(self, request_line: str) -> bool:
+        return split_request_line(request_line).path.startswith(self.prefix)
+
+    def accepts(self, log: LogEntry) -> bool:
+        return self._matches(log.r)
+
+    def mask(self, logs: LogColumns) -> Iterable[bool]:
+        return map(self._matches, logs.text["r"])
+
+
+class ClientFilter(LogFilter):
+    """Client addresses in networks, e.g. "10.0.0.0/8" or "10.0.0.0/8,192.168.1.7" """
+
+    fields = ("h",)
+
+    def __init__(self, spec: str):
+        self.networks = [ipaddress.ip_network(part.strip(), strict=False) for part in spec.split(",")]
+
+    def prefilter(self, log_format: str) -> Optional[Prefilter]:
+        # addresses of an IPv4 network share whole octets of the prefix, e.g. "10." for 10.0.0.0/8
+        prefixes = []
+        for network in self.networks:
+            octets = network.prefixlen // 8
+            if network.version != 4 or octets == 0:
+                return None
+            fixed = ".".join(str(network.network_address).split(".")[:octets])
+            prefixes.append(re.escape(fixed + ("" if octets == 4 else ".")))
+        before, _ = _bounds(log_format, "h")
+        return re.compile(f"{before}(?:{'|'.join(prefixes)})".encode()).search  # type: ignore
+
+    def _matches(self, h: str) -> bool:
+        address = _address(h)
+        return address is not None and any(address in network for network in self.networks)
+
+    def accepts(self, log: LogEntry) -> bool:
+        return self._matches(log.h)
+
+    def mask(self, logs: LogColumns) -> Iterable[bool]:
+        return map(self._matches, logs.text["h"])
+
+
+class MinDurationFilter(LogFilter):
+    """Requests that took at least the duration, e.g. "500ms" """
+
+    fields = ("D",)
+
+    def __init__(self, duration: Union[str, int]):
+        """:param duration: see parse_duration or microseconds"""
+        self.duration = parse_duration(duration) if isinstance(duration, str) else duration
+
+    def prefilter(self, log_format: str) -> Optional[Prefilter]:
+        log_format = log_format.rstrip()
+        last = None
+        for last in FIELD_EXP.finditer(log_format):
+            pass
+        if last is None or last.end() != len(log_format) or group_name(last.group()[2:-2]) != "D":
+            return None
+        # request time ends the line (as in the default format), so it's read from the end without parsing
+        duration = self.duration
+
+        def prefilter(line: bytes) -> bool:
+            line = line.rstrip()
+            try:
+                return int(line[line.rfind(b" ") + 1:]) >= duration
+            except ValueError:
+                return True  # not a log or another format, the parser decides
+        return prefilter
+
+    def accepts(self, log: LogEntry) -> bool:
+        return log.D >= self.duration
+
+    def mask(self, logs: LogColumns) -> Iterable[bool]:
+        duration = self.duration
+        return (D >= duration for D in logs.D)
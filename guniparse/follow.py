@@ -0,0 +1,140 @@
+import os
+import time
+from array import array
+from typing import BinaryIO, Callable, Iterable, Optional
+
+from guniparse.log_entry import LogEntry
+from guniparse.parser import LogParser
+from guniparse.stats import Stats
+from guniparse.timestamp import Timestamp
+from guniparse.utils import size_fmt
+
+
+class SlidingWindow:
+    """Number of requests in each of the last `size` seconds, kept in a ring so memory does not grow."""
+
+    def __init__(self, size: int = 300):
+        self.size = size
+        self.seconds = array("q", [-1] * size)  # which second each slot currently counts
+        self.counts = array("q", [0] * size)
+
+    def add(self, t: Timestamp) -> None:
+        slot = t % self.size
+        if self.seconds[slot] != t:
+            if self.seconds[slot] > t:
+                return  # older than the whole window
+            self.seconds[slot] = t
+            self.counts[slot] = 0
+        self.counts[slot] += 1
+
+    def rate(self, now: int, window: int) -> float:
+        """:return: requests per second during `window` seconds up to now (inclusive)"""
+        total = 0
+        for second, count in zip(self.seconds, self.counts):
+            if now - window < second <= now:
+                total += count
+        return total / window
+
+
+def live_report(stats: Stats, window: SlidingWindow, windows: Iterable[int], now: Optional[int] = None) -> str:
+    """:return: current stats with request rates during the last `windows` seconds"""
+    now = int(time.time()) if now is None else now
+    stats.end()
+    rates = ", ".join(f"last {w // 60}m: {window.rate(now, w):.2f}" for w in windows)
+    return (
+        f"requests: {stats.requests}\n"
+        f"requests/sec: {rates}\n"
+        f"responses: {dict(stats.statuses_counts)}\n"
+        f"avg size of 2xx responses: {size_fmt(int(stats.avg_resp_size))}\n"
+        f"{stats.distinct_fmt()}"
+        f"{stats.top_fmt()}"
+    )
+
+
+class LogFollower:
+    """
+    Keeps log file open and parses lines appended to it, like `tail -F`. Only new bytes are read on every poll.
+    If the file gets rotated (path points to a new inode) or truncated, it is reopened and read from the start.
+    """
+
+    POLL_INTERVAL = 0.5
+    REFRESH_INTERVAL = 5.0
+    WINDOWS = (60, 300)
+
+    def __init__(self, path: str, parser: LogParser, stats: Optional[Stats] = None, from_start: bool = False):
+        """
+        :param path: path to the log file
+        :param parser: parser of lines, has to extract Stats.FIELDS
+        :param stats: Stats updated with new logs
+        :param from_start: if logs that are already in the file should be counted too
+        """
+        self.path = path
+        self.parser = parser
+        self.stats = stats if stats is not None else Stats()
+        self.window = SlidingWindow(max(self.WINDOWS))
+        self._pending = b""  # line that is not written whole yet
+        self._f: BinaryIO = open(path, "rb")
+        if not from_start:
+            self._f.seek(0, os.SEEK_END)
+
+    def close(self) -> None:
+        self._f.close()
+
+    def _read_new(self) -> int:
+        updated = 0
+        while line := self._f.readline():
+            if not line.endswith(b"\n"):
+                self._pending += line
+                break
+            if self._pending:
+                line, self._pending = self._pending + line, b""
+            parsed = self.parser.parse_filtered(line)
+            if parsed is not None:
+                self._update(parsed)
+                updated += 1
+        return updated
+
+    def _update(self, log: LogEntry) -> None:
+        self.stats.update(log)
+        self.window.add(log.t)
+
+    def _reopen_if_rotated(self) -> bool:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False  # rotated, but the new file is not there yet
+        if stat.st_ino == os.fstat(self._f.fileno()).st_ino and stat.st_size >= self._f.tell():
+            return False
+        self._f.close()
+        self._f = open(self.path, "rb")
+        self._pending = b""
+        return True
+
+    def poll(self) -> int:
+        """
+        Parses everything appended since the last poll, including rest of the old file if it was rotated.
+        :return: number of new logs
+        """
+        updated = self._read_new()
+        if self._reopen_if_rotated():
+            updated += self._read_new()
+        return updated
+
+    def report(self, now: Optional[int] = None) -> str:
+        report = live_report(self.stats, self.window, self.WINDOWS, now)
+        if self.parser.malformed.count:
+            report += self.parser.malformed.summary() + "\n"
+        return report
+
+    def run(self, output: Callable[[str], None] = print) -> None:
+        """Polls the file until interrupted and outputs report every REFRESH_INTERVAL seconds."""
+        next_refresh = time.monotonic() + self.REFRESH_INTERVAL
+        try:
+            while True:
+                if not self.poll():
+                    time.sleep(self.POLL_INTERVAL)
+                if time.monotonic() >= next_refresh:
+                    output(self.report())
+                    next_refresh = time.monotonic() + self.REFRESH_INTERVAL
+        finally:
+            self.close()
@@ -0,0 +1,254 @@
+import re
+import sys
+from typing import Any, AnyStr, Callable, Dict, Iterable, List, Match, Optional, Protocol, Tuple
+
+from guniparse.columns import INT16_MAX, INT64_MAX, INT64_MIN, NUMERIC_FIELDS, LogColumns
+from guniparse.log_entry import INTERNED_FIELDS, BytesLogEntry, LogEntry
+from guniparse.timestamp import Timestamp, TimestampDecoder
+
+FIELD_EXP = re.compile(r"%\({?[\w\-_]+}?\w?\)s")
+
+# atoms with a known shape get a tight pattern, the rest is matched up to the next literal character
+ATOM_PATTERNS: Dict[str, str] = {
+    "s": r"\d+",
+    "b": r"\d+|-",
+    "B": r"\d+|-",
+    "D": r"\d+",
+    "T": r"\d+",
+    "M": r"\d+",
+    "L": r"\d+\.\d+",
+}
+# gunicorn renders %(t)s together with the brackets
+WRAPPED_ATOMS: Dict[str, Tuple[str, str, str]] = {
+    "t": (r"\[", r"[^\]]*", r"\]"),
+}
+
+LineParser = Callable[[AnyStr], Optional[LogEntry]]
+
+
+class BatchParser(Protocol):
+    """
+    Parses lines into LogColumns, lines it can't match or convert are passed to the fallback together with the columns.
+    Matches of the lines can be passed in if `search` was already run on them, e.g. to time it separately.
+    """
+
+    search: Callable[[Any], Optional[Match]]
+
+    def __call__(
+            self,
+            lines: Iterable[AnyStr],
+            columns: LogColumns,
+            fallback: Callable[[AnyStr, LogColumns], None],
+            matches: Optional[Iterable[Optional[Match]]] = None,
+    ) -> None: ...
+
+
+def group_name(inside: str) -> str:
+    """Turns the inside of `%(...)s` into a valid regex group name, e.g. `{x-header}i` -> `x_headeri`."""
+    return inside.replace('{', '').replace('}', '').replace('-', '_')
+
+
+def _tokenize(log_format: str) -> List[Tuple[bool, str]]:
+    """Splits format into (is_field, literal text or group name) tokens."""
+    tokens = []
+    old_end = 0
+    for match in FIELD_EXP.finditer(log_format):
+        start, end = match.span()
+        if start > old_end:
+            tokens.append((False, log_format[old_end:start]))
+        tokens.append((True, group_name(log_format[start+2:end-2])))  # get rid of %( and )s
+        old_end = end
+    if old_end < len(log_format):
+        tokens.append((False, log_format[old_end:]))
+    return tokens
+
+
+def format_literals(log_format: str) -> List[str]:
+    """
+    :return: literal text of the format in the order it appears, with brackets gunicorn renders around some fields,
+        e.g. [" ", " ", " [", '] "', ...] for the default format. Every log contains all of it in this order
+    """
+    literals = [""]
+    for is_field, text in _tokenize(log_format):
+        if not is_field:
+            literals[-1] += text
+        elif text in WRAPPED_ATOMS:
+            before, _, after = WRAPPED_ATOMS[text]
+            literals[-1] += before.replace("\\", "")
+            literals.append(after.replace("\\", ""))
+        else:
+            literals.append("")
+    return [literal for literal in literals if literal]
+
+
+def _value_exp(
+        name: str, previous_token: Optional[Tuple[bool, str]], next_token: Optional[Tuple[bool, str]]
+) -> str:
+    if name in ATOM_PATTERNS:
+        return ATOM_PATTERNS[name]
+    if next_token is None:
+        return ".*"
+    is_field, text = next_token
+    if is_field:
+        return ".*?"
+    end = re.escape(text[0])
+    if text[0] == '"' and previous_token is not None and not previous_token[0] and previous_token[1].endswith('"'):
+        # gunicorn does not escape quotes inside of quoted values (user agents, request lines), so a quote
+        # is a part of the value unless the rest of the format matches after it
+        return f"[^{end}]*(?:{end}[^{end}]*)*?"
+    return f"[^{end}]*"
+
+
+def prepare_fast_exp(log_format: str, captured: Iterable[str]) -> str:
+    """
+    Builds a pattern without greedy `.*` groups: every value stops at the first character of the literal
+    that follows it, so a line is matched in a single pass. Quoted values may contain quotes, they are tried
+    one by one only in lines that have them. Only groups in `captured` are capturing.
+    Line has to start either with the log or with a prefix separated from the log by a space.
+    """
+    tokens = _tokenize(log_format)
+    captured = set(captured)
+    exp = ""
+    for i, (is_field, text) in enumerate(tokens):
+        if not is_field:
+            exp += re.escape(text)
+            continue
+        previous_token = tokens[i - 1] if i > 0 else None
+        next_token = tokens[i + 1] if i + 1 < len(tokens) else None
+        before, value_exp, after = WRAPPED_ATOMS.get(text, ("", _value_exp(text, previous_token, next_token), ""))
+        if text in captured:
+            exp += f"{before}(?P<{text}>{value_exp}){after}"
+        else:
+            exp += f"{before}(?:{value_exp}){after}"
+    return f"(?:^|(?<= )){exp}$"
+
+
+def _converter_source(name: str, annotation: object, value: str, binary: bool) -> str:
+    if annotation is int:
+        return f"int({value})"
+    if annotation is Optional[int]:
+        return f"(None if {value} == {b'-' if binary else '-'!r} else int({value}))"
+    if annotation is Timestamp:
+        return f"decode_timestamp({value})"
+    if name in INTERNED_FIELDS and not binary:  # bytes are decoded (and interned) by BytesLogEntry
+        return f"intern({value})"
+    return value
+
+
+def compile_format(
+        log_format: str, fields: Optional[Iterable[str]] = None, binary: bool = False
+) -> Optional[LineParser]:
+    """
+    Generates a parse function specialized for given gunicorn `access_log_format`.
+    The function goes straight from the match to typed LogEntry and returns None if the line does not match.
+    :param log_format: gunicorn `access_log_format`
+    :param fields: LogEntry fields that should be extracted and converted, the rest is only matched and left as None.
+        All fields if not provided
+    :param binary: if the function should parse bytes. Numbers are converted straight from bytes and
+        the function returns BytesLogEntry that decodes text fields only when they are accessed
+    :return: parse function or None when the format does not provide some of the fields. Fields that are not
+        asked for don't have to be in the format, e.g. %(D)s when only dates and statuses are needed
+    """
+    names = tuple(LogEntry.__annotations__.keys())
+    format_names = [name for is_field, name in _tokenize(log_format) if is_field]
+    fields = names if fields is None else tuple(fields)
+    if not set(fields).issubset(format_names):
+        return None
+
+    # groups() returns captured values in the order they appear in the format
+    positions = {name: i for i, name in enumerate(n for n in format_names if n in fields)}
+    args = ", ".join(
+        _converter_source(name, annotation, f"g[{positions[name]}]", binary) if name in positions else "None"
+        for name, annotation in LogEntry.__annotations__.items()
+    )
+    source = (
+        "def parse_line(line):\n"
+        "    m = search(line)\n"
+        "    if m is None:\n"
+        "        return None\n"
+        "    g = m.groups()\n"
+        f"    return LogEntry({args})\n"
+    )
+    exp = prepare_fast_exp(log_format, fields)
+    namespace = {
+        "search": re.compile(exp.encode() if binary else exp).search,
+        "decode_timestamp": TimestampDecoder(binary),
+        "intern": sys.intern,
+        "LogEntry": BytesLogEntry if binary else LogEntry,
+    }
+    exec(source, namespace)
+    return namespace["parse_line"]
+
+
+def compile_batch(
+        log_format: str, text_fields: Iterable[str] = (), binary: bool = False
+) -> Optional[BatchParser]:
+    """
+    Generates a function that parses a block of lines straight into LogColumns, without LogEntry objects.
+    Values of a line are converted and checked to fit their columns before anything is appended, so a line that fails
+    either goes to the fallback whole and the columns stay aligned.
+    :param log_format: gunicorn `access_log_format`
+    :param text_fields: text fields that should be kept besides t, s, b and D
+    :param binary: if the function should parse bytes, text fields are decoded to str either way
+    :return: parse function or None when the format does not provide t, s, b, D or some of the text fields
+    """
+    format_names = [name for is_field, name in _tokenize(log_format) if is_field]
+    text_fields = tuple(text_fields)
+    captured = set(NUMERIC_FIELDS + text_fields)
+    if not captured.issubset(format_names):
+        return None
+    positions = {name: i for i, name in enumerate(n for n in format_names if n in captured)}
+    missing = b"-" if binary else "-"
+    decode = '.decode(errors="replace")' if binary else ""
+    text_values = "".join(
+        f", intern(g[{positions[name]}]{decode})" if name in INTERNED_FIELDS else f", g[{positions[name]}]{decode}"
+        for name in text_fields
+    )
+    text_appends = "".join(
+        f"        text_append[{i}](row[{4 + i}])\n" for i in range(len(text_fields))
+    )
+    source = (
+        "def parse_block(lines, columns, fallback, matches=None):\n"
+        "    t_append, s_append, b_append = columns.t.append, columns.s.append, columns.b.append\n"
+        "    missing_append, D_append = columns.b_missing.append, columns.D.append\n"
+        "    text_append = [columns.text[name].append for name in text_fields]\n"
+        "    if matches is None:\n"
+        "        matches = map(search, lines)\n"
+        "    for line, m in zip(lines, matches):\n"
+        "        if m is None:\n"
+        "            fallback(line, columns)\n"
+        "            continue\n"
+        "        g = m.groups()\n"
+        "        try:\n"
+        f"            b = g[{positions['b']}]\n"
+        f"            row = (decode_timestamp(g[{positions['t']}]), int(g[{positions['s']}]), "
+        f"None if b == {missing!r} else int(b), int(g[{positions['D']}]){text_values})\n"
+        # s, b and D are matched as digits, so only too big values have to be checked
+        f"            if row[1] > {INT16_MAX} or row[3] > {INT64_MAX} or row[2] is not None and row[2] > {INT64_MAX} "
+        f"or not {INT64_MIN} <= row[0] <= {INT64_MAX}:\n"
+        "                raise ValueError\n"
+        "        except ValueError:\n"
+        "            fallback(line, columns)\n"
+        "            continue\n"
+        "        t_append(row[0])\n"
+        "        s_append(row[1])\n"
+        "        if row[2] is None:\n"
+        "            b_append(0)\n"
+        "            missing_append(1)\n"
+        "        else:\n"
+        "            b_append(row[2])\n"
+        "            missing_append(0)\n"
+        "        D_append(row[3])\n"
+        f"{text_appends}"
+    )
+    exp = prepare_fast_exp(log_format, captured)
+    namespace = {
+        "search": re.compile(exp.encode() if binary else exp).search,
+        "decode_timestamp": TimestampDecoder(binary),
+        "intern": sys.intern,
+        "text_fields": text_fields,
+    }
+    exec(source, namespace)
+    parse_block = namespace["parse_block"]
+    parse_block.search = namespace["search"]
+    return parse_block
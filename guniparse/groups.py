@@ -0,0 +1,193 @@
+from array import array
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from guniparse.columns import LogColumns
+from guniparse.endpoints import EndpointNormalizer, split_request_line
+from guniparse.histogram import LatencyHistogram
+from guniparse.log_entry import LogEntry
+
+OTHER = "other"
+
+
+def method(request_line: str) -> str:
+    return split_request_line(request_line).method
+
+
+def status_class(s: int) -> int:
+    return s // 100
+
+
+def hour(t: int) -> int:
+    """:return: start of the hour (UTC) in epoch seconds"""
+    return t - t % 3600
+
+
+@dataclass(frozen=True)
+class GroupKey:
+    """How a log is assigned to a group: LogEntry field the key is computed from and how"""
+
+    field: str
+    key: Optional[Callable[[Hashable], Hashable]]  # None for endpoints, templated by EndpointNormalizer of GroupedStats
+    label: Callable[[Hashable], str] = str
+    ordered: bool = False  # groups are reported in the order of keys (e.g. hours), by requests otherwise
+
+
+GROUP_KEYS = {
+    "endpoint": GroupKey("r", None),
+    "method": GroupKey("r", method),  # type: ignore
+    "status": GroupKey("s", status_class, lambda key: f"{key}xx"),  # type: ignore
+    "client": GroupKey("h", lambda h: h),
+    "hour": GroupKey(
+        "t", hour, lambda key: datetime.fromtimestamp(key, timezone.utc).strftime("%Y-%m-%d %H:00"), ordered=True  # type: ignore
+    ),
+}
+
+
+@dataclass
+class GroupStats:
+    """Stats of one group: number of requests, statuses, bytes of all responses and request times"""
+
+    requests: int = 0
+    statuses_counts: Counter = field(default_factory=Counter)
+    bytes: int = 0
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram, repr=False)
+
+    def add(self, s: int, b: int, D: int) -> None:
+        self.requests += 1
+        self.statuses_counts[s] += 1
+        self.bytes += b
+        self.latency.add(D)
+
+    def add_many(self, s: Sequence[int], b: Sequence[int], D: Sequence[int]) -> None:
+        self.requests += len(s)
+        self.statuses_counts.update(s)
+        self.bytes += sum(b)
+        self.latency.add_many(D)
+
+    def merge(self, other: "GroupStats") -> None:
+        self.requests += other.requests
+        self.statuses_counts.update(other.statuses_counts)
+        self.bytes += other.bytes
+        self.latency.merge(other.latency)
+
+
+class GroupedStats:
+    """
+    GroupStats per group of logs, e.g. per endpoint or per client. Memory is bounded: at most 2 * max_groups groups
+    are kept, when there are more, all but the max_groups busiest ones are folded into the "other" group.
+    A group that comes back after it was folded starts counting from zero, so stats of groups are exact as long as
+    other is empty. Otherwise the busiest groups are still kept, with some of their requests counted in other.
+    """
+
+    MAX_GROUPS = 50
+
+    def __init__(self, by: str, max_groups: int = MAX_GROUPS, normalizer: Optional[EndpointNormalizer] = None):
+        """
+        :param by: one of GROUP_KEYS
+        :param max_groups: how many groups are reported, the rest is reported as "other"
+        :param normalizer: makes endpoint templates if grouped by endpoint, with the default rules if not provided
+        """
+        if by not in GROUP_KEYS:
+            raise ValueError(f"Unknown group by {by!r}, should be one of {sorted(GROUP_KEYS)}")
+        if max_groups < 1:
+            raise ValueError("There has to be at least one group")
+        self.by = by
+        self.max_groups = max_groups
+        self.groups: Dict[Hashable, GroupStats] = {}
+        self.other = GroupStats()
+        self.folded = 0  # groups folded into other
+        self.normalizer: Optional[EndpointNormalizer] = None
+        if by == "endpoint":
+            self.normalizer = EndpointNormalizer() if normalizer is None else normalizer
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, GroupedStats):
+            return NotImplemented
+        return (self.by, self.max_groups, self.groups, self.other) == (
+            other.by, other.max_groups, other.groups, other.other
+        )
+
+    @property
+    def field(self) -> str:
+        """LogEntry field groups are computed from"""
+        return GROUP_KEYS[self.by].field
+
+    @property
+    def layout(self) -> Tuple:
+        """:return: how groups are made, only groups of the same layout can be merged"""
+        return self.by, self.max_groups, None if self.normalizer is None else self.normalizer.rules
+
+    def empty(self) -> "GroupedStats":
+        """:return: GroupedStats without any logs that make groups the same way"""
+        if self.normalizer is None:
+            return GroupedStats(self.by, self.max_groups)
+        return GroupedStats(self.by, self.max_groups, EndpointNormalizer(self.normalizer.rules, self.normalizer.cache_size))
+
+    @property
+    def key(self) -> Callable[[Hashable], Hashable]:
+        """:return: function making the group key from the value of the field"""
+        if self.normalizer is not None:
+            return self.normalizer.endpoint  # type: ignore
+        return GROUP_KEYS[self.by].key  # type: ignore
+
+    def _group(self, key: Hashable) -> GroupStats:
+        group = self.groups.get(key)
+        if group is None:
+            if len(self.groups) >= 2 * self.max_groups:
+                self._compact()
+            group = self.groups[key] = GroupStats()
+        return group
+
+    def _compact(self) -> None:
+        """Folds all but the max_groups busiest groups into other, amortized over max_groups new groups"""
+        by_requests = sorted(self.groups.items(), key=lambda item: item[1].requests, reverse=True)
+        for _, group in by_requests[self.max_groups:]:
+            self.other.merge(group)
+        self.folded += len(by_requests) - self.max_groups
+        self.groups = dict(by_requests[:self.max_groups])
+
+    def update(self, log: LogEntry) -> None:
+        self._group(self.key(getattr(log, self.field))).add(log.s, log.b or 0, log.D)
+
+    def update_columns(self, logs: LogColumns) -> None:
+        """Same as update for every log of the block, logs of a group are added at once"""
+        column = logs.text[self.field] if self.field in logs.text else getattr(logs, self.field)
+        indices: Dict[Hashable, List[int]] = {}
+        for i, value in enumerate(map(self.key, column)):
+            indices.setdefault(value, []).append(i)
+        s, b, D = logs.s, logs.b, logs.D
+        for key, rows in indices.items():
+            if len(rows) == len(logs):
+                self._group(key).add_many(s, b, D)
+            else:
+                self._group(key).add_many(
+                    [s[i] for i in rows], [b[i] for i in rows], array("q", [D[i] for i in rows])
+                )
+
+    def merge(self, other: "GroupedStats") -> None:
+        if other.layout != self.layout:
+            raise ValueError("Can't merge groups made in a different way")
+        for key, group in other.groups.items():
+            self._group(key).merge(group)
+        self.other.merge(other.other)
+        self.folded += other.folded
+        if self.normalizer is not None and other.normalizer is not None:
+            self.normalizer.merge_counts(other.normalizer)
+
+    def rows(self) -> Iterator[Tuple[str, GroupStats]]:
+        """:return: label and stats of at most max_groups groups and of the other group if it has any requests"""
+        if len(self.groups) > self.max_groups:
+            self._compact()
+        group_key = GROUP_KEYS[self.by]
+        items: Iterable[Tuple[Hashable, GroupStats]] = self.groups.items()
+        if group_key.ordered:
+            items = sorted(items, key=lambda item: item[0])  # type: ignore
+        else:
+            items = sorted(items, key=lambda item: item[1].requests, reverse=True)
+        for key, group in items:
+            yield group_key.label(key), group
+        if self.other.requests:
+            yield OTHER, self.other
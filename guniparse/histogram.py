@@ -0,0 +1,128 @@
+import math
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional, plain loops are used without it
+    np = None
+
+SUB_BITS = 5  # 2 ** SUB_BITS buckets for every power of two, so a bucket is at most ~3% wide
+SUB_BUCKETS = 1 << SUB_BITS
+PRECISION = SUB_BITS + 1  # values below 2 ** PRECISION get a bucket each
+BUCKETS = (64 - PRECISION) * SUB_BUCKETS + 2 * SUB_BUCKETS  # enough for any 64 bit value
+MAX_VALUE = 2 ** 64 - 1  # the biggest value that has a bucket
+EXACT_FLOAT = 2 ** 53  # smaller integers are exact as float64, so their bit length can be taken from the exponent
+
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+
+def bucket_index(value: int) -> int:
+    shift = value.bit_length() - PRECISION
+    if shift <= 0:
+        return value
+    return (shift << SUB_BITS) + (value >> shift)
+
+
+def _clamp(value: int) -> int:
+    return min(max(value, 0), MAX_VALUE)
+
+
+def bucket_bounds(index: int) -> Tuple[int, int]:
+    """:return: lowest and highest value that falls into the bucket"""
+    if index < 2 * SUB_BUCKETS:
+        return index, index
+    shift = (index >> SUB_BITS) - 1
+    mantissa = index - (shift << SUB_BITS)
+    return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+
+@dataclass
+class LatencyHistogram:
+    """
+    Log-linear histogram of non negative integers (request times in microseconds). It has a fixed number of buckets,
+    so memory does not depend on the number of values, and quantiles are within ~3% of the exact ones.
+    Values out of range (e.g. a negative request time of a broken log) are clamped to 0 and MAX_VALUE.
+    Merging two histograms is exact: the result is the same as if all values were added to one histogram.
+    """
+
+    counts: array = field(default_factory=lambda: array("Q", bytes(8 * BUCKETS)), repr=False)
+    count: int = 0
+    total: int = 0
+    min: Optional[int] = None
+    max: Optional[int] = None
+
+    def add(self, value: int) -> None:
+        if not 0 <= value <= MAX_VALUE:
+            value = _clamp(value)
+        shift = value.bit_length() - PRECISION
+        self.counts[value if shift <= 0 else (shift << SUB_BITS) + (value >> shift)] += 1
+        self.count += 1
+        self.total += value
+        if self.max is None or value > self.max:
+            self.max = value
+        if self.min is None or value < self.min:
+            self.min = value
+
+    def add_many(self, values: Sequence[int]) -> None:
+        """Same as add for every value, vectorized with numpy when it is installed."""
+        if not len(values):
+            return
+        if np is not None:
+            v = np.asarray(values, dtype=np.int64)
+            lowest, highest = int(v.min()), int(v.max())
+            if lowest < 0:
+                v = np.maximum(v, 0)
+                lowest, highest = int(v.min()), int(v.max())
+            if highest < EXACT_FLOAT:
+                _, bit_lengths = np.frexp(v.astype(np.float64))
+                shift = bit_lengths.astype(np.int64) - PRECISION
+                indices = np.where(shift <= 0, v, (shift << SUB_BITS) + (v >> np.maximum(shift, 0)))
+                counts = np.frombuffer(self.counts, dtype=np.uint64)
+                counts += np.bincount(indices, minlength=BUCKETS).astype(np.uint64)
+                self._add_summary(len(values), int(v.sum()), lowest, highest)
+                return
+        lowest, highest = min(values), max(values)
+        if lowest < 0 or highest > MAX_VALUE:
+            values = [_clamp(value) for value in values]
+            lowest, highest = min(values), max(values)
+        counts = self.counts
+        for value in values:
+            shift = value.bit_length() - PRECISION
+            counts[value if shift <= 0 else (shift << SUB_BITS) + (value >> shift)] += 1
+        self._add_summary(len(values), sum(values), lowest, highest)
+
+    def _add_summary(self, count: int, total: int, lowest: Optional[int], highest: Optional[int]) -> None:
+        self.count += count
+        self.total += total
+        if highest is not None and (self.max is None or highest > self.max):
+            self.max = highest
+        if lowest is not None and (self.min is None or lowest < self.min):
+            self.min = lowest
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        for i, count in enumerate(other.counts):
+            if count:
+                self.counts[i] += count
+        self._add_summary(other.count, other.total, other.min, other.max)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0
+
+    def quantile(self, q: float) -> Optional[int]:
+        """:return: middle of the bucket with the q-th value (clamped to min and max), None if histogram is empty"""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                low, high = bucket_bounds(i)
+                return min(max((low + high) // 2, self.min), self.max)  # type: ignore
+        return self.max
+
+    def quantiles(self) -> Dict[float, Optional[int]]:
+        return {q: self.quantile(q) for q in QUANTILES}
@@ -0,0 +1,80 @@
+import math
+import struct
+from hashlib import blake2b
+from typing import Union
+
+MAGIC = b"GPHLL1"
+HEADER = struct.Struct("=6sBq")  # magic, precision, number of added values
+
+
+def hash64(value: Union[str, bytes]) -> int:
+    """Stable 64 bit hash, unlike hash() it is the same in every process, so registers can be merged and stored."""
+    if isinstance(value, str):
+        value = value.encode("utf-8", "surrogateescape")
+    return int.from_bytes(blake2b(value, digest_size=8).digest(), "little")
+
+
+class HyperLogLog:
+    """
+    Approximate number of distinct values (Flajolet et al.) in 2 ** precision bytes of registers, no matter how
+    many values are added. Standard error of the estimate is 1.04 / sqrt(2 ** precision), about 0.81% for the
+    default precision of 14 (16KiB), so ~98% of estimates are within 2 standard errors of the exact count.
+
+    Merging is lossless: a union of two counters is the same as if all values were added to one counter.
+    """
+
+    PRECISION = 14
+
+    def __init__(self, precision: int = PRECISION):
+        if not 4 <= precision <= 18:
+            raise ValueError("Precision has to be between 4 and 18")
+        self.precision = precision
+        self.added = 0  # number of added values, including repeated ones
+        self.registers = bytearray(1 << precision)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, HyperLogLog):
+            return NotImplemented
+        return (self.precision, self.added, self.registers) == (other.precision, other.added, other.registers)
+
+    @property
+    def error(self) -> float:
+        """Relative standard error of the estimate"""
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def add(self, value: Union[str, bytes]) -> None:
+        h = hash64(value)
+        bits = 64 - self.precision
+        index = h >> bits
+        rank = bits - (h & ((1 << bits) - 1)).bit_length() + 1  # position of the first set bit
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+        self.added += 1
+
+    def merge(self, other: "HyperLogLog") -> None:
+        if other.precision != self.precision:
+            raise ValueError("Can't merge counters of different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        self.added += other.added
+
+    def count(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / math.fsum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)  # linear counting is more precise for small cardinalities
+        return min(round(estimate), self.added)
+
+    def to_bytes(self) -> bytes:
+        return HEADER.pack(MAGIC, self.precision, self.added) + bytes(self.registers)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HyperLogLog":
+        magic, precision, added = HEADER.unpack_from(data)
+        if magic != MAGIC or len(data) != HEADER.size + (1 << precision):
+            raise ValueError("Not a serialized HyperLogLog")
+        counter = cls(precision)
+        counter.added = added
+        counter.registers[:] = data[HEADER.size:]
+        return counter
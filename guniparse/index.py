@@ -0,0 +1,145 @@
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Optional, Tuple
+
+from guniparse.order import OrderEnum
+from guniparse.seek import Buffer, LineTime, TimeSeeker
+from guniparse.timestamp import Timestamp
+
+# magic, byte order, interval, inode, mtime in ns, indexed size, number of entries, hash of the indexed tail
+HEADER = struct.Struct("=6s1sqqqqq20s")
+MAGIC = b"GPIDX1"
+TAIL_SIZE = 4096
+
+
+class TimestampIndex:
+    """
+    Sparse sidecar index of a log file (`access.log` -> `access.log.gpidx`). For every INTERVAL bytes it keeps
+    the date and offset of the first log line after that place, so finding a date is an in-memory binary search
+    followed by a bisection of a single interval.
+
+    The index is valid as long as inode, size and mtime of the file did not change. If the file only grew
+    (same inode, same bytes at the end of the indexed part), new intervals are appended to the index.
+    """
+
+    SUFFIX = ".gpidx"
+    INTERVAL = 1024 * 1024
+
+    def __init__(self, interval: Optional[int] = None):
+        self.interval = interval or self.INTERVAL
+        self.inode = 0
+        self.mtime_ns = 0
+        self.size = 0  # size of the file when it was indexed
+        self.tail_hash = b""
+        self.dates = array("q")
+        self.offsets = array("q")
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    @staticmethod
+    def _tail_hash(buf: Buffer, size: int) -> bytes:
+        return hashlib.sha1(buf[max(0, size - TAIL_SIZE):size]).digest()
+
+    def extend(self, buf: Buffer, line_time: LineTime, stat: os.stat_result) -> None:
+        """Indexes intervals after the last indexed line."""
+        seeker = TimeSeeker(buf, line_time, OrderEnum.asc)
+        size = len(buf)
+        mark = 0 if not self.offsets else (self.offsets[-1] // self.interval + 1) * self.interval
+        for mark in range(mark, size, self.interval):
+            # an interval without a log (e.g. a huge traceback) gets no entry, it is searched with its neighbours
+            place, t, _ = seeker.probe(mark, min(mark + self.interval, size))
+            if place is None or t is None or (self.offsets and place <= self.offsets[-1]):
+                continue
+            self.dates.append(t)
+            self.offsets.append(place)
+        self.inode = stat.st_ino
+        self.mtime_ns = stat.st_mtime_ns
+        self.size = size
+        self.tail_hash = self._tail_hash(buf, size)
+
+    def status(self, buf: Buffer, stat: os.stat_result) -> str:
+        """
+        :return: "valid", "appended" if the file only grew since it was indexed or "stale"
+        """
+        if stat.st_ino != self.inode or stat.st_size < self.size:
+            return "stale"
+        if stat.st_size == self.size and stat.st_mtime_ns == self.mtime_ns:
+            return "valid"
+        if self._tail_hash(buf, self.size) == self.tail_hash:
+            return "appended"
+        return "stale"
+
+    def window(self, since: Timestamp, order: OrderEnum) -> Tuple[int, Optional[int]]:
+        """
+        :return: byte range where the first log earlier than since (descending order) or not earlier than since
+            (ascending order) starts. If it is not in that range, it's the end of the range
+        """
+        lo, hi = 0, len(self.dates)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            t = self.dates[mid]
+            if (t < since) if order == OrderEnum.desc else (t >= since):
+                hi = mid
+            else:
+                lo = mid + 1
+        start = self.offsets[lo - 1] if lo > 0 else 0
+        end = self.offsets[lo] if lo < len(self.offsets) else None
+        return start, end
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(
+                MAGIC, sys.byteorder[0].encode(), self.interval, self.inode, self.mtime_ns, self.size,
+                len(self.offsets), self.tail_hash,
+            ))
+            self.dates.tofile(f)
+            self.offsets.tofile(f)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["TimestampIndex"]:
+        """:return: index or None if there is no index or it is not readable"""
+        try:
+            with open(path, "rb") as f:
+                header = f.read(HEADER.size)
+                if len(header) < HEADER.size:
+                    return None
+                magic, byteorder, interval, inode, mtime_ns, size, count, tail_hash = HEADER.unpack(header)
+                if magic != MAGIC or byteorder != sys.byteorder[0].encode() or interval <= 0:
+                    return None
+                index = cls(interval)
+                index.dates.fromfile(f, count)
+                index.offsets.fromfile(f, count)
+        except (OSError, EOFError):
+            return None
+        index.inode, index.mtime_ns, index.size, index.tail_hash = inode, mtime_ns, size, tail_hash
+        return index
+
+    @classmethod
+    def for_file(cls, path: str, line_time: LineTime, interval: Optional[int] = None) -> "TimestampIndex":
+        """
+        Loads sidecar index of the log file, extends or rebuilds it if the file changed and saves it back.
+        If the sidecar can't be written the index is just kept in memory.
+        """
+        index_path = path + cls.SUFFIX
+        index = cls.load(index_path)
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            if stat.st_size == 0:
+                return cls(interval)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                status = "stale" if index is None else index.status(buf, stat)
+                if status == "valid":
+                    return index  # type: ignore
+                if status == "stale":
+                    index = cls(interval if index is None else index.interval)
+                index.extend(buf, line_time, stat)  # type: ignore
+        try:
+            index.save(index_path)  # type: ignore
+        except OSError:
+            pass
+        return index  # type: ignore
@@ -1,9 +1,11 @@
+import sys
 from dataclasses import dataclass, make_dataclass
-from datetime import datetime
-from typing import Dict, Optional
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional, Union
 
+from guniparse.timestamp import Timestamp, decode_timestamp
 
-DATETIME_FORMAT = "%d/%b/%Y:%H:%M:%S %z"
+# text fields with few distinct values, every parsed line would hold its own copy of them otherwise
+INTERNED_FIELDS = ("h", "l", "u", "f", "a")
 
 
 class _RawLogEntry:
@@ -12,13 +14,20 @@ class _RawLogEntry:
         return cls(**{k: v for k, v in d.items() if k in cls.__annotations__})  # type: ignore
 
 
+def _optional_int(value: str) -> Optional[int]:
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
 @dataclass
 class LogEntry:
     # I wish I could use pydantic with its field aliases...
     h: str  # remote address
     l: str  # '-'
     u: str  # user name
-    t: datetime  # date of the request
+    t: Timestamp  # date of the request in epoch seconds
     r: str  # status line  ...I dont need to parse it so I'll just leave it as str
     s: int  # status
     b: Optional[int]  # response length or '-' (CLF format)
@@ -26,21 +35,84 @@ class LogEntry:
     a: str  # user agent
     D: int  # request time in microseconds
 
+    # no __dict__ per entry, buffered logs take a fraction of the memory
+    __slots__ = ("h", "l", "u", "t", "r", "s", "b", "f", "a", "D")
+
+    @classmethod
+    def from_raw(cls, raw: _RawLogEntry, only: Optional[Iterable[str]] = None) -> "LogEntry":
+        """
+        :param raw: entry with string fields
+        :param only: fields that should be converted, the rest is left as None. All fields if not provided
+        """
+        return cls.from_strings(vars(raw), only)
+
     @classmethod
-    def from_raw(cls, raw: _RawLogEntry) -> "LogEntry":
-        fields = raw.__dict__.copy()
-        for k, v in cls.__annotations__.items():
-            # I wish I could use python 3.10 pattern matching ;)
-            if v is int:
-                fields[k] = int(fields[k])
-            elif v is Optional[int]:
-                try:
-                    fields[k] = int(fields[k])
-                except ValueError:
-                    fields[k] = None
-            elif v is datetime:
-                fields[k] = datetime.strptime(fields[k], DATETIME_FORMAT)
-        return cls(**fields)
+    def from_strings(cls, values: Mapping[str, Optional[str]], only: Optional[Iterable[str]] = None) -> "LogEntry":
+        """
+        Converts string values straight into LogEntry, e.g. groupdict() of a match. Other keys are ignored.
+        :param only: fields that should be converted, the rest is left as None. All fields if not provided
+        :raise TypeError: if a field is missing
+        :raise ValueError: if a value can't be converted
+        """
+        only = _FIELDS if only is None else frozenset(only)
+        try:
+            converted = [
+                _CONVERTERS[name](values[name]) if name in only and values[name] is not None else None
+                for name in cls.__slots__
+            ]
+        except KeyError as e:
+            raise TypeError(f"Missing field {e}") from None
+        return cls(*converted)
+
+
+_FIELDS = frozenset(LogEntry.__slots__)
+_CONVERTERS: Dict[str, Callable[[str], Any]] = {
+    name: sys.intern if name in INTERNED_FIELDS else str for name in LogEntry.__slots__
+}
+_CONVERTERS.update(t=decode_timestamp, s=int, b=_optional_int, D=int)
+
+
+class _LazyText:
+    """Text field that keeps bytes of the value in the slot of LogEntry and decodes them on the first access."""
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.slot = vars(LogEntry)[name]
+        self.intern = name in INTERNED_FIELDS
+
+    def __get__(self, obj: Any, objtype: Optional[type] = None) -> Union[str, "_LazyText", None]:
+        if obj is None:
+            return self
+        value = self.slot.__get__(obj, objtype)
+        if isinstance(value, bytes):
+            # invalid utf-8 (it happens in user agents) must not make the whole line unparsable
+            value = value.decode(errors="replace")
+            if self.intern:
+                value = sys.intern(value)
+            self.slot.__set__(obj, value)
+        return value
+
+    def __set__(self, obj: Any, value: Union[str, bytes, None]) -> None:
+        self.slot.__set__(obj, value)
+
+
+class BytesLogEntry(LogEntry):
+    """LogEntry parsed straight from bytes. Numbers are converted right away, text only when accessed."""
+
+    __slots__ = ()
+
+    h = _LazyText()
+    l = _LazyText()
+    u = _LazyText()
+    r = _LazyText()
+    f = _LazyText()
+    a = _LazyText()
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, LogEntry):
+            return all(getattr(self, k) == getattr(other, k) for k in LogEntry.__slots__)
+        return NotImplemented
+
+    __hash__ = None  # type: ignore
 
 
 # I just want to have strings here
@@ -2,10 +2,20 @@ import signal
 import sys
 from datetime import datetime
 from types import FrameType
-from typing import Optional
+from typing import List, Optional, Tuple
 
 from guniparse.cli import Cli
+from guniparse.endpoints import Rule
+from guniparse.filters import LogFilter
+from guniparse.follow import LogFollower
+from guniparse.groups import GroupedStats
+from guniparse.malformed import MalformedLines
 from guniparse.parser import LogParser, OrderEnum
+from guniparse.profile import ScanProfile
+from guniparse.stats import Stats
+from guniparse.stream import LogStream, is_stream
+
+TOP_FIELDS = ("r", "h", "a")  # request lines, client addresses and user agents
 
 
 def main():
@@ -18,7 +28,10 @@ def main():
     try:
         cli = Cli()
         kwargs = cli.parse(sys.argv)
-        guniparse_start(**kwargs)
+        if kwargs.pop("command", None) == "convert":
+            guniparse_convert(**kwargs)
+        else:
+            guniparse_start(**kwargs)
     except Exception:
         sys.exit("Something went wrong. Check your options and if log file is of valid format")
     except SystemExit as e:
@@ -26,14 +39,74 @@ def main():
 
 
 def guniparse_start(
-        path: str,
+        paths: List[str],
         _from: Optional[datetime] = None,
         to: Optional[datetime] = None,
-        order: OrderEnum = OrderEnum.desc
+        order: OrderEnum = OrderEnum.desc,
+        jobs: int = 1,
+        use_index: bool = False,
+        follow: bool = False,
+        top: Optional[int] = None,
+        top_capacity: int = 1000,
+        distinct: Tuple[str, ...] = (),
+        bucket: Optional[int] = None,
+        group_by: Optional[str] = None,
+        max_groups: int = GroupedStats.MAX_GROUPS,
+        endpoint_rules: Tuple[Rule, ...] = (),
+        checkpoint: Optional[str] = None,
+        profile: bool = False,
+        malformed_samples: int = 0,
+        status: Optional[LogFilter] = None,
+        method: Optional[LogFilter] = None,
+        path_prefix: Optional[LogFilter] = None,
+        client: Optional[LogFilter] = None,
+        min_duration: Optional[LogFilter] = None,
 ) -> None:
-    parser = LogParser()
-    stats = parser.stats(path, _from, to, order)
-    stats.print()
+    stats = Stats.configured(
+        top=TOP_FIELDS if top else (),
+        distinct=distinct,
+        top_k=top or 10,
+        top_capacity=max(top or 0, top_capacity),
+        bucket=bucket,
+        group_by=group_by,
+        max_groups=max_groups,
+        endpoint_rules=endpoint_rules,
+    )
+    if follow and profile:
+        sys.exit("--profile can't be used with --follow")
+    scan_profile = ScanProfile() if profile else None
+    filters = [f for f in (status, method, path_prefix, client, min_duration) if f is not None]
+    malformed = MalformedLines(malformed_samples)
+    parser = LogParser(
+        fields=stats.fields, use_index=use_index, profile=scan_profile, filters=filters, malformed=malformed
+    )
+    if any(map(is_stream, paths)):
+        if len(paths) > 1 or follow or checkpoint is not None:
+            sys.exit("Streamed logs can't be combined with other sources, --follow or --checkpoint")
+        stats = LogStream(parser, stats).run(paths[0], output=lambda report: print(report, file=sys.stderr))
+    elif len(paths) > 1:
+        if follow or checkpoint is not None:
+            sys.exit("--follow and --checkpoint need a single log file")
+        stats = parser.stats_many(paths, _from, to, order, stats)
+    elif follow:
+        LogFollower(paths[0], parser, stats).run()
+        return
+    else:
+        stats = parser.stats(paths[0], _from, to, order, jobs, stats, checkpoint)
+    if stats.series is not None:
+        print(file=sys.stderr)  # ends the progress line, the CSV goes to stdout as it is
+        print(stats.series.csv(), end="")
+    else:
+        stats.print()
+    if malformed.count:
+        print(malformed.report(), file=sys.stderr)
+    if scan_profile is not None:
+        print(scan_profile.report(), file=sys.stderr)
+
+
+def guniparse_convert(path: str, out: str) -> None:
+    count = LogParser().convert(path, out)
+    print(f"\rconverted {count} logs to {out}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,65 @@
+import random
+from typing import List, Optional
+
+
+class MalformedLines:
+    """
+    Counts lines that were not logs out of all parsed lines and keeps a uniform sample of them (reservoir sampling),
+    so a file full of tracebacks or logs of another format shows up instead of being skipped silently.
+    Lines rejected by filters before parsing are not counted, they are not parsed at all.
+    """
+
+    def __init__(self, sample_size: int = 0, seed: Optional[int] = None):
+        """
+        :param sample_size: how many of the malformed lines are kept, none by default
+        :param seed: seed of the sampling, random if not provided
+        """
+        self.sample_size = sample_size
+        self.lines = 0  # all parsed lines
+        self.count = 0  # lines that were not logs
+        self.samples: List[bytes] = []
+        self._random = random.Random(seed)
+
+    def add(self, line: bytes) -> None:
+        """:param line: line that is not a log, with or without the newline"""
+        self.count += 1
+        if len(self.samples) < self.sample_size:
+            self.samples.append(line.rstrip(b"\r\n"))
+        elif self.sample_size:
+            i = self._random.randrange(self.count)
+            if i < self.sample_size:
+                self.samples[i] = line.rstrip(b"\r\n")
+
+    @property
+    def rate(self) -> float:
+        return self.count / self.lines if self.lines else 0.0
+
+    def merge(self, other: "MalformedLines") -> None:
+        """Adds counts of other, samples are merged so every malformed line is still as likely to be kept"""
+        if other.count:
+            weight = other.count / (self.count + other.count)
+            pool = list(other.samples)
+            merged = []
+            for sample in self.samples:
+                if pool and self._random.random() < weight:
+                    merged.append(pool.pop())
+                else:
+                    merged.append(sample)
+            merged.extend(pool[:self.sample_size - len(merged)])
+            self.samples = merged
+        self.lines += other.lines
+        self.count += other.count
+
+    def summary(self) -> str:
+        """:return: number and share of malformed lines, empty if all lines were logs"""
+        if not self.count:
+            return ""
+        return f"skipped {self.count} malformed lines ({self.rate:.1%} of {self.lines} lines)"
+
+    def report(self) -> str:
+        """:return: summary with the samples, empty if all lines were logs"""
+        if not self.count:
+            return ""
+        rows = [self.summary()]
+        rows.extend(f"  {sample.decode(errors='replace')}" for sample in self.samples)
+        return "\n".join(rows)
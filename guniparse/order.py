@@ -0,0 +1,6 @@
+from enum import Enum
+
+
+class OrderEnum(Enum):
+    asc = "ascending"
+    desc = "descending"
@@ -1,12 +1,36 @@
+import heapq
+import mmap
 import os
 import re
-from datetime import datetime, timezone
-from enum import Enum
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from copy import deepcopy
+from datetime import datetime
+from functools import partial
+from operator import attrgetter
 from re import Pattern
-from typing import List, Tuple, Optional, Iterable
+from time import perf_counter
+from typing import AnyStr, BinaryIO, ContextManager, Dict, List, Tuple, Optional, Iterable, Sequence, Union
 
+from guniparse.checkpoint import ScanCheckpoint
+from guniparse.compressed import FileBuffer, GzipCheckpoints, detect_compression, open_log
+from guniparse.columnar import ColumnarLog, ColumnarWriter, is_columnar
+from guniparse.columns import TEXT_FIELDS, LogColumns, fits_columns
+from guniparse.filters import LogFilter
+from guniparse.format_compiler import (
+    FIELD_EXP, BatchParser, LineParser, compile_batch, compile_format, format_literals, group_name,
+)
+from guniparse.index import TimestampIndex
 from guniparse.log_entry import RawLogEntry, LogEntry
+from guniparse.malformed import MalformedLines
+from guniparse.order import OrderEnum
+from guniparse.profile import ScanProfile
+from guniparse.seek import Buffer, TimeSeeker
 from guniparse.stats import Stats
+from guniparse.timestamp import Timestamp, to_epoch
+from guniparse.utils import show_progress
+
+READ_BACK_SIZE = 64 * 1024
 
 
 class LogLineParser:
@@ -16,10 +40,40 @@ class LogLineParser:
     sub_pipeline: List[Tuple[Pattern, str]] = [
         (re.compile(r"%\(t\)s"), r"\[%(t)s\]"),  # the groups would not match as expected otherwise
     ]
-    field_exp = re.compile(r"%\({?[\w\-_]+}?\w?\)s")
+    field_exp = FIELD_EXP
 
-    def __init__(self):
-        self.line_exp = re.compile(self._prepare_line_exp(self.LOG_FORMAT))
+    def __init__(
+            self,
+            log_format: Optional[str] = None,
+            fields: Optional[Iterable[str]] = None,
+            profile: Optional[ScanProfile] = None,
+            malformed: Optional[MalformedLines] = None,
+    ):
+        """
+        :param log_format: gunicorn `access_log_format`, LOG_FORMAT if not provided
+        :param fields: LogEntry fields that should be extracted, the rest is left as None. All fields if not provided
+        :param profile: where parse_block records its stages and counts lines, nothing is recorded if not provided
+        :param malformed: where parse_block counts lines and records the ones that are not logs
+        """
+        self.log_format = log_format or self.LOG_FORMAT
+        self.fields: Tuple[str, ...] = tuple(LogEntry.__annotations__) if fields is None else tuple(fields)
+        unknown = set(self.fields) - set(LogEntry.__annotations__)
+        if unknown:
+            raise ValueError(f"Unknown fields: {sorted(unknown)}")
+        self.line_exp = re.compile(self._prepare_line_exp(self.log_format))
+        # a line without the literal text of line_exp in the right order can't match it, which is much cheaper
+        # to find out than with line_exp itself on lines that are not logs (tracebacks, error log lines)
+        literals = (" ", *format_literals(self.log_format))
+        self._literals = literals
+        self._literals_bytes = tuple(literal.encode() for literal in literals)
+        # fields that are not in the format at all, no line can give them
+        self._missing = set(self.fields) - set(self.line_exp.groupindex)
+        # specialized parsers for the format, None if the format can't produce LogEntry at all
+        self._compiled: Optional[LineParser] = compile_format(self.log_format, self.fields)
+        self._compiled_bytes: Optional[LineParser] = compile_format(self.log_format, self.fields, binary=True)
+        self._batches: Dict[Tuple[str, ...], Optional[BatchParser]] = {}  # by kept text fields
+        self.profile = profile
+        self.malformed = MalformedLines() if malformed is None else malformed
 
     def _prepare_line_exp(self, log_format: str) -> str:
         # eventually there is only one thing in pipeline but yeah...whatever
@@ -33,7 +87,7 @@ class LogLineParser:
             exp += log_format[old_end:start]
             inside = log_format[start+2:end-2]  # get rid of %( and )s
             # named groups to easily extract with .groupdict()
-            exp += f"(?P<{inside.replace('{', '').replace('}', '').replace('-', '_')}>.*)"
+            exp += f"(?P<{group_name(inside)}>.*)"
             old_end = end
 
         exp += log_format[old_end:]
@@ -43,123 +97,727 @@ class LogLineParser:
         m = self.line_exp.match(line)
         return RawLogEntry.from_dict(m.groupdict())
 
-    def parse_line(self, line: str) -> LogEntry:
-        return LogEntry.from_raw(self._raw_parse_line(line))
+    def _parse_slow(self, line: str, fields: Optional[Iterable[str]] = None) -> Optional[LogEntry]:
+        """
+        Parses line with line_exp, values go from the match straight into LogEntry.
+        :return: None if the line does not have the structure of the format
+        :raise ValueError: if a value can't be converted
+        """
+        if self._missing or not _has_literals(line, self._literals):
+            return None
+        m = self.line_exp.match(line)
+        if m is None:
+            return None
+        return LogEntry.from_strings(m.groupdict(), fields)
+
+    def parse_line(self, line: str) -> Optional[LogEntry]:
+        """
+        :return: parsed line or None if it is not a log
+        :raise ValueError: if the line looks like a log, but a value can't be converted
+        """
+        if self._compiled is not None:
+            parsed = self._compiled(line)
+            if parsed is not None:
+                return parsed
+        # fallback for lines the specialized pattern rejects, e.g. quotes inside of the user agent
+        return self._parse_slow(line, self.fields)
+
+    def parse_bytes(self, line: bytes) -> Optional[LogEntry]:
+        """Parses line without decoding it first. Text fields are decoded only when accessed. See parse_line."""
+        if self._compiled_bytes is not None:
+            parsed = self._compiled_bytes(line)
+            if parsed is not None:
+                return parsed
+        if not _has_literals(line, self._literals_bytes):
+            return None
+        return self._parse_slow(line.decode(errors="replace"), self.fields)
+
+    def parse_block(self, lines: Sequence[bytes], columns: LogColumns) -> None:
+        """
+        Parses lines into columns, keeping text fields the columns were created with.
+        Lines that are not logs are skipped and recorded in malformed.
+        """
+        text_fields = tuple(columns.text)
+        if text_fields not in self._batches:
+            self._batches[text_fields] = compile_batch(self.log_format, text_fields, binary=True)
+        batch = self._batches[text_fields]
+        self.malformed.lines += len(lines)
+        if self.profile is not None:
+            self._profiled_block(batch, list(lines), columns, self.profile)
+        elif batch is None:
+            for line in lines:
+                self._append_slow(line, columns)
+        else:
+            batch(lines, columns, self._append_slow)
+
+    def _profiled_block(
+            self, batch: Optional[BatchParser], lines: List[bytes], columns: LogColumns, profile: ScanProfile
+    ) -> None:
+        """Same as parse_block, but lines are matched first and converted after that, so both are timed."""
+        before = len(columns)
+        mark = perf_counter()
+        if batch is None:
+            for line in lines:
+                self._append_slow(line, columns)
+            profile.lap("fallback", mark)
+            profile.count("fallback", len(lines))
+        else:
+            matches = list(map(batch.search, lines))
+            mark = profile.lap("regex", mark)
+            fallback_time = profile.times["fallback"]
+            batch(lines, columns, partial(self._timed_slow, profile=profile), matches)
+            profile.lap("conversion", mark)
+            profile.times["conversion"] -= profile.times["fallback"] - fallback_time  # timed on its own
+            profile.count("fallback", matches.count(None))
+        logs = len(columns) - before
+        profile.count("lines", len(lines))
+        profile.count("logs", logs)
+        profile.count("malformed", len(lines) - logs)
+
+    def _timed_slow(self, line: bytes, columns: LogColumns, profile: ScanProfile) -> None:
+        mark = perf_counter()
+        self._append_slow(line, columns)
+        profile.lap("fallback", mark)
+
+    def _append_slow(self, line: bytes, columns: LogColumns) -> None:
+        if _has_literals(line, self._literals_bytes):
+            try:
+                parsed = self._parse_slow(line.decode(errors="replace"), self.fields)
+                if parsed is not None:
+                    columns.append(parsed)
+                    return
+            except ValueError:  # a value can't be converted or does not fit its column
+                pass
+        self.malformed.add(line)
 
 
-class OrderEnum(Enum):
-    asc = "ascending"
-    desc = "descending"
+def _has_literals(line: AnyStr, literals: Tuple[AnyStr, ...]) -> bool:
+    """:return: if the line contains all the literals in the given order"""
+    position = 0
+    for literal in literals:
+        position = line.find(literal, position)
+        if position < 0:
+            return False
+        position += len(literal)
+    return True
 
 
 class LogParser:
-    def __init__(self):
-        self._line_parser = LogLineParser()
+    # parallel scan does not split the file into parts smaller than that
+    CHUNK_MIN_SIZE = 4 * 1024 * 1024
+    CHUNKS_PER_JOB = 4
+    BLOCK_SIZE = 1024 * 1024  # lines are parsed into columns in blocks of about that many bytes
+    PROBE_INTERVAL = 1000  # every that many lines rejected by filters one is parsed to see where reading is
 
-    @staticmethod
-    def _get_next_place(curr: int, start: int, end: int, too_far: bool) -> int:
-        if too_far:
-            return start + (curr - start) // 2
-        return curr + (end - curr) // 2
+    def __init__(
+            self,
+            fields: Optional[Iterable[str]] = None,
+            log_format: Optional[str] = None,
+            use_index: bool = False,
+            profile: Optional[ScanProfile] = None,
+            filters: Iterable[LogFilter] = (),
+            malformed: Optional[MalformedLines] = None,
+    ):
+        """
+        :param fields: LogEntry fields the caller needs, e.g. Stats.FIELDS. The rest is not extracted from lines.
+            `t` is always extracted as it is needed to find the time range. All fields if not provided
+        :param log_format: gunicorn `access_log_format`, LogLineParser.LOG_FORMAT if not provided
+        :param use_index: if time ranges should be found with a sidecar TimestampIndex (created if missing).
+            Not used for compressed files
+        :param profile: ScanProfile to record time of every stage of scans and counters in.
+            Nothing is measured if not provided
+        :param filters: only logs accepted by all of the filters are read, besides the time range
+        :param malformed: where scans count lines that are not logs, e.g. with a sample size to keep some of them
+        """
+        self.filters = tuple(filters)
+        if fields is not None:
+            fields = tuple(dict.fromkeys(("t", *fields, *(name for f in self.filters for name in f.fields))))
+        self.profile = profile
+        self.malformed = MalformedLines() if malformed is None else malformed
+        self._line_parser = LogLineParser(log_format, fields, profile, self.malformed)
+        self._prefilters = [
+            check for check in (f.prefilter(self._line_parser.log_format) for f in self.filters) if check is not None
+        ]
+        # text fields filters need besides the ones of Stats
+        self._filter_text = tuple(dict.fromkeys(name for f in self.filters for name in f.fields if name in TEXT_FIELDS))
+        self.use_index = use_index
+        self._indexes: Dict[str, TimestampIndex] = {}
+        self._checkpoints: Dict[str, Tuple[Tuple[int, int], GzipCheckpoints]] = {}  # by path, with mtime and size
+
+    def parse_line(self, line: bytes) -> Optional[LogEntry]:
+        """:return: parsed line or None if the line is not a log"""
+        try:
+            parsed = self._line_parser.parse_bytes(line)
+        except ValueError:  # looks like a log, but e.g. the date is broken, rare compared to lines that are not logs
+            return None
+        # the same lines are malformed whether they are read line by line or in blocks
+        return parsed if parsed is None or fits_columns(parsed) else None
+
+    def _parse_counted(self, line: bytes) -> Optional[LogEntry]:
+        """Same as parse_line, but the line is counted in malformed, unlike lines parsed to find a place in the file"""
+        parsed = self.parse_line(line)
+        self.malformed.lines += 1
+        if parsed is None:
+            self.malformed.add(line)
+        return parsed
+
+    def _passes(self, line: bytes) -> bool:
+        """:return: if the raw line may be accepted by filters, see LogFilter.prefilter"""
+        return all(check(line) for check in self._prefilters)
+
+    def accepts(self, log: LogEntry) -> bool:
+        """:return: if the log is accepted by all filters"""
+        return all(f.accepts(log) for f in self.filters)
+
+    def parse_filtered(self, line: bytes) -> Optional[LogEntry]:
+        """:return: parsed line or None if the line is not a log or filters do not accept it"""
+        if not self._passes(line):
+            return None
+        parsed = self._parse_counted(line)
+        return parsed if parsed is not None and self.accepts(parsed) else None
+
+    def _filter_columns(self, columns: LogColumns) -> LogColumns:
+        """:return: logs accepted by all filters"""
+        if not self.filters or not columns:
+            return columns
+        kept = [i for i, accepted in enumerate(zip(*(f.mask(columns) for f in self.filters))) if all(accepted)]
+        if self.profile is not None:
+            self.profile.count("filtered", len(columns) - len(kept))
+        return columns if len(kept) == len(columns) else columns.take(kept)
+
+    def _line_time(self, line: bytes) -> Optional[Timestamp]:
+        parsed = self.parse_line(line)
+        return None if parsed is None else parsed.t
 
-    def _open(self, path: str, since: Optional[datetime], order: OrderEnum):
+    def find_offset(
+            self, path: str, since: Union[datetime, Timestamp], order: OrderEnum, start: int = 0,
+            end: Optional[int] = None
+    ) -> int:
         """
-        Opens log file and sets descriptor at the right place
+        Finds where logs since given date start, by binary search over memory mapped file.
+        Gzip files are searched in decompressed data with help of GzipCheckpoints.
         :param path: path to the log file.
-        :param since: since when the log file should be read. if no tzinfo provided then assumes utc
+        :param since: datetime or epoch seconds. if no tzinfo provided then assumes utc
         :param order: order of logs in the log file. If newest logs at the top of the file then should be OrderEnum.desc
-        :return: file descriptor
+        :param start: offset of a line where the search begins
+        :param end: offset where the search ends, end of the file if not provided
+        :return: offset of the first log earlier than since (descending order) or not earlier than since
+            (ascending order). end if there is no such log
         """
-        f = open(path, "rb")
-        if not since:
-            return f
+        since = to_epoch(since)
+        compression = detect_compression(path)
+        if compression == "gzip":
+            checkpoints = self._gzip_checkpoints(path)
+            with checkpoints.open() as f:
+                return self._seek(FileBuffer(f, checkpoints.size), since, order, start, end)
+        if compression is not None:
+            return start  # bz2 and xz can only be streamed, logs before since are skipped while reading
+        if self.use_index:
+            start, end = self._index_window(path, since, order, start, end)
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return 0
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                return self._seek(buf, since, order, start, end)
 
-        while True:
-            try:
-                line_place = f.tell()
-                line_datetime = self._line_parser.parse_line(f.readline().decode()).t
-            except:
-                pass
-            else:
-                break
+    def _seek(self, buf: Buffer, since: Timestamp, order: OrderEnum, start: int, end: Optional[int]) -> int:
+        seeker = TimeSeeker(buf, self._line_time, order)
+        if self.profile is None:
+            return seeker.find_offset(since, start, end)
+        with self.profile.timer("seek"):
+            offset = seeker.find_offset(since, start, end)
+        self.profile.count("seeks")
+        self.profile.count("bisection_steps", seeker.steps)
+        self.profile.count("probes", seeker.probes)
+        return offset
 
-        if order == order.desc:
-            if line_datetime < since:
-                f.seek(line_place)
-                return f
-        else:
-            if line_datetime >= since:
-                f.seek(line_place)
-                return f
+    def _index_window(
+            self, path: str, since: Timestamp, order: OrderEnum, start: int, end: Optional[int]
+    ) -> Tuple[int, Optional[int]]:
+        """Narrows the search down to a single interval of the index."""
+        if path not in self._indexes:
+            self._indexes[path] = TimestampIndex.for_file(path, self._line_time)
+        index_start, index_end = self._indexes[path].window(since, order)
+        start = max(start, index_start)
+        if end is None or (index_end is not None and index_end < end):
+            end = index_end
+        if end is not None and start > end:
+            start = end
+        return start, end
 
-        f.seek(0, os.SEEK_END)
-        start = 0
-        end = f.tell()
-        where = end // 2
-        line_place = -1
-        old_line_place = 0
-        while old_line_place != line_place:
-            f.seek(where)
-            while f.read(1) != b"\n":
-                where -= 1
-                # seek to -1 is not possible as first log was already checked
-                f.seek(where)
-            old_line_place = line_place
-            line_place = f.tell()
-            line_datetime = self._line_parser.parse_line(f.readline().decode()).t
-
-            too_far = False
-            if order == OrderEnum.desc and line_datetime < since:
-                too_far = True
-            elif order == OrderEnum.asc and line_datetime >= since:
-                too_far = True
-
-            where = self._get_next_place(line_place, start, end, too_far)
-            if too_far:
-                end = line_place
-            else:
-                start = line_place
+    def _open(self, path: str, since: Optional[Union[datetime, Timestamp]], order: OrderEnum) -> BinaryIO:
+        """
+        Opens log file and sets descriptor at the right place. Compressed files are decompressed on the fly
+        :param path: path to the log file.
+        :param since: since when the log file should be read (datetime or epoch seconds).
+            if no tzinfo provided then assumes utc
+        :param order: order of logs in the log file. If newest logs at the top of the file then should be OrderEnum.desc
+        :return: file descriptor
+        """
+        compression = detect_compression(path)
+        f = self._gzip_checkpoints(path).open() if compression == "gzip" else open_log(path)
+        if since is not None and compression in (None, "gzip"):
+            f.seek(self.find_offset(path, since, order))
         return f
 
-    def _parsed_lines(
-            self, path: str, _from: Optional[datetime], to: Optional[datetime], order: OrderEnum
+    def _gzip_checkpoints(self, path: str) -> GzipCheckpoints:
+        """:return: checkpoints of the file shared by all reads and searches of it, new ones if the file changed"""
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        if path not in self._checkpoints or self._checkpoints[path][0] != version:
+            self._checkpoints[path] = version, GzipCheckpoints(path)
+        return self._checkpoints[path][1]
+
+    @staticmethod
+    def _bounds(
+            _from: Optional[datetime], to: Optional[datetime], order: OrderEnum
+    ) -> Tuple[Optional[Timestamp], Optional[Timestamp], Optional[Timestamp], Optional[Timestamp]]:
+        """
+        :return: _from and to in epoch seconds, date where reading starts and date where it stops
+        """
+        # compare plain epoch seconds per line instead of aware datetimes
+        if to is not None:
+            to = to_epoch(to)
+        if _from is not None:
+            _from = to_epoch(_from)
+        if order == OrderEnum.desc:
+            return _from, to, to, _from
+        return _from, to, _from, to
+
+    def _read_lines(
+            self,
+            f: BinaryIO,
+            end: Optional[int],
+            _from: Optional[Timestamp],
+            to: Optional[Timestamp],
+            order: OrderEnum,
     ) -> Iterable[LogEntry]:
-        since = None
-        if to:
-            if not to.tzinfo:
-                to = to.replace(tzinfo=timezone.utc)
+        """
+        Parses lines from the current position of f until the end offset or until logs leave the time range.
+        Logs before the time range are skipped.
+        """
+        profile = self.profile
+        descending = order == OrderEnum.desc
+        rejected = 0
+        place = f.tell()
+        mark = 0.0 if profile is None else perf_counter()
+        while (end is None or place < end) and (line := f.readline()):
+            place += len(line)
+            if profile is not None:
+                mark = profile.lap("io", mark)
+            if self._prefilters and not self._passes(line):
+                rejected += 1
+                if profile is not None:
+                    profile.count("lines")
+                    profile.count("bytes", len(line))
+                    profile.count("prefiltered")
+                # rejected lines are not parsed, but now and then one is, so reading stops when logs leave the range
+                if rejected % self.PROBE_INTERVAL == 0:
+                    t = self._line_time(line)
+                    if t is not None and _past_range(t, _from, to, descending):
+                        break
+                continue
+            parsed = self._parse_counted(line)
+            if profile is not None:
+                mark = profile.lap("parse", mark)
+                profile.count("lines")
+                profile.count("bytes", len(line))
+                profile.count("malformed" if parsed is None else "logs")
+            if parsed is None:
+                continue
             if order == OrderEnum.desc:
-                since = to
-        if _from:
-            if not _from.tzinfo:
-                _from = _from.replace(tzinfo=timezone.utc)
-            if order == OrderEnum.asc:
-                since = _from
-
-        f = self._open(path, since, order)
-        while line := f.readline():
-            try:
-                parsed = self._line_parser.parse_line(line.decode())
-            except:
+                if _from is not None and parsed.t < _from:
+                    break
+                if to is not None and parsed.t >= to:
+                    continue  # not there yet, e.g. file that can't be searched
+            else:
+                if to is not None and parsed.t >= to:
+                    break
+                if _from is not None and parsed.t < _from:
+                    continue
+            if self.filters and not self.accepts(parsed):
+                if profile is not None:
+                    profile.count("filtered")
                 continue
-            if order == OrderEnum.desc and _from and parsed.t < _from:
-                break
-            if order == OrderEnum.asc and to and parsed.t >= to:
-                break
             yield parsed
-        f.close()
+            if profile is not None:
+                mark = perf_counter()
+
+    def _read_columns(
+            self,
+            f: BinaryIO,
+            end: Optional[int],
+            _from: Optional[Timestamp],
+            to: Optional[Timestamp],
+            order: OrderEnum,
+            text_fields: Iterable[str] = (),
+    ) -> Iterable[LogColumns]:
+        """Same as _read_lines, but parses blocks of lines into columns."""
+        text_fields = tuple(dict.fromkeys((*text_fields, *self._filter_text)))
+        descending = order == OrderEnum.desc
+        profile = self.profile
+        place = f.tell()
+        rest = b""
+        while True:
+            mark = perf_counter()
+            data = f.read(self.BLOCK_SIZE if end is None else min(self.BLOCK_SIZE, end - place))
+            place += len(data)
+            if profile is not None:
+                mark = profile.lap("io", mark)
+                profile.count("bytes", len(data))
+            if data:
+                data = rest + data
+                cut = data.rfind(b"\n") + 1
+                lines, rest = data[:cut].split(b"\n")[:-1], data[cut:]
+            else:
+                lines, rest = [rest] if rest else [], b""
+            if profile is not None:
+                profile.lap("split", mark)
+            past = False  # if the block reaches past the range, which lines rejected by prefilters can't tell
+            if self._prefilters:
+                if (to is not None and not descending) or (_from is not None and descending):
+                    t = next(filter(None, map(self._line_time, reversed(lines))), None)
+                    past = t is not None and _past_range(t, _from, to, descending)
+                count = len(lines)
+                lines = [line for line in lines if self._passes(line)]
+                if profile is not None:
+                    profile.count("lines", count - len(lines))
+                    profile.count("prefiltered", count - len(lines))
+            columns = LogColumns(text_fields)
+            self._line_parser.parse_block(lines, columns)
+            mark = perf_counter()
+            columns, stop = columns.clip(_from, to, descending)
+            stop = stop or past
+            if profile is not None:
+                profile.lap("clip", mark)
+            columns = self._filter_columns(columns)
+            if columns:
+                yield columns
+            if stop or not data:
+                return
+
+    def _parsed_lines(
+            self, path: str, _from: Optional[datetime], to: Optional[datetime], order: OrderEnum
+    ) -> Iterable[LogEntry]:
+        _from, to, since, _ = self._bounds(_from, to, order)
+        with self._open(path, since, order) as f:
+            yield from self._read_lines(f, None, _from, to, order)
+
+    def _last_time(self, buf: Buffer) -> Optional[Timestamp]:
+        """:return: date of the last log in the buffer, read backwards block by block"""
+        end = len(buf)
+        while end > 0:
+            start = max(0, end - READ_BACK_SIZE)
+            lines = buf[start:end].split(b"\n")
+            partial = lines.pop(0) if start > 0 else b""  # may be the end of a line that starts earlier
+            for line in reversed(lines):
+                t = self._line_time(line)
+                if t is not None:
+                    return t
+            end = start + len(partial)
+        return None
+
+    def time_span(self, path: str) -> Tuple[Optional[Timestamp], Optional[Timestamp]]:
+        """
+        :return: dates of the first and the last log of the file. None if there are no logs or the date can't be
+            found without reading the whole file (the last log of bz2 and xz files)
+        """
+        compression = detect_compression(path)
+        with (self._gzip_checkpoints(path).open() if compression == "gzip" else open_log(path)) as f:
+            first = next(filter(None, map(self._line_time, f)), None)
+            if compression == "gzip":
+                return first, self._last_time(FileBuffer(f, self._gzip_checkpoints(path).size))
+            if compression is not None or first is None:
+                return first, None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                return first, self._last_time(buf)
+
+    def _overlaps(
+            self, path: str, _from: Optional[Timestamp], to: Optional[Timestamp], order: OrderEnum
+    ) -> bool:
+        """:return: if the file may have logs between _from and to"""
+        first, last = self.time_span(path)
+        if first is None:
+            return False
+        if last is None:  # only the first log is known, it's the newest one in descending order
+            earliest, latest = (None, first) if order == OrderEnum.desc else (first, None)
+        else:
+            earliest, latest = min(first, last), max(first, last)
+        return not (
+            (_from is not None and latest is not None and latest < _from)
+            or (to is not None and earliest is not None and earliest >= to)
+        )
+
+    def merged_lines(
+            self, paths: Iterable[str], _from: Optional[datetime], to: Optional[datetime], order: OrderEnum
+    ) -> Iterable[LogEntry]:
+        """
+        Parses many log files (e.g. rotated ones or from many hosts), every one of them in the given order,
+        into a single stream in that order. Streams are merged lazily with a heap, nothing is sorted.
+        Files with no logs between _from and to are not parsed at all.
+        """
+        since, until, _, _ = self._bounds(_from, to, order)
+        # without a range every file is read anyway, finding its time span would only cost another pass over it
+        ranged = since is not None or until is not None
+        streams = [
+            self._parsed_lines(path, _from, to, order)
+            for path in paths
+            if not ranged or self._overlaps(path, since, until, order)
+        ]
+        return heapq.merge(*streams, key=attrgetter("t"), reverse=order == OrderEnum.desc)
+
+    def stats_many(
+            self,
+            paths: Iterable[str],
+            _from: Optional[datetime] = None,
+            to: Optional[datetime] = None,
+            order: OrderEnum = OrderEnum.desc,
+            stats_obj: Optional[Stats] = None,
+    ) -> Stats:
+        """Stats of logs of many files, see merged_lines. Stats see logs of all files in a chronological order."""
+        stats_obj = Stats() if stats_obj is None else stats_obj
+        self._check_fields(stats_obj)
+        with self._running():
+            for log in self.merged_lines(paths, _from, to, order):
+                if stats_obj.requests % 1000 == 0:
+                    show_progress(stats_obj.requests)
+                if self.profile is None:
+                    stats_obj.update(log)
+                else:
+                    with self.profile.timer("stats"):
+                        stats_obj.update(log)
+            stats_obj.end()
+        return stats_obj
+
+    def _running(self) -> ContextManager[None]:
+        """Measures the total time of a scan if it is profiled"""
+        return nullcontext() if self.profile is None else self.profile.running()
+
+    def _update_columns(self, stats_obj: Stats, columns: LogColumns) -> None:
+        if self.profile is None:
+            stats_obj.update_columns(columns)
+        else:
+            with self.profile.timer("stats"):
+                stats_obj.update_columns(columns)
+
+    def update_stats(self, lines: Sequence[bytes], stats_obj: Stats) -> LogColumns:
+        """
+        Parses a block of lines (without newlines) and updates stats_obj with them, e.g. for lines that
+        do not come from a file. Lines that are not logs are skipped.
+        :return: parsed logs, with the text fields stats_obj needs
+        """
+        columns = LogColumns(dict.fromkeys((*_text_fields(stats_obj), *self._filter_text)))
+        self._line_parser.parse_block(list(filter(self._passes, lines)) if self._prefilters else lines, columns)
+        columns = self._filter_columns(columns)
+        self._update_columns(stats_obj, columns)
+        return columns
+
+    def _check_fields(self, stats_obj: Stats) -> None:
+        missing = set(stats_obj.fields) - set(self._line_parser.fields)
+        if missing:
+            raise ValueError(f"Stats need fields that are not extracted: {sorted(missing)}")
+
+    def _plan_chunks(self, path: str, since: Optional[Timestamp], until: Optional[Timestamp], order: OrderEnum,
+                     jobs: int) -> List[Tuple[int, int]]:
+        """
+        Splits part of the file between since and until into byte ranges that start at the beginning of a line.
+        """
+        start = 0 if since is None else self.find_offset(path, since, order)
+        end = os.path.getsize(path) if until is None else self.find_offset(path, until, order, start)
+
+        step = max(self.CHUNK_MIN_SIZE, (end - start) // (jobs * self.CHUNKS_PER_JOB) + 1)
+        bounds = [start]
+        with open(path, "rb") as f:
+            for place in range(start + step, end, step):
+                f.seek(place - 1)
+                f.readline()
+                if bounds[-1] < f.tell() < end:
+                    bounds.append(f.tell())
+        bounds.append(max(start, end))
+        return list(zip(bounds, bounds[1:]))
+
+    def _parallel_stats(
+            self,
+            path: str,
+            _from: Optional[datetime],
+            to: Optional[datetime],
+            order: OrderEnum,
+            jobs: int,
+            stats_obj: Stats,
+    ) -> Stats:
+        _from, to, since, until = self._bounds(_from, to, order)
+        chunks = self._plan_chunks(path, since, until, order, jobs)
+        # every part starts from a copy of the empty stats_obj, so parts are configured the same way.
+        # Arguments are pickled lazily by the executor, so it must not be the instance results are merged into
+        empty = deepcopy(stats_obj)
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [
+                executor.submit(
+                    _range_stats, self._line_parser.log_format, self._line_parser.fields,
+                    path, start, end, _from, to, order, empty, self.profile is not None, self.filters,
+                    self.malformed.sample_size,
+                )
+                for start, end in chunks
+            ]
+            # merged in the order of the file, so the result is the same as from a single pass
+            for future in futures:
+                part, profile, malformed = future.result()
+                stats_obj.merge(part)
+                self.malformed.merge(malformed)
+                if self.profile is not None and profile is not None:
+                    self.profile.merge(profile)
+                show_progress(stats_obj.requests)
+        return stats_obj
+
+    def convert(self, path: str, out: str) -> int:
+        """
+        Parses the whole log file once and saves it as a columnar file, see ColumnarWriter.
+        The columnar file can be passed to stats instead of the log file.
+        :return: number of logs
+        """
+        writer = ColumnarWriter()
+        with open_log(path) as f:
+            for columns in self._read_columns(f, None, None, None, OrderEnum.asc, TEXT_FIELDS):
+                writer.add(columns)
+        writer.save(out)
+        return len(writer.numeric["t"])
+
+    def _columnar_stats(
+            self, path: str, _from: Optional[datetime], to: Optional[datetime], stats_obj: Stats
+    ) -> Stats:
+        """Stats of a columnar file. Logs are sorted by time there, so order does not matter."""
+        _from, to, _, _ = self._bounds(_from, to, OrderEnum.asc)
+        with ColumnarLog(path) as log:
+            for columns in log.blocks(_from, to, dict.fromkeys((*_text_fields(stats_obj), *self._filter_text))):
+                self._update_columns(stats_obj, self._filter_columns(columns))
+                show_progress(stats_obj.requests)
+        stats_obj.end()
+        return stats_obj
+
+    @staticmethod
+    def _complete_end(path: str) -> int:
+        """:return: offset right after the last complete line, a line that is still being written is left out"""
+        with open(path, "rb") as f:
+            end = os.fstat(f.fileno()).st_size
+            while end > 0:
+                start = max(0, end - READ_BACK_SIZE)
+                f.seek(start)
+                found = f.read(end - start).rfind(b"\n")
+                if found != -1:
+                    return start + found + 1
+                end = start
+        return 0
+
+    def _resumed_stats(self, path: str, checkpoint: str, order: OrderEnum, stats_obj: Stats) -> Stats:
+        saved = ScanCheckpoint.load(checkpoint)
+        start = 0
+        if saved is not None and saved.applies_to(path, stats_obj):
+            start, stats_obj = saved.offset, saved.stats
+        end = self._complete_end(path)
+        with open(path, "rb") as f:
+            f.seek(start)
+            for columns in self._read_columns(f, end, None, None, order, _text_fields(stats_obj)):
+                self._update_columns(stats_obj, columns)
+                show_progress(stats_obj.requests)
+        stats_obj.end()
+        ScanCheckpoint.of(path, max(start, end), stats_obj).save(checkpoint)
+        return stats_obj
 
     def stats(
             self,
             path: str,
             _from: Optional[datetime] = None,
             to: Optional[datetime] = None,
-            order: OrderEnum = OrderEnum.desc
+            order: OrderEnum = OrderEnum.desc,
+            jobs: int = 1,
+            stats_obj: Optional[Stats] = None,
+            checkpoint: Optional[str] = None,
+    ) -> Stats:
+        """
+        :param jobs: number of processes. If more than one, the file is split into parts parsed in parallel.
+            Compressed files are always parsed in a single process
+        :param stats_obj: empty Stats to fill, e.g. from Stats.configured. New Stats if not provided
+        :param path: log file, possibly compressed, or a columnar file made by convert
+        :param checkpoint: path of a ScanCheckpoint. If given, stats of the whole file are continued from
+            the checkpoint (or computed from the start if it does not apply to the file anymore) and saved
+            to it again, so the next call parses only appended lines. Only for plain files without a time range,
+            the file is parsed in a single process and the returned Stats are the saved ones, not stats_obj
+        """
+        stats_obj = Stats() if stats_obj is None else stats_obj
+        self._check_fields(stats_obj)
+        if checkpoint is not None:
+            if _from is not None or to is not None or detect_compression(path) is not None or is_columnar(path):
+                raise ValueError("Checkpoints work only for whole plain log files")
+            if self.filters:
+                raise ValueError("Checkpoints can't be used with filters, saved stats do not know about them")
+        with self._running():
+            return self._stats(path, _from, to, order, jobs, stats_obj, checkpoint)
+
+    def _stats(
+            self,
+            path: str,
+            _from: Optional[datetime],
+            to: Optional[datetime],
+            order: OrderEnum,
+            jobs: int,
+            stats_obj: Stats,
+            checkpoint: Optional[str],
     ) -> Stats:
-        stats_obj = Stats()
-        for log in self._parsed_lines(path, _from, to, order):
-            if stats_obj.requests % 1000 == 0:
-                print(f"\rrequests: {stats_obj.requests}", end="")
-            stats_obj.update(log)
+        if checkpoint is not None:
+            return self._resumed_stats(path, checkpoint, order, stats_obj)
+        if is_columnar(path):
+            return self._columnar_stats(path, _from, to, stats_obj)
+        if jobs > 1 and detect_compression(path) is None:
+            stats_obj = self._parallel_stats(path, _from, to, order, jobs, stats_obj)
+            stats_obj.end()
+            return stats_obj
+
+        _from, to, since, _ = self._bounds(_from, to, order)
+        with self._open(path, since, order) as f:
+            for columns in self._read_columns(f, None, _from, to, order, _text_fields(stats_obj)):
+                self._update_columns(stats_obj, columns)
+                show_progress(stats_obj.requests)
         stats_obj.end()
         return stats_obj
+
+
+def _past_range(t: Timestamp, _from: Optional[Timestamp], to: Optional[Timestamp], descending: bool) -> bool:
+    """:return: if a log of date t is past the end of the range in the order of reading"""
+    if descending:
+        return _from is not None and t < _from
+    return to is not None and t >= to
+
+
+def _text_fields(stats_obj: Stats) -> Tuple[str, ...]:
+    return tuple(name for name in stats_obj.fields if name in TEXT_FIELDS)
+
+
+def _range_stats(
+        log_format: str,
+        fields: Tuple[str, ...],
+        path: str,
+        start: int,
+        end: int,
+        _from: Optional[Timestamp],
+        to: Optional[Timestamp],
+        order: OrderEnum,
+        stats_obj: Stats,
+        profiled: bool = False,
+        filters: Tuple[LogFilter, ...] = (),
+        sample_size: int = 0,
+) -> Tuple[Stats, Optional[ScanProfile], MalformedLines]:
+    """
+    Computes Stats of a byte range of the file. Module level, so it can be sent to worker processes.
+    :param sample_size: how many malformed lines are kept
+    :return: the Stats, the ScanProfile of the range if profiled and malformed lines of the range
+    """
+    parser = LogParser(
+        fields, log_format, profile=ScanProfile() if profiled else None, filters=filters,
+        malformed=MalformedLines(sample_size),
+    )
+    with open(path, "rb") as f:
+        f.seek(start)
+        for columns in parser._read_columns(f, end, _from, to, order, _text_fields(stats_obj)):
+            parser._update_columns(stats_obj, columns)
+    return stats_obj, parser.profile, parser.malformed
@@ -0,0 +1,105 @@
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Any, Dict, Iterator
+
+# stages in the order they are reported
+STAGES = ("seek", "io", "split", "regex", "conversion", "fallback", "parse", "clip", "stats")
+STAGE_NAMES = {
+    "seek": "finding --from/--to",
+    "io": "reading (and decompressing)",
+    "split": "splitting blocks into lines",
+    "regex": "matching lines",
+    "conversion": "converting values",
+    "fallback": "parsing with the slow pattern",
+    "parse": "parsing lines one by one",
+    "clip": "applying the time range",
+    "stats": "updating stats",
+}
+COUNTERS = (
+    "lines", "logs", "malformed", "fallback", "prefiltered", "filtered", "bytes", "seeks", "bisection_steps", "probes"
+)
+
+
+class ScanProfile:
+    """
+    Time spent in every stage of a scan and counters of what was done, filled in by LogParser when passed to it.
+    Stages are timed per block of lines, lines parsed one by one (many files, --follow) are timed per line.
+
+    Times of stages are summed over worker processes of a parallel scan, so they can add up to more than
+    the total, which is the wall clock time of LogParser.stats calls.
+    Counters:
+        lines: lines read, logs: lines that were logs, malformed: lines that were not logs and were skipped,
+        fallback: lines the fast pattern rejected (e.g. quotes in the user agent), parsed with the slow one,
+        prefiltered: lines rejected by filters before parsing, filtered: logs rejected by filters after it,
+        bytes: bytes read (decompressed), seeks: searches for a place in the file,
+        bisection_steps: steps of those searches, probes: lines parsed by those searches
+    """
+
+    def __init__(self):
+        self.times: Dict[str, float] = dict.fromkeys(STAGES, 0.0)
+        self.counters: Dict[str, int] = dict.fromkeys(COUNTERS, 0)
+        self.total = 0.0
+
+    def lap(self, stage: str, since: float) -> float:
+        """
+        Adds the time since `since` to the stage, cheap enough to be called for every line.
+        :return: now, so laps of consecutive stages can be chained
+        """
+        now = perf_counter()
+        self.times[stage] += now - since
+        return now
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.lap(stage, start)
+
+    @contextmanager
+    def running(self) -> Iterator[None]:
+        """Measures the total time"""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.total += perf_counter() - start
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] += n
+
+    def merge(self, other: "ScanProfile") -> None:
+        """Adds times and counters of other, but not its total, which overlaps with the total of this one."""
+        for stage, seconds in other.times.items():
+            self.times[stage] += seconds
+        for name, n in other.counters.items():
+            self.counters[name] += n
+
+    @property
+    def lines_per_sec(self) -> float:
+        return self.counters["lines"] / self.total if self.total else 0.0
+
+    @property
+    def mb_per_sec(self) -> float:
+        return self.counters["bytes"] / 1024 / 1024 / self.total if self.total else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        """:return: everything as plain values, e.g. to export as JSON"""
+        return {
+            "total": self.total,
+            "times": dict(self.times),
+            "counters": dict(self.counters),
+            "lines_per_sec": self.lines_per_sec,
+            "mb_per_sec": self.mb_per_sec,
+        }
+
+    def report(self) -> str:
+        rows = [f"profile: {self.total:.3f}s, {self.lines_per_sec:.0f} lines/sec, {self.mb_per_sec:.2f} MB/sec"]
+        for stage in STAGES:
+            seconds = self.times[stage]
+            if seconds:
+                share = seconds / self.total * 100 if self.total else 0.0
+                rows.append(f"  {STAGE_NAMES[stage]:<30}{seconds:>10.3f}s {share:>6.1f}%")
+        rows.extend(f"  {name:<30}{n:>10}" for name, n in self.counters.items())
+        return "\n".join(rows)
@@ -0,0 +1,94 @@
+from typing import Callable, Optional, Protocol, Tuple, Union
+
+from guniparse.order import OrderEnum
+from guniparse.timestamp import Timestamp
+
+
+class Buffer(Protocol):
+    """What the seeker needs from the file, e.g. mmap.mmap"""
+
+    def __len__(self) -> int: ...
+
+    def __getitem__(self, item: slice) -> bytes: ...
+
+    def find(self, sub: bytes, start: int = ..., end: int = ...) -> int: ...
+
+
+LineTime = Callable[[bytes], Optional[Timestamp]]
+
+
+class TimeSeeker:
+    """
+    Binary search over a time ordered log. Finds offset of the first log line (in file order) that is
+    earlier than given date in a descending log or not earlier than given date in an ascending one.
+    Lines that can't be parsed are skipped. A probe landing in a block of them (e.g. a long traceback) scans it
+    to its end, as any line after it could be the one searched for, but the scanned part is never searched again,
+    so every line that is not a log is parsed at most once.
+    """
+
+    def __init__(self, buf: Buffer, line_time: LineTime, order: OrderEnum):
+        """
+        :param buf: whole log file, e.g. mmap.mmap
+        :param line_time: returns date of the line or None if the line is not a log
+        :param order: order of logs in the file
+        """
+        self.buf = buf
+        self.line_time = line_time
+        self.order = order
+        self.probes = 0  # lines parsed by all searches so far
+        self.steps = 0  # halvings of the searched range by all searches so far
+
+    def _line_start(self, where: int, end: int) -> int:
+        """First line start at or after where, end if there is none before end."""
+        if where == 0:
+            return 0
+        newline = self.buf.find(b"\n", where - 1, end)
+        return end if newline == -1 else newline + 1
+
+    def _line_end(self, start: int) -> int:
+        newline = self.buf.find(b"\n", start)
+        return len(self.buf) if newline == -1 else newline + 1
+
+    def probe(self, where: int, end: int) -> Tuple[Optional[int], Optional[Timestamp], int]:
+        """
+        :return: start of the first log line at or after where (None if there is none before end),
+            its date and where the line ends
+        """
+        start = self._line_start(where, end)
+        while start < end:
+            line_end = self._line_end(start)
+            self.probes += 1
+            t = self.line_time(self.buf[start:line_end])
+            if t is not None:
+                return start, t, line_end
+            start = line_end
+        return None, None, end
+
+    def _found(self, t: Timestamp, since: Timestamp) -> bool:
+        if self.order == OrderEnum.desc:
+            return t < since
+        return t >= since
+
+    def find_offset(self, since: Union[Timestamp, int], start: int = 0, end: Optional[int] = None) -> int:
+        """
+        :param since: date in epoch seconds
+        :param start: offset of a line start where the search begins
+        :param end: offset where the search ends, end of the file if not provided
+        :return: offset of the line or end if no line matches
+        """
+        best = len(self.buf) if end is None else end
+        lo, hi = start, best
+        # the answer is the first matching log line starting in [lo, hi) or best if there is none.
+        # Both moves of the bounds drop the part the probe scanned, lines that are not logs are parsed once
+        while lo < hi:
+            self.steps += 1
+            mid = (lo + hi) // 2
+            place, t, line_end = self.probe(mid, hi)
+            if place is None or t is None:
+                hi = mid
+            elif self._found(t, since):
+                best = place
+                hi = mid
+            else:
+                lo = line_end
+        return best
@@ -0,0 +1,139 @@
+from array import array
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional, Tuple
+
+from guniparse.columns import LogColumns
+from guniparse.timestamp import Timestamp
+
+try:
+    import numpy as np
+except ImportError:  # optional, plain loops are used without it
+    np = None
+
+COLUMNS = ("requests", "1xx", "2xx", "3xx", "4xx", "5xx", "bytes", "time")  # time is a sum of request times in us
+UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+MIN_GROWTH = 64
+
+
+def parse_bucket(value: str) -> int:
+    """:return: number of seconds in a bucket written like 30s, 1m, 1h or 1d"""
+    number, unit = value[:-1], value[-1:]
+    if not number.isdigit() or int(number) < 1 or unit not in UNITS:
+        raise ValueError(f"Invalid bucket size {value!r}")
+    return int(number) * UNITS[unit]
+
+
+class TimeSeries:
+    """
+    Per bucket counts of requests, status classes, response bytes and request times. Every column is an array
+    indexed by the bucket number counted from the epoch, so a line costs a few array increments and memory is
+    8 bytes per column per bucket, no matter how many lines fall into it. Buckets are aligned to the epoch (UTC).
+    """
+
+    def __init__(self, bucket: int = 60):
+        if bucket < 1:
+            raise ValueError("Bucket has to be at least one second")
+        self.bucket = bucket
+        self.start = 0  # bucket number of the first element of columns
+        self.first: Optional[int] = None  # lowest and highest bucket number with any request
+        self.last: Optional[int] = None
+        self.columns: List[array] = [array("Q") for _ in COLUMNS]
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, TimeSeries):
+            return NotImplemented
+        return self.bucket == other.bucket and list(self.rows()) == list(other.rows())
+
+    def _grow(self, number: int) -> None:
+        """Makes room for the bucket number, at least doubling the columns so growing is amortized O(1)."""
+        size = len(self.columns[0])
+        if not size:
+            self.start = number
+        if number < self.start:
+            extra = max(self.start - number, size, MIN_GROWTH)
+            for column in self.columns:
+                column[0:0] = array("Q", bytes(8 * extra))
+            self.start -= extra
+        elif number >= self.start + size:
+            extra = max(number - self.start - size + 1, size, MIN_GROWTH)
+            for column in self.columns:
+                column.extend(array("Q", bytes(8 * extra)))
+
+    def _mark(self, number: int) -> int:
+        """:return: index of the bucket number in columns"""
+        if self.first is None or self.last is None:
+            self.first = self.last = number
+        elif number < self.first:
+            self.first = number
+        elif number > self.last:
+            self.last = number
+        i = number - self.start
+        if not 0 <= i < len(self.columns[0]):
+            self._grow(number)
+            i = number - self.start
+        return i
+
+    def add(self, t: Timestamp, s: int, b: Optional[int], D: int) -> None:
+        i = self._mark(t // self.bucket)
+        columns = self.columns
+        columns[0][i] += 1
+        status_class = s // 100
+        if 1 <= status_class <= 5:
+            columns[status_class][i] += 1
+        if b:
+            columns[6][i] += b
+        columns[7][i] += D
+
+    def add_columns(self, logs: LogColumns) -> None:
+        """Same as add for every log, vectorized with numpy when it is installed."""
+        if not logs:
+            return
+        if np is None:
+            for t, s, b, D in zip(logs.t, logs.s, logs.b, logs.D):
+                self.add(t, s, b, D)
+            return
+        numbers = np.asarray(logs.t, dtype=np.int64) // self.bucket
+        self._mark(int(numbers.min()))
+        self._mark(int(numbers.max()))
+        indices = numbers - self.start
+        size = len(self.columns[0])
+        status_classes = np.asarray(logs.s, dtype=np.int64) // 100
+        weights = [None, *(status_classes == c for c in range(1, 6)), logs.b, logs.D]
+        for column, weight in zip(self.columns, weights):
+            added = np.bincount(indices, weights=None if weight is None else np.asarray(weight), minlength=size)
+            target = np.frombuffer(column, dtype=np.uint64)
+            target += added.astype(np.uint64)
+
+    def merge(self, other: "TimeSeries") -> None:
+        if other.bucket != self.bucket:
+            raise ValueError("Can't merge series of different bucket sizes")
+        if other.first is None or other.last is None:
+            return
+        self._mark(other.first)
+        self._mark(other.last)
+        offset = other.start - self.start
+        for column, other_column in zip(self.columns, other.columns):
+            for i in range(other.first - other.start, other.last - other.start + 1):
+                if other_column[i]:
+                    column[offset + i] += other_column[i]
+
+    def rows(self) -> Iterator[Tuple[Timestamp, Tuple[int, ...]]]:
+        """:return: start of every bucket between the first and the last request with its values of COLUMNS"""
+        if self.first is None or self.last is None:
+            return
+        for number in range(self.first, self.last + 1):
+            i = number - self.start
+            yield Timestamp(number * self.bucket), tuple(column[i] for column in self.columns)
+
+    def csv(self) -> str:
+        lines = ["time,requests,requests/sec,1xx,2xx,3xx,4xx,5xx,bytes,avg time [us]"]
+        for t, (requests, *statuses, size, total_time) in self.rows():
+            lines.append(",".join([
+                datetime.fromtimestamp(t, timezone.utc).isoformat(),
+                str(requests),
+                f"{requests / self.bucket:g}",
+                *map(str, statuses),
+                str(size),
+                str(total_time // requests if requests else 0),
+            ]))
+        return "\n".join(lines) + "\n"
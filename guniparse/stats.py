@@ -1,47 +1,232 @@
+from array import array
 from collections import Counter
 from dataclasses import field, dataclass
-from datetime import datetime
-from typing import Optional
+from typing import ClassVar, Dict, Iterable, Optional, Tuple
 
+from guniparse.columns import LogColumns
+from guniparse.endpoints import DEFAULT_RULES, EndpointNormalizer, Rule
+from guniparse.groups import GroupedStats
+from guniparse.histogram import LatencyHistogram
+from guniparse.hll import HyperLogLog
 from guniparse.log_entry import LogEntry
-from guniparse.utils import size_fmt
+from guniparse.series import TimeSeries
+from guniparse.timestamp import Timestamp
+from guniparse.topk import SpaceSaving
+from guniparse.utils import duration_fmt, size_fmt
 
 
 @dataclass
 class Stats:
+    FIELDS: ClassVar[Tuple[str, ...]] = ("t", "s", "b", "D")  # LogEntry fields read by update
+
     requests: int = 0  # total number of requests
     reqs_per_sec: float = 0
     statuses_counts: Counter = field(default_factory=Counter)
     avg_resp_size: float = 0  # for status 2xx
     ok_resps: int = field(default=0, repr=False)
-    _first_date: Optional[datetime] = field(default=None, repr=False)
-    _last_date: Optional[datetime] = field(default=None, repr=False)
+    ok_resps_size: int = field(default=0, repr=False)  # total size of 2xx responses, exact so it can be merged
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram, repr=False)  # request time in microseconds
+    latency_by_class: Dict[int, LatencyHistogram] = field(default_factory=dict, repr=False)  # 2 for 2xx etc.
+    # most frequent values of LogEntry fields, e.g. {"r": SpaceSaving(1000)} for the busiest endpoints
+    top: Dict[str, SpaceSaving] = field(default_factory=dict, repr=False)
+    top_k: int = field(default=10, repr=False)  # how many of the most frequent values are printed
+    # approximate numbers of distinct values of LogEntry fields, e.g. {"h": HyperLogLog()} for unique clients
+    distinct: Dict[str, HyperLogLog] = field(default_factory=dict, repr=False)
+    series: Optional[TimeSeries] = field(default=None, repr=False)  # counts per time bucket
+    groups: Optional[GroupedStats] = field(default=None, repr=False)  # stats per endpoint, client etc.
+    # earliest and latest date seen, so it does not matter in which order logs come
+    _first_date: Optional[Timestamp] = field(default=None, repr=False)
+    _last_date: Optional[Timestamp] = field(default=None, repr=False)
+
+    @classmethod
+    def configured(
+            cls,
+            top: Iterable[str] = (),
+            distinct: Iterable[str] = (),
+            top_k: int = 10,
+            top_capacity: int = 1000,
+            distinct_precision: int = HyperLogLog.PRECISION,
+            bucket: Optional[int] = None,
+            group_by: Optional[str] = None,
+            max_groups: int = GroupedStats.MAX_GROUPS,
+            endpoint_rules: Iterable[Rule] = (),
+    ) -> "Stats":
+        """
+        :param top: LogEntry fields which most frequent values should be reported, e.g. ("r", "h", "a")
+        :param distinct: LogEntry fields which distinct values should be counted, e.g. ("h", "u")
+        :param top_k: how many of the most frequent values are printed
+        :param top_capacity: how many values are counted, counts are at most requests / top_capacity too high
+        :param distinct_precision: distinct counters use 2 ** distinct_precision bytes,
+            relative error is 1.04 / sqrt(2 ** distinct_precision)
+        :param bucket: if given, counts are also kept per bucket of that many seconds
+        :param group_by: if given, stats are also kept per group of logs, one of GROUP_KEYS, e.g. "endpoint"
+        :param max_groups: how many groups are reported, logs of the rest are reported together as "other"
+        :param endpoint_rules: rules of endpoint templates applied before the default ones, see EndpointNormalizer
+        """
+        return cls(
+            top={name: SpaceSaving(top_capacity) for name in top},
+            top_k=top_k,
+            distinct={name: HyperLogLog(distinct_precision) for name in distinct},
+            series=TimeSeries(bucket) if bucket else None,
+            groups=GroupedStats(
+                group_by, max_groups, EndpointNormalizer((*endpoint_rules, *DEFAULT_RULES))
+            ) if group_by else None,
+        )
+
+    @property
+    def fields(self) -> Tuple[str, ...]:
+        """LogEntry fields read by update of this instance"""
+        grouped = () if self.groups is None else (self.groups.field,)
+        extra = dict.fromkeys(name for name in (*self.top, *self.distinct, *grouped) if name not in self.FIELDS)
+        return self.FIELDS + tuple(extra)
 
-    def _update_first(self, log: LogEntry) -> None:
-        self._update(log)
-        self._first_date = log.t
-        self.update = self._update
+    def _update_dates(self, t: Timestamp) -> None:
+        if self._first_date is None or self._last_date is None:
+            self._first_date = self._last_date = t
+        elif t < self._first_date:
+            self._first_date = t
+        elif t > self._last_date:
+            self._last_date = t
 
-    def _update(self, log: LogEntry) -> None:
+    def update(self, log: LogEntry) -> None:
         self.requests += 1
         self.statuses_counts[log.s] += 1
         if log.s // 100 == 2:
-            size = log.b if log.b else 0
-            self.avg_resp_size = (self.avg_resp_size * self.ok_resps + size) / (self.ok_resps + 1)
+            if log.b:
+                self.ok_resps_size += log.b
             self.ok_resps += 1
-        self._last_date = log.t
+        self.latency.add(log.D)
+        status_class = log.s // 100
+        if status_class not in self.latency_by_class:
+            self.latency_by_class[status_class] = LatencyHistogram()
+        self.latency_by_class[status_class].add(log.D)
+        for name, summary in self.top.items():
+            summary.add(getattr(log, name))
+        for name, counter in self.distinct.items():
+            counter.add(getattr(log, name))
+        if self.series is not None:
+            self.series.add(log.t, log.s, log.b, log.D)
+        if self.groups is not None:
+            self.groups.update(log)
+        self._update_dates(log.t)
+
+    def update_columns(self, logs: LogColumns) -> None:
+        """Same as update for every log of the block, computed over whole columns."""
+        if not logs:
+            return
+        self.requests += len(logs)
+        statuses = Counter(logs.s)
+        self.statuses_counts.update(statuses)
+        status_classes = {status // 100 for status in statuses}
+        self.ok_resps += sum(count for status, count in statuses.items() if status // 100 == 2)
+        self.latency.add_many(logs.D)
+        if len(status_classes) == 1:  # usually, then whole columns belong to a single class
+            status_class = status_classes.pop()
+            if status_class == 2:
+                self.ok_resps_size += sum(logs.b)
+            self.latency_by_class.setdefault(status_class, LatencyHistogram()).add_many(logs.D)
+        else:
+            by_class: Dict[int, array] = {status_class: array("q") for status_class in sorted(status_classes)}
+            for s, b, D in zip(logs.s, logs.b, logs.D):
+                by_class[s // 100].append(D)
+                if s // 100 == 2:
+                    self.ok_resps_size += b
+            for status_class, values in by_class.items():
+                self.latency_by_class.setdefault(status_class, LatencyHistogram()).add_many(values)
+        for name, summary in self.top.items():
+            for value in logs.text[name]:
+                summary.add(value)
+        for name, counter in self.distinct.items():
+            for value in logs.text[name]:
+                counter.add(value)
+        if self.series is not None:
+            self.series.add_columns(logs)
+        if self.groups is not None:
+            self.groups.update_columns(logs)
+        self._update_dates(Timestamp(min(logs.t)))
+        self._update_dates(Timestamp(max(logs.t)))
+
+    def merge(self, other: "Stats") -> None:
+        """
+        Adds up results of other Stats, e.g. computed over another part of the file.
+        Merge parts in the order they appear in the file to keep statuses in the same order as a single pass would.
+        end() has to be called afterwards.
+        """
+        self.requests += other.requests
+        self.statuses_counts.update(other.statuses_counts)
+        self.ok_resps += other.ok_resps
+        self.ok_resps_size += other.ok_resps_size
+        self.latency.merge(other.latency)
+        for status_class, histogram in other.latency_by_class.items():
+            self.latency_by_class.setdefault(status_class, LatencyHistogram()).merge(histogram)
+        for name, summary in other.top.items():
+            self.top.setdefault(name, SpaceSaving(summary.capacity)).merge(summary)
+        for name, counter in other.distinct.items():
+            self.distinct.setdefault(name, HyperLogLog(counter.precision)).merge(counter)
+        if other.series is not None:
+            if self.series is None:
+                self.series = TimeSeries(other.series.bucket)
+            self.series.merge(other.series)
+        if other.groups is not None:
+            if self.groups is None:
+                self.groups = other.groups.empty()
+            self.groups.merge(other.groups)
+        for t in (other._first_date, other._last_date):
+            if t is not None:
+                self._update_dates(t)
 
     def end(self) -> None:
-        if self._first_date and self._last_date:
-            seconds = abs((self._first_date - self._last_date).total_seconds()) + 1
+        if self.ok_resps:
+            self.avg_resp_size = self.ok_resps_size / self.ok_resps
+        if self._first_date is not None and self._last_date is not None:
+            seconds = self._last_date - self._first_date + 1
             self.reqs_per_sec = self.requests / seconds
 
+    @staticmethod
+    def _latency_fmt(histogram: LatencyHistogram) -> str:
+        quantiles = " ".join(f"p{q * 100:g}={duration_fmt(v)}" for q, v in histogram.quantiles().items())
+        return f"{quantiles} max={duration_fmt(histogram.max)}"
+
+    def top_fmt(self) -> str:
+        """:return: top_k most frequent values of every counted field, with possible overestimation of counts"""
+        return "".join(
+            f"top {name}:\n" + "".join(
+                f"  {count}{f' (±{error})' if error else ''} {value}\n"
+                for value, count, error in summary.top(self.top_k)
+            )
+            for name, summary in self.top.items()
+        )
+
+    def distinct_fmt(self) -> str:
+        """:return: estimated number of distinct values of every counted field"""
+        return "".join(
+            f"distinct {name}: {counter.count()} (±{counter.error:.2%})\n" for name, counter in self.distinct.items()
+        )
+
+    def groups_fmt(self) -> str:
+        """:return: requests, statuses, bytes and response times of every group"""
+        if self.groups is None:
+            return ""
+        cache = "" if self.groups.normalizer is None else self.groups.normalizer.cache_fmt()
+        return cache + f"by {self.groups.by}:\n" + "".join(
+            f"  {label}: {group.requests} requests, responses: {dict(group.statuses_counts)}, "
+            f"bytes: {size_fmt(group.bytes)}, response time: {self._latency_fmt(group.latency)}\n"
+            for label, group in self.groups.rows()
+        )
+
     def print(self) -> None:
+        by_class = "".join(
+            f"  {status_class}xx: {self._latency_fmt(self.latency_by_class[status_class])}\n"
+            for status_class in sorted(self.latency_by_class)
+        )
         print(
             f"\rrequests: {self.requests}\n"
             f"requests/sec: {self.reqs_per_sec}\n"
             f"responses: {dict(self.statuses_counts)}\n"
             f"avg size of 2xx responses: {size_fmt(int(self.avg_resp_size))}\n"
+            f"response time: {self._latency_fmt(self.latency)}\n"
+            f"{by_class}"
+            f"{self.distinct_fmt()}"
+            f"{self.top_fmt()}"
+            f"{self.groups_fmt()}"
         )
-
-    update = _update_first
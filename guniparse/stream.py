@@ -0,0 +1,230 @@
+import asyncio
+import os
+import socket
+import stat
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, BinaryIO, Callable, Optional
+
+from guniparse.follow import SlidingWindow, live_report
+from guniparse.parser import LogParser
+from guniparse.stats import Stats
+
+STDIN = "-"
+UNIX_PREFIX = "unix:"
+UNIXGRAM_PREFIX = "unixgram:"
+
+
+def is_stream(source: str) -> bool:
+    """:return: if source is stdin (`-`) or a Unix socket (`unix:PATH` or `unixgram:PATH`) instead of a file"""
+    return source == STDIN or source.startswith((UNIX_PREFIX, UNIXGRAM_PREFIX))
+
+
+class _DatagramProtocol(asyncio.DatagramProtocol):
+    def __init__(self, stream: "LogStream"):
+        self.stream = stream
+
+    def datagram_received(self, data: bytes, addr: object) -> None:
+        # every datagram has whole lines, the last one is usually without a newline (e.g. syslog)
+        self.stream.offer(data if data.endswith(b"\n") else data + b"\n")
+
+
+class LogStream:
+    """
+    Parses logs piped to stdin or sent to a Unix socket (stream or datagram) while they come, without a file.
+
+    Data is read in chunks of up to CHUNK_SIZE bytes, cut after the last newline and put to a bounded queue
+    as blocks of whole lines, which are split and parsed in bulk by a single worker thread.
+    Reading never waits for parsing: when parsing falls behind and the queue is full, new blocks are dropped
+    and counted, so the writer (gunicorn) never blocks on a full pipe or socket.
+    """
+
+    CHUNK_SIZE = 256 * 1024
+    QUEUE_SIZE = 64  # blocks, so at most QUEUE_SIZE * CHUNK_SIZE bytes wait for parsing
+    REFRESH_INTERVAL = 5.0
+    WINDOWS = (60, 300)
+
+    def __init__(self, parser: LogParser, stats: Optional[Stats] = None, queue_size: int = QUEUE_SIZE):
+        """
+        :param parser: parser of lines, has to extract fields of stats
+        :param stats: Stats updated with new logs
+        :param queue_size: how many blocks of lines can wait for parsing before new ones are dropped
+        """
+        self.parser = parser
+        self.stats = stats if stats is not None else Stats()
+        self.window = SlidingWindow(max(self.WINDOWS))
+        self.queue_size = queue_size
+        self.received = 0  # bytes
+        self.dropped_blocks = 0
+        self.dropped_lines = 0
+        self._queue: Optional["asyncio.Queue[Optional[bytes]]"] = None
+        self._executor = ThreadPoolExecutor(max_workers=1)  # stats are updated in this thread only
+
+    def offer(self, block: bytes) -> bool:
+        """
+        Queues block of whole lines for parsing, drops it if the queue is full.
+        :return: if the block was queued
+        """
+        assert self._queue is not None, "offer is called only while ingesting"
+        self.received += len(block)
+        try:
+            self._queue.put_nowait(block)
+        except asyncio.QueueFull:
+            self.dropped_blocks += 1
+            self.dropped_lines += block.count(b"\n")
+            return False
+        return True
+
+    def _parse(self, block: bytes) -> None:
+        lines = block.split(b"\n")
+        if not lines[-1]:
+            lines.pop()
+        columns = self.parser.update_stats(lines, self.stats)
+        for t in columns.t:
+            self.window.add(t)
+
+    def report(self) -> str:
+        report = live_report(self.stats, self.window, self.WINDOWS)
+        if self.parser.malformed.count:
+            report += self.parser.malformed.summary() + "\n"
+        if self.dropped_lines:
+            report += f"dropped lines: {self.dropped_lines} (parsing could not keep up)\n"
+        return report
+
+    async def _consume(self) -> None:
+        """Parses queued blocks until None comes"""
+        assert self._queue is not None
+        loop = asyncio.get_running_loop()
+        while True:
+            block = await self._queue.get()
+            if block is None:
+                return
+            await loop.run_in_executor(self._executor, self._parse, block)
+
+    async def _read_chunks(self, read_chunk: Callable[[], Awaitable[bytes]], wait: bool) -> None:
+        """
+        Reads chunks until an empty one, blocks end with the last complete line of the chunk.
+        :param wait: if blocks should wait for a place in the queue instead of being dropped
+        """
+        rest = b""
+        while True:
+            chunk = await read_chunk()
+            if not chunk:
+                break
+            chunk = rest + chunk
+            cut = chunk.rfind(b"\n") + 1
+            if cut:
+                await self._put(chunk[:cut], wait)
+            rest = chunk[cut:]
+        if rest:
+            await self._put(rest + b"\n", wait)
+
+    async def _put(self, block: bytes, wait: bool) -> None:
+        if not wait:
+            self.offer(block)
+            return
+        assert self._queue is not None
+        self.received += len(block)
+        await self._queue.put(block)
+
+    async def read(self, reader: asyncio.StreamReader) -> None:
+        """Reads the stream until EOF"""
+        await self._read_chunks(lambda: reader.read(self.CHUNK_SIZE), wait=False)
+
+    async def _read_file(self, f: BinaryIO) -> None:
+        """
+        Reads a regular file redirected to stdin, those can't be read asynchronously. Nothing writes to the file,
+        so reading waits for parsing instead of dropping lines.
+        """
+        loop = asyncio.get_running_loop()
+        await self._read_chunks(lambda: loop.run_in_executor(None, f.read, self.CHUNK_SIZE), wait=True)
+
+    async def _read_stdin(self) -> None:
+        stdin = sys.stdin.buffer
+        if stat.S_ISREG(os.fstat(stdin.fileno()).st_mode):
+            await self._read_file(stdin)
+            return
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader(limit=self.CHUNK_SIZE)
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), stdin)
+        await self.read(reader)
+
+    async def _serve(self, source: str, stop: asyncio.Event) -> None:
+        """Listens on a Unix socket until stop is set"""
+        loop = asyncio.get_running_loop()
+        if source.startswith(UNIXGRAM_PREFIX):
+            path = source[len(UNIXGRAM_PREFIX):]
+            _remove_socket(path)
+            transport, _ = await loop.create_datagram_endpoint(
+                lambda: _DatagramProtocol(self), local_addr=path, family=socket.AF_UNIX  # type: ignore
+            )
+            try:
+                await stop.wait()
+            finally:
+                transport.close()
+            return
+
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            try:
+                await self.read(reader)
+            finally:
+                writer.close()
+
+        path = source[len(UNIX_PREFIX):]
+        _remove_socket(path)
+        server = await asyncio.start_unix_server(handle, path, limit=self.CHUNK_SIZE)
+        try:
+            await stop.wait()
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    async def ingest(self, source: str, stop: Optional[asyncio.Event] = None) -> Stats:
+        """
+        Parses logs from the source until its end (stdin) or until stop is set (sockets, never ends without it).
+        :param source: `-` for stdin, `unix:PATH` or `unixgram:PATH` for a Unix socket created at PATH
+        :return: stats of everything that was received and not dropped
+        """
+        self._queue = asyncio.Queue(self.queue_size)
+        consumer = asyncio.ensure_future(self._consume())
+        try:
+            if source == STDIN:
+                await self._read_stdin()
+            else:
+                await self._serve(source, stop if stop is not None else asyncio.Event())
+            await self._queue.put(None)  # everything before it is parsed
+            await consumer
+        finally:
+            consumer.cancel()
+            self._queue = None
+        self.stats.end()
+        return self.stats
+
+    async def _reports(self, output: Callable[[str], None]) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.REFRESH_INTERVAL)
+            output(await loop.run_in_executor(self._executor, self.report))
+
+    async def _run(self, source: str, output: Callable[[str], None]) -> Stats:
+        reports = asyncio.ensure_future(self._reports(output))
+        try:
+            return await self.ingest(source)
+        finally:
+            reports.cancel()
+
+    def run(self, source: str, output: Callable[[str], None] = print) -> Stats:
+        """Parses logs from the source (see ingest) and outputs a report every REFRESH_INTERVAL seconds."""
+        try:
+            return asyncio.run(self._run(source, output))
+        finally:
+            self._executor.shutdown()
+
+
+def _remove_socket(path: str) -> None:
+    """Removes socket left behind by an earlier run, anything else at the path is left alone"""
+    try:
+        if stat.S_ISSOCK(os.stat(path).st_mode):
+            os.unlink(path)
+    except FileNotFoundError:
+        pass
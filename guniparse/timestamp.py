@@ -0,0 +1,70 @@
+import math
+from datetime import datetime, timezone
+from typing import AnyStr, NewType, Union, Tuple, Optional
+
+DATETIME_FORMAT = "%d/%b/%Y:%H:%M:%S %z"
+PREFIX_FORMAT = "%d/%b/%Y: %z"  # DATETIME_FORMAT without the time of the day
+
+# epoch seconds, so comparing and subtracting dates is just integer math
+Timestamp = NewType("Timestamp", int)
+
+
+class TimestampDecoder:
+    """
+    Decodes gunicorn's `%d/%b/%Y:%H:%M:%S %z` dates into epoch seconds.
+
+    Consecutive lines almost always share the day and the utc offset, so the epoch of the midnight
+    of that day (already shifted by the offset) is memoized and only the time of the day is parsed per line.
+    """
+
+    def __init__(self, binary: bool = False):
+        """
+        :param binary: if decoded values are bytes instead of str
+        """
+        self.binary = binary
+        self._separators: AnyStr = b"::" if binary else "::"  # type: ignore
+        # (date and offset prefix, epoch of its midnight)
+        self._last: Tuple[Optional[AnyStr], int] = (None, 0)
+
+    def __call__(self, value: AnyStr) -> Timestamp:
+        if len(value) != 26 or value[14:15] + value[17:18] != self._separators:
+            return self._slow(value)
+        # int() would take signs and spaces too, e.g. "-1" or " 1", strptime does not
+        if not (value[12:14] + value[15:17] + value[18:20]).isdigit():
+            return self._slow(value)
+        hours, minutes, seconds = int(value[12:14]), int(value[15:17]), int(value[18:20])
+        if hours > 23 or minutes > 59 or seconds > 59:
+            return self._slow(value)
+
+        prefix = value[:12] + value[20:]  # "01/Dec/2019:" + " +0100"
+        last_prefix, base = self._last
+        if prefix != last_prefix:
+            base = self._midnight(prefix)
+            self._last = (prefix, base)
+        return Timestamp(base + hours * 3600 + minutes * 60 + seconds)
+
+    def _midnight(self, prefix: AnyStr) -> int:
+        if self.binary:
+            prefix = prefix.decode()  # type: ignore
+        return int(datetime.strptime(prefix, PREFIX_FORMAT).timestamp())  # type: ignore
+
+    def _slow(self, value: AnyStr) -> Timestamp:
+        # raises ValueError on anything that is not a valid date, same as plain strptime would
+        if self.binary:
+            value = value.decode()  # type: ignore
+        return Timestamp(int(datetime.strptime(value, DATETIME_FORMAT).timestamp()))  # type: ignore
+
+
+decode_timestamp = TimestampDecoder()
+
+
+def to_epoch(moment: Union[datetime, int]) -> Timestamp:
+    """
+    Converts datetime into epoch seconds. If no tzinfo provided then assumes utc.
+    Fractions of a second are rounded up, so `t < to_epoch(x)` is the same as `t < x` for whole seconds.
+    """
+    if isinstance(moment, datetime):
+        if not moment.tzinfo:
+            moment = moment.replace(tzinfo=timezone.utc)
+        return Timestamp(math.ceil(moment.timestamp()))
+    return Timestamp(moment)
@@ -0,0 +1,104 @@
+import math
+from typing import Dict, Hashable, List, Tuple
+
+
+class SpaceSaving:
+    """
+    Space-Saving heavy hitters (Metwally et al.). Counts at most `capacity` distinct items, so memory does not grow
+    with the number of distinct values (e.g. request lines with UUIDs inside).
+
+    Counts are never underestimated and every count is at most `error` too high, where the error is never more
+    than total / capacity. Any item seen more than total / capacity times is guaranteed to be kept.
+    Counting is O(1): items are grouped by their count and the smallest count is tracked.
+    """
+
+    def __init__(self, capacity: int = 1000):
+        if capacity < 1:
+            raise ValueError("Capacity has to be positive")
+        self.capacity = capacity
+        self.total = 0
+        self.counts: Dict[Hashable, int] = {}
+        self.errors: Dict[Hashable, int] = {}
+        self._buckets: Dict[int, Dict[Hashable, None]] = {}  # count -> items with that count
+        self._min = 0
+
+    @classmethod
+    def from_error(cls, error: float) -> "SpaceSaving":
+        """:param error: max overestimation of counts as a fraction of all counted items, e.g. 0.001"""
+        return cls(math.ceil(1 / error))
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, SpaceSaving):
+            return NotImplemented
+        return (self.capacity, self.total, self.counts, self.errors) == (
+            other.capacity, other.total, other.counts, other.errors
+        )
+
+    @property
+    def max_error(self) -> int:
+        """Bound of overestimation of any count"""
+        return self._min if len(self.counts) >= self.capacity else 0
+
+    def _bucket_add(self, item: Hashable, count: int) -> None:
+        bucket = self._buckets.get(count)
+        if bucket is None:
+            bucket = self._buckets[count] = {}
+        bucket[item] = None
+
+    def _bucket_remove(self, item: Hashable, count: int) -> None:
+        bucket = self._buckets[count]
+        del bucket[item]
+        if not bucket:
+            del self._buckets[count]
+            if count == self._min:
+                self._min = count + 1
+
+    def add(self, item: Hashable) -> None:
+        self.total += 1
+        count = self.counts.get(item)
+        if count is not None:
+            self._bucket_remove(item, count)
+            self.counts[item] = count + 1
+            self._bucket_add(item, count + 1)
+            return
+        if len(self.counts) < self.capacity:
+            self.counts[item] = 1
+            self.errors[item] = 0
+            self._bucket_add(item, 1)
+            self._min = 1
+            return
+        # replace one of the least frequent items, the new one inherits its count as the possible error
+        count = self._min
+        victim = next(iter(self._buckets[count]))
+        self._bucket_remove(victim, count)
+        del self.counts[victim], self.errors[victim]
+        self.counts[item] = count + 1
+        self.errors[item] = count
+        self._bucket_add(item, count + 1)
+
+    def _rebuild(self) -> None:
+        self._buckets = {}
+        for item, count in self.counts.items():
+            self._bucket_add(item, count)
+        self._min = min(self._buckets) if self._buckets else 0
+
+    def merge(self, other: "SpaceSaving") -> None:
+        """
+        Combines two summaries (Agarwal et al., mergeable summaries). An item missing from a full summary may have
+        been counted up to that summary's max_error times, so that much is added to its count and error.
+        """
+        self_missing, other_missing = self.max_error, other.max_error
+        counts, errors = {}, {}
+        for item in self.counts.keys() | other.counts.keys():
+            counts[item] = self.counts.get(item, self_missing) + other.counts.get(item, other_missing)
+            errors[item] = self.errors.get(item, self_missing) + other.errors.get(item, other_missing)
+        kept = sorted(counts, key=counts.__getitem__, reverse=True)[:self.capacity]
+        self.counts = {item: counts[item] for item in kept}
+        self.errors = {item: errors[item] for item in kept}
+        self.total += other.total
+        self._rebuild()
+
+    def top(self, k: int) -> List[Tuple[Hashable, int, int]]:
+        """:return: k most frequent items with their counts and errors"""
+        items = sorted(self.counts, key=self.counts.__getitem__, reverse=True)[:k]
+        return [(item, self.counts[item], self.errors[item]) for item in items]
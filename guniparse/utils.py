@@ -1,6 +1,24 @@
+import sys
+
+
 def size_fmt(num, suffix='B'):
     for unit in ['', 'Ki', 'Mi', 'Gi', 'Ti', 'Pi', 'Ei', 'Zi']:
         if abs(num) < 1024.0:
             return "%3.1f%s%s" % (num, unit, suffix)
         num /= 1024.0
     return "%.1f%s%s" % (num, 'Yi', suffix)
+
+
+def duration_fmt(microseconds):
+    if microseconds is None:
+        return "-"
+    if microseconds < 1000:
+        return "%dus" % microseconds
+    if microseconds < 1000000:
+        return "%.1fms" % (microseconds / 1000)
+    return "%.2fs" % (microseconds / 1000000)
+
+
+def show_progress(requests):
+    """Shows number of requests read so far on stderr, so it never gets mixed with the output on stdout"""
+    print(f"\rrequests: {requests}", end="", file=sys.stderr, flush=True)
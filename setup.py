@@ -14,6 +14,9 @@ setup(
             'guniparse=guniparse.main:main',
         ],
     },
+    extras_require={
+        'numpy': ['numpy'],  # faster stats over columns, plain arrays are used without it
+    },
     setup_requires=['pytest-runner'],
     tests_require=['pytest'],
 )
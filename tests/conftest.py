@@ -1,5 +1,12 @@
+from typing import Any, Callable, Dict, List, Tuple
+
 import pytest
 
+from benchmarks.generator import LogGenerator
+from guniparse.log_entry import LogEntry
+from guniparse.parser import LogParser
+from tests.constants import GENERATED_LINES, LOG_FORMAT
+
 
 @pytest.fixture
 def log_line_parser():
@@ -8,3 +15,25 @@ def log_line_parser():
         LogLineParser.LOG_FORMAT = log_format
         return LogLineParser()
     return make_log_line_parser
+
+
+@pytest.fixture(scope="session")
+def generated_log(tmp_path_factory) -> Callable[..., str]:
+    """Writes a log of GENERATED_LINES lines with benchmarks LogGenerator, once per arguments in a session"""
+    paths: Dict[Tuple, str] = {}
+
+    def make_generated_log(seed: int, **kwargs: Any) -> str:
+        key = (seed, *sorted(kwargs.items()))
+        if key not in paths:
+            paths[key] = str(tmp_path_factory.mktemp("generated") / "access.log")
+            LogGenerator(seed, **kwargs).save(paths[key], GENERATED_LINES)
+        return paths[key]
+    return make_generated_log
+
+
+@pytest.fixture(scope="module")
+def all_logs(log_path: str) -> List[LogEntry]:
+    """Logs of the log_path fixture of the module, parsed line by line"""
+    parser = LogParser(log_format=LOG_FORMAT)
+    with open(log_path, "rb") as f:
+        return [log for log in map(parser.parse_line, f) if log is not None]
@@ -19,6 +19,12 @@ RAW_LOG_ENTRY = RawLogEntry(
 LOG_ENTRY = LogEntry.from_raw(RAW_LOG_ENTRY)
 LOG_ENTRY2 = copy.copy(LOG_ENTRY)
 LOG_ENTRY2.b = None
+LOG_ENTRY_LATER = copy.copy(LOG_ENTRY)
+LOG_ENTRY_LATER.t += 9
+LOG_ENTRY_LATER.s = 404
 
 PATH_ASC = os.path.dirname(os.path.abspath(__file__)) + "/data/10_logs_asc.log"
 PATH_DESC = os.path.dirname(os.path.abspath(__file__)) + "/data/10_logs_desc.log"
+
+LOG_FORMAT = """%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s" %(D)s"""
+GENERATED_LINES = 3000  # lines of logs made by the generated_log fixture
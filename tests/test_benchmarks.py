@@ -0,0 +1,45 @@
+import io
+
+from benchmarks.generator import LogGenerator
+from guniparse.columns import LogColumns
+from guniparse.parser import LogLineParser
+from tests.constants import LOG_FORMAT
+from tests.helpers import Paramizer, ParamizerItem
+
+
+PARAMIZER = Paramizer(
+    ParamizerItem("seed 0", seed=0),
+    ParamizerItem("seed 7", seed=7),
+)
+
+
+@PARAMIZER.paramize("seed")
+def test_positive_generator_is_deterministic(seed: int) -> None:
+    first, second = io.BytesIO(), io.BytesIO()
+    size = LogGenerator(seed).write(first, 2000)
+    LogGenerator(seed).write(second, 2000)
+    assert first.getvalue() == second.getvalue()
+    assert size == len(first.getvalue())
+    other = io.BytesIO()
+    LogGenerator(seed + 1).write(other, 2000)
+    assert first.getvalue() != other.getvalue()
+
+
+def test_positive_generator_descending() -> None:
+    parser = LogLineParser(LOG_FORMAT)
+    ascending, descending = LogColumns(), LogColumns()
+    parser.parse_block(list(LogGenerator(3).lines(5000)), ascending)
+    parser.parse_block(list(LogGenerator(3).lines(5000, descending=True)), descending)
+    assert list(descending.t) == sorted(descending.t, reverse=True)
+    # both cover about the same span after START
+    assert abs(descending.t[-1] - ascending.t[0]) < 60
+    assert abs(descending.t[0] - ascending.t[-1]) < 60
+
+
+def test_positive_generated_lines_parse() -> None:
+    parser = LogLineParser(LOG_FORMAT)
+    lines = list(LogGenerator(1, malformed_ratio=0.05).lines(5000))
+    columns = LogColumns()
+    parser.parse_block(lines, columns)
+    assert 4500 < len(columns) < 5000
+    assert list(columns.t) == sorted(columns.t)
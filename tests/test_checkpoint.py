@@ -0,0 +1,67 @@
+import os
+
+import pytest
+
+from guniparse.checkpoint import ScanCheckpoint
+from guniparse.order import OrderEnum
+from guniparse.parser import LogParser
+from guniparse.stats import Stats
+from tests.constants import PATH_ASC
+
+LOG_FORMAT = """%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s" %(D)s"""
+
+with open(PATH_ASC, "rb") as f:
+    LINES = f.readlines()
+
+
+def scan(parser: LogParser, path: str, checkpoint: str) -> Stats:
+    return parser.stats(path, order=OrderEnum.asc, stats_obj=Stats.configured(distinct=("h",)), checkpoint=checkpoint)
+
+
+def test_positive_resume_appended(tmp_path) -> None:
+    path, checkpoint = str(tmp_path / "access.log"), str(tmp_path / "access.ckpt")
+    parser = LogParser(log_format=LOG_FORMAT)
+    with open(path, "wb") as f:
+        f.writelines(LINES[:5])
+        f.write(LINES[5][:20])  # line that is still being written
+    assert scan(parser, path, checkpoint).requests == 4
+    assert ScanCheckpoint.load(checkpoint).offset == sum(map(len, LINES[:5]))
+    with open(path, "ab") as f:
+        f.write(LINES[5][20:])
+        f.writelines(LINES[6:])
+    resumed = scan(parser, path, checkpoint)
+    assert resumed == parser.stats(PATH_ASC, order=OrderEnum.asc, stats_obj=Stats.configured(distinct=("h",)))
+    assert scan(parser, path, checkpoint) == resumed  # nothing new
+
+
+def test_positive_rotated_and_truncated(tmp_path) -> None:
+    path, checkpoint = str(tmp_path / "access.log"), str(tmp_path / "access.ckpt")
+    parser = LogParser(log_format=LOG_FORMAT)
+    with open(path, "wb") as f:
+        f.writelines(LINES)
+    assert scan(parser, path, checkpoint).requests == 10
+
+    os.rename(path, path + ".1")
+    with open(path, "wb") as f:
+        f.writelines(LINES[-3:])
+    assert scan(parser, path, checkpoint).requests == 3
+
+    with open(path, "r+b") as f:  # copytruncate, same inode and rewritten with other lines of the same size
+        f.truncate(0)
+        f.writelines(LINES[1:4])
+    assert scan(parser, path, checkpoint).requests == 3
+
+
+def test_positive_other_layout(tmp_path) -> None:
+    path, checkpoint = str(tmp_path / "access.log"), str(tmp_path / "access.ckpt")
+    parser = LogParser(log_format=LOG_FORMAT)
+    with open(path, "wb") as f:
+        f.writelines(LINES)
+    scan(parser, path, checkpoint)
+    stats = parser.stats(path, order=OrderEnum.asc, stats_obj=Stats.configured(top=("h",)), checkpoint=checkpoint)
+    assert stats.requests == 10 and stats.top["h"].total == 10
+
+
+def test_negative_time_range(tmp_path) -> None:
+    with pytest.raises(ValueError):
+        LogParser().stats(PATH_ASC, _from=0, checkpoint=str(tmp_path / "access.ckpt"))  # type: ignore
@@ -0,0 +1,100 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+import pytest
+
+from guniparse.columnar import ColumnarLog, ColumnarWriter, is_columnar, split_request
+from guniparse.columns import TEXT_FIELDS, LogColumns
+from guniparse.order import OrderEnum
+from guniparse.parser import LogParser
+from guniparse.stats import Stats
+from tests.constants import LOG_ENTRY, PATH_ASC, PATH_DESC
+from tests.helpers import Paramizer, ParamizerItem
+
+LOG_FORMAT = """%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s" %(D)s"""
+
+PARAMIZER = Paramizer(
+    ParamizerItem("descending order, whole file", path=PATH_DESC, order=OrderEnum.desc, _from=None, to=None),
+    ParamizerItem("ascending order, whole file", path=PATH_ASC, order=OrderEnum.asc, _from=None, to=None),
+    ParamizerItem(
+        "descending order, time range",
+        path=PATH_DESC,
+        order=OrderEnum.desc,
+        _from=datetime(2019, 12, 1, 10, 5, 59, tzinfo=timezone.utc),
+        to=datetime(2019, 12, 1, 10, 6, 3, tzinfo=timezone.utc),
+    ),
+    ParamizerItem(
+        "ascending order, time range",
+        path=PATH_ASC,
+        order=OrderEnum.asc,
+        _from=datetime(2019, 12, 1, 10, 5, 59, tzinfo=timezone.utc),
+        to=datetime(2019, 12, 1, 10, 6, 3, tzinfo=timezone.utc),
+    ),
+)
+
+
+@PARAMIZER.paramize("path, order, _from, to")
+def test_positive_stats_of_converted(
+        tmp_path, path: str, order: OrderEnum, _from: Optional[datetime], to: Optional[datetime]
+) -> None:
+    out = str(tmp_path / "access.gpcol")
+    parser = LogParser(log_format=LOG_FORMAT)
+    assert parser.convert(path, out) == 10
+    assert is_columnar(out) and not is_columnar(path)
+    expected = parser.stats(path, _from, to, order, stats_obj=Stats.configured(distinct=("h",), bucket=1))
+    converted = parser.stats(out, _from, to, order, stats_obj=Stats.configured(distinct=("h",), bucket=1))
+    assert converted == expected
+
+
+def test_positive_rows(tmp_path) -> None:
+    out = str(tmp_path / "access.gpcol")
+    parser = LogParser(log_format=LOG_FORMAT)
+    parser.convert(PATH_ASC, out)  # logs of the same second keep the order of the file
+    with open(PATH_ASC, "rb") as f:
+        expected = [parser.parse_line(line) for line in f]
+    expected = [log for log in expected if log is not None]
+    with ColumnarLog(out) as log:
+        assert log.rows == 10
+        assert log.dictionary("h") == ["172.16.3.14"]
+        assert list(log.column("h.codes")) == [0] * 10
+        assert log.dictionary("r.method") == ["GET"]
+        rows = [row for block in log.blocks(text_fields=("h", "l", "u", "r", "f", "a")) for row in block.rows()]
+    assert rows == expected
+
+
+PARAMIZER = Paramizer(
+    ParamizerItem(
+        "whole", request_line="GET /users/5?page=2 HTTP/1.1", expected=("GET", " /users/5?page=2", " HTTP/1.1")
+    ),
+    ParamizerItem("without protocol", request_line="GET /", expected=("GET", " /", "")),
+    ParamizerItem("empty protocol", request_line="GET / ", expected=("GET", " /", " ")),
+    ParamizerItem("malformed", request_line="-", expected=("-", "", "")),
+    ParamizerItem("spaces in the path", request_line="GET /a b HTTP/1.1", expected=("GET", " /a", " b HTTP/1.1")),
+)
+
+
+@PARAMIZER.paramize("request_line, expected")
+def test_positive_split_request(tmp_path, request_line: str, expected: tuple) -> None:
+    assert split_request(request_line) == expected
+    assert "".join(expected) == request_line
+    logs = LogColumns(TEXT_FIELDS)
+    for r in ["GET /first HTTP/1.1", request_line, "POST /ąę HTTP/1.0"]:
+        logs.append(LOG_ENTRY)
+        logs.text["r"][-1] = r
+    writer = ColumnarWriter()
+    writer.add(logs)
+    out = str(tmp_path / "access.gpcol")
+    writer.save(out)
+    with ColumnarLog(out) as log:
+        log.BLOCK_ROWS = 2  # the second block starts in the middle of the text of paths
+        rows = [r for block in log.blocks(text_fields=("r",)) for r in block.text["r"]]
+    assert rows == ["GET /first HTTP/1.1", request_line, "POST /ąę HTTP/1.0"]
+
+
+def test_negative_not_columnar(tmp_path) -> None:
+    with pytest.raises(ValueError):
+        ColumnarLog(PATH_ASC)
+    empty = tmp_path / "empty.gpcol"
+    empty.write_bytes(b"")
+    with pytest.raises(ValueError):
+        ColumnarLog(str(empty))
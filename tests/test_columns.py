@@ -0,0 +1,135 @@
+import random
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from guniparse.columns import LogColumns
+from guniparse.order import OrderEnum
+from guniparse.parser import LogLineParser, LogParser
+from guniparse.stats import Stats
+from tests.constants import PATH_ASC, PATH_DESC
+from tests.helpers import Paramizer, ParamizerItem
+
+LOG_FORMAT = """%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s" %(D)s"""
+
+
+def make_lines(seed: int, n: int) -> List[bytes]:
+    rnd = random.Random(seed)
+    lines = []
+    for i in range(n):
+        second = 5 + i // 7  # 7 requests per second from 11:00:05
+        status = rnd.choice([200, 200, 201, 302, 404, 500])
+        size = rnd.choice([b"-", b"0", b"720", b"123456"])
+        agent = rnd.choice([b"curl/7.68.0", b'weird "quoted" agent', b"bad \xff utf-8"])
+        lines.append(
+            b'gunicorn[1]: 10.0.0.%d - - [01/Dec/2019:%02d:%02d:%02d +0100] "GET /items/%d HTTP/1.1" %d %s "-" "%s" %d'
+            % (rnd.randrange(5), 11 + second // 3600, second // 60 % 60, second % 60, rnd.randrange(30), status, size, agent,
+               int(rnd.lognormvariate(10, 1)))
+        )
+        if i % 50 == 0:
+            lines.append(b"some line that is not a log")
+    return lines
+
+
+def test_positive_parse_block_same_as_parse_bytes() -> None:
+    parser = LogLineParser(LOG_FORMAT)
+    lines = make_lines(1, 500)
+    columns = LogColumns(("h", "a"))
+    parser.parse_block(lines, columns)
+    expected = []
+    for line in lines:
+        log = parser.parse_bytes(line)
+        if log is None:
+            continue
+        log.l = log.u = log.r = log.f = None
+        expected.append(log)
+    assert list(columns.rows()) == expected
+    assert parser.malformed.lines == len(lines)
+    assert parser.malformed.count == len(lines) - len(expected)
+
+
+def test_positive_update_columns_same_as_update() -> None:
+    parser = LogLineParser(LOG_FORMAT)
+    columns = LogColumns(("r", "h"))
+    parser.parse_block(make_lines(2, 2000), columns)
+    by_rows = Stats.configured(top=("r",), distinct=("h",), bucket=60)
+    for log in columns.rows():
+        by_rows.update(log)
+    by_columns = Stats.configured(top=("r",), distinct=("h",), bucket=60)
+    by_columns.update_columns(columns.head(1000))
+    by_columns.update_columns(columns.take(list(range(1000, len(columns)))))
+    assert by_columns == by_rows
+
+
+PARAMIZER = Paramizer(
+    ParamizerItem("whole block", _from=None, to=None, descending=False, expected=(0, 10), stop=False),
+    ParamizerItem("ascending, stops", _from=3, to=7, descending=False, expected=(3, 7), stop=True),
+    ParamizerItem("ascending, open end", _from=3, to=None, descending=False, expected=(3, 10), stop=False),
+    ParamizerItem("descending, stops", _from=3, to=7, descending=True, expected=(3, 7), stop=True),
+    ParamizerItem("descending, open start", _from=None, to=7, descending=True, expected=(0, 7), stop=False),
+)
+
+
+@PARAMIZER.paramize("_from, to, descending, expected, stop")
+def test_positive_clip(
+        _from: Optional[int], to: Optional[int], descending: bool, expected: tuple, stop: bool
+) -> None:
+    columns = LogColumns()
+    for t in (range(9, -1, -1) if descending else range(10)):
+        columns.t.append(t)
+        columns.s.append(200)
+        columns.b.append(1)
+        columns.b_missing.append(0)
+        columns.D.append(1)
+    clipped, stopped = columns.clip(_from, to, descending)
+    assert sorted(clipped.t) == list(range(*expected))
+    assert stopped == stop
+
+
+PARAMIZER = Paramizer(
+    ParamizerItem("descending order", path=PATH_DESC, order=OrderEnum.desc),
+    ParamizerItem("ascending order", path=PATH_ASC, order=OrderEnum.asc),
+)
+
+
+@PARAMIZER.paramize("path, order")
+def test_positive_stats_columns_same_as_lines(monkeypatch, path: str, order: OrderEnum) -> None:
+    monkeypatch.setattr(LogParser, "BLOCK_SIZE", 100)  # lines are longer, so blocks split them
+    parser = LogParser(log_format=LOG_FORMAT)
+    _from = datetime(2019, 12, 1, 10, 5, 59, tzinfo=timezone.utc)
+    to = datetime(2019, 12, 1, 10, 6, 3, tzinfo=timezone.utc)
+    for time_range in [(None, None), (_from, to)]:
+        expected = Stats()
+        with open(path, "rb") as f:
+            for log in parser._read_lines(f, None, *parser._bounds(*time_range, order)[:2], order):
+                expected.update(log)
+        expected.end()
+        assert parser.stats(path, *time_range, order) == expected
+
+
+PARAMIZER = Paramizer(
+    ParamizerItem("status", log=b'10.0.0.1 - - [01/Dec/2019:11:00:05 +0100] "GET / HTTP/1.1" 99999 720 "-" "curl" 5'),
+    ParamizerItem(
+        "size", log=b'10.0.0.1 - - [01/Dec/2019:11:00:05 +0100] "GET / HTTP/1.1" 200 %d "-" "curl" 5' % 10 ** 19
+    ),
+    ParamizerItem(
+        "request time", log=b'10.0.0.1 - - [01/Dec/2019:11:00:05 +0100] "GET / HTTP/1.1" 200 720 "-" "curl" %d' % 10 ** 19
+    ),
+)
+
+
+@PARAMIZER.paramize("log")
+def test_negative_values_out_of_range(tmp_path, log: bytes) -> None:
+    lines = make_lines(3, 20)
+    expected = LogLineParser(LOG_FORMAT)
+    expected_columns = LogColumns(("h",))
+    expected.parse_block(lines, expected_columns)
+    # the second one does not match the specialized pattern, so it goes through the fallback
+    lines[10:10] = [log, log.replace(b'"curl"', b'"weird "quoted" agent"')]
+    parser = LogLineParser(LOG_FORMAT)
+    columns = LogColumns(("h",))
+    parser.parse_block(lines, columns)
+    assert list(columns.rows()) == list(expected_columns.rows())
+    assert parser.malformed.count == expected.malformed.count + 2
+    path = tmp_path / "access.log"
+    path.write_bytes(b"\n".join(lines) + b"\n")
+    assert LogParser(log_format=LOG_FORMAT).stats(str(path), None, None, OrderEnum.asc).requests == len(columns)
@@ -0,0 +1,117 @@
+import bz2
+import gzip
+import lzma
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from guniparse.compressed import FileBuffer, GzipCheckpoints, detect_compression
+from guniparse.order import OrderEnum
+from guniparse.parser import LogParser
+from guniparse.stats import Stats
+from tests.constants import PATH_ASC, PATH_DESC
+from tests.helpers import Paramizer, ParamizerItem
+
+DATA = b"".join(b"line %d %s\n" % (i, b"x" * (i % 97)) for i in range(20000))
+
+
+def test_positive_gzip_random_access(tmp_path) -> None:
+    path = str(tmp_path / "data.gz")
+    with open(path, "wb") as f:
+        # two gzip members, like `cat a.gz b.gz`
+        f.write(gzip.compress(DATA[:300000]))
+        f.write(gzip.compress(DATA[300000:]))
+    checkpoints = GzipCheckpoints(path, spacing=64 * 1024)
+    assert checkpoints.size == len(DATA)
+    assert len(checkpoints.points) > 2
+
+    with checkpoints.open() as f:
+        for offset in [0, 299990, 300000, 123456, len(DATA) - 3, 7, 500000]:
+            f.seek(offset)
+            assert f.read(1000) == DATA[offset:offset + 1000]
+        buf = FileBuffer(f, checkpoints.size)
+        assert buf.find(b"\n", 299990) == DATA.find(b"\n", 299990)
+        assert buf.find(b"line 19999", 0) == DATA.find(b"line 19999")
+        assert buf[100:200] == DATA[100:200]
+
+
+def test_positive_gzip_checkpoints_built_only_for_seeks(tmp_path) -> None:
+    path = str(tmp_path / "data.gz")
+    with open(path, "wb") as f:
+        f.write(gzip.compress(DATA))
+    checkpoints = GzipCheckpoints(path, spacing=64 * 1024)
+    with checkpoints.open() as f:
+        assert f.read() == DATA
+        assert not checkpoints.built
+        f.seek(123456)
+        assert f.read(10) == DATA[123456:123466]
+        assert checkpoints.built
+
+
+def test_positive_gzip_checkpoints_shared_by_scans(monkeypatch, tmp_path) -> None:
+    builds = []
+    build = GzipCheckpoints._build
+    monkeypatch.setattr(GzipCheckpoints, "_build", lambda self: builds.append(self.path) or build(self))
+    path = str(tmp_path / "access.log.gz")
+    with open(PATH_ASC, "rb") as src, open(path, "wb") as dst:
+        dst.write(gzip.compress(src.read()))
+    parser = LogParser(fields=Stats.FIELDS)
+    parser.stats(path, order=OrderEnum.asc)
+    assert builds == []  # the whole file is just streamed
+    _from = datetime(2019, 12, 1, 10, 5, 59, tzinfo=timezone.utc)
+    parser.time_span(path)
+    parser.stats(path, _from, None, OrderEnum.asc)
+    parser.stats(path, None, _from, OrderEnum.desc)
+    assert builds == [path]
+    with open(path, "ab") as f:  # another member, e.g. the log was rotated and appended
+        f.write(gzip.compress(b"not a log\n"))
+    parser.stats(path, _from, None, OrderEnum.asc)
+    assert builds == [path, path]
+
+
+PARAMIZER = Paramizer(
+    ParamizerItem("gzip", compress=gzip.compress, suffix=".gz", compression="gzip"),
+    ParamizerItem("bz2", compress=bz2.compress, suffix=".bz2", compression="bz2"),
+    ParamizerItem("xz", compress=lzma.compress, suffix=".xz", compression="xz"),
+)
+
+
+@PARAMIZER.paramize("compress, suffix, compression")
+def test_positive_compressed_stats(tmp_path, compress: Callable[[bytes], bytes], suffix: str, compression: str):
+    parser = LogParser(fields=Stats.FIELDS)
+    _from = datetime(2019, 12, 1, 10, 5, 59, tzinfo=timezone.utc)
+    to = datetime(2019, 12, 1, 10, 6, 3, tzinfo=timezone.utc)
+    for path, order in [(PATH_ASC, OrderEnum.asc), (PATH_DESC, OrderEnum.desc)]:
+        compressed_path = str(tmp_path / ("access.log" + suffix))
+        with open(path, "rb") as src, open(compressed_path, "wb") as dst:
+            dst.write(compress(src.read()))
+        assert detect_compression(compressed_path) == compression
+        assert parser.stats(compressed_path, _from, to, order, jobs=2) == parser.stats(path, _from, to, order)
+        assert parser.stats(compressed_path, order=order) == parser.stats(path, order=order)
+
+
+PARAMIZER = Paramizer(
+    ParamizerItem(
+        "descending order",
+        path=PATH_DESC,
+        since=datetime(2019, 12, 1, 10, 5, 59, tzinfo=timezone.utc),
+        order=OrderEnum.desc,
+    ),
+    ParamizerItem(
+        "ascending order",
+        path=PATH_ASC,
+        since=datetime(2019, 12, 1, 10, 5, 59, tzinfo=timezone.utc),
+        order=OrderEnum.asc,
+    ),
+    ParamizerItem("without since", path=PATH_ASC, since=None, order=OrderEnum.asc),
+)
+
+
+@PARAMIZER.paramize("path, since, order")
+def test_positive_open_gzip(tmp_path, path: str, since: Optional[datetime], order: OrderEnum):
+    gzip_path = str(tmp_path / "access.log.gz")
+    with open(path, "rb") as src, open(gzip_path, "wb") as dst:
+        dst.write(gzip.compress(src.read()))
+    parser = LogParser()
+    with parser._open(path, since, order) as plain, parser._open(gzip_path, since, order) as compressed:
+        assert compressed.tell() == plain.tell()
+        assert compressed.readline() == plain.readline()
@@ -0,0 +1,99 @@
+import copy
+import pickle
+from typing import Optional
+
+import pytest
+
+from guniparse.endpoints import DEFAULT_RULES, EndpointNormalizer, RequestLine, parse_rule, split_request_line
+from tests.constants import LOG_ENTRY
+from tests.helpers import Paramizer, ParamizerItem
+
+PARAMIZER = Paramizer(
+    ParamizerItem(
+        "all parts",
+        request_line="GET /users/5?page=2&sort=name HTTP/1.1",
+        expected=RequestLine("GET", "/users/5", "page=2&sort=name", "HTTP/1.1"),
+    ),
+    ParamizerItem(
+        "without query", request_line="POST /orders HTTP/1.0", expected=RequestLine("POST", "/orders", None, "HTTP/1.0")
+    ),
+    ParamizerItem("empty query", request_line="GET /? HTTP/1.1", expected=RequestLine("GET", "/", "", "HTTP/1.1")),
+    ParamizerItem("without protocol", request_line="GET /", expected=RequestLine("GET", "/", None, None)),
+    ParamizerItem("malformed", request_line="-", expected=RequestLine("-", "", None, None)),
+)
+
+
+@PARAMIZER.paramize("request_line, expected")
+def test_positive_split_request_line(request_line: str, expected: RequestLine) -> None:
+    assert split_request_line(request_line) == expected
+
+
+PARAMIZER = Paramizer(
+    ParamizerItem(
+        "uuid and dates",
+        request_line=LOG_ENTRY.r,
+        rule=None,
+        expected="GET /internal/user/{uuid}/agenda/{date}/{date}",
+    ),
+    ParamizerItem(
+        "numbers and query",
+        request_line="POST /api/v1/orders/42/items?page=2 HTTP/1.1",
+        rule=None,
+        expected="POST /api/v1/orders/{id}/items",
+    ),
+    ParamizerItem(
+        "hex id", request_line="GET /blobs/0123456789abcdef0123 HTTP/1.1", rule=None, expected="GET /blobs/{hex}"
+    ),
+    ParamizerItem(
+        "words are kept", request_line="GET /static/app.js HTTP/1.1", rule=None, expected="GET /static/app.js"
+    ),
+    ParamizerItem("malformed", request_line="-", rule=None, expected="-"),
+    ParamizerItem(
+        "custom rule goes first",
+        request_line="GET /static/app.1234.js HTTP/1.1",
+        rule=r"{asset}=app\.\d+\.js",
+        expected="GET /static/{asset}",
+    ),
+)
+
+
+@PARAMIZER.paramize("request_line, rule, expected")
+def test_positive_endpoint(request_line: str, rule: Optional[str], expected: str) -> None:
+    rules = DEFAULT_RULES if rule is None else (parse_rule(rule), *DEFAULT_RULES)
+    assert EndpointNormalizer(rules).endpoint(request_line) == expected
+
+
+def test_positive_cache_hits() -> None:
+    normalizer = EndpointNormalizer()
+    for i in range(10):
+        normalizer.endpoint(f"GET /users/5?page={i} HTTP/1.1")
+    normalizer.endpoint("GET /users/6 HTTP/1.1")
+    assert (normalizer.hits, normalizer.misses) == (9, 2)
+    assert normalizer.hit_rate == pytest.approx(9 / 11)
+    assert "81.8% hits (9 hits, 2 misses), 2 of 4096 paths cached" in normalizer.cache_fmt()
+
+
+def test_positive_cache_is_bounded() -> None:
+    normalizer = EndpointNormalizer(cache_size=10)
+    for i in range(100):
+        assert normalizer.endpoint(f"GET /users/{i} HTTP/1.1") == "GET /users/{id}"
+    assert normalizer.template.cache_info().currsize == 10
+    assert normalizer.misses == 100
+
+
+def test_positive_counts_survive_pickling_and_merge() -> None:
+    normalizer = EndpointNormalizer()
+    for _ in range(3):
+        normalizer.endpoint("GET /health HTTP/1.1")
+    worker = pickle.loads(pickle.dumps(normalizer))
+    assert (worker.hits, worker.misses) == (2, 1)
+    assert worker.endpoint("GET /users/1 HTTP/1.1") == "GET /users/{id}"  # the cache works after unpickling
+    merged = copy.deepcopy(normalizer)
+    merged.merge_counts(worker)
+    assert (merged.hits, merged.misses) == (4, 3)
+
+
+@pytest.mark.parametrize("rule", ["no separator", "=pattern", "{empty}=", "{broken}=("])
+def test_negative_parse_rule(rule: str) -> None:
+    with pytest.raises(ValueError):
+        parse_rule(rule)
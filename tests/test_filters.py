@@ -0,0 +1,138 @@
+from datetime import timedelta
+from typing import Any, List
+
+import pytest
+
+from benchmarks.generator import START
+from guniparse.filters import (
+    ClientFilter, LogFilter, MethodFilter, MinDurationFilter, PathPrefixFilter, StatusFilter, parse_duration,
+)
+from guniparse.log_entry import LogEntry
+from guniparse.order import OrderEnum
+from guniparse.parser import LogParser
+from guniparse.stats import Stats
+from tests.constants import LOG_FORMAT
+from tests.helpers import Paramizer, ParamizerItem
+
+
+@pytest.fixture(scope="module")
+def log_path(generated_log) -> str:
+    return generated_log(5, malformed_ratio=0.01)
+
+
+PARAMIZER = Paramizer(
+    ParamizerItem("status class", filters=[StatusFilter("5xx")]),
+    ParamizerItem("statuses", filters=[StatusFilter("404,2xx")]),
+    ParamizerItem("methods", filters=[MethodFilter("post,put")]),
+    ParamizerItem("path prefix", filters=[PathPrefixFilter("/api/v1/")]),
+    ParamizerItem("client network", filters=[ClientFilter("172.16.2.0/24")]),
+    ParamizerItem("client networks not aligned to octets", filters=[ClientFilter("172.16.0.0/23,10.0.0.0/8")]),
+    ParamizerItem("min duration", filters=[MinDurationFilter("150ms")]),
+    ParamizerItem("all at once", filters=[StatusFilter("2xx"), MethodFilter("GET"), MinDurationFilter("50ms")]),
+)
+
+
+@PARAMIZER.paramize("filters")
+def test_positive_prefilter_keeps_matching_lines(log_path: str, filters: List[LogFilter]) -> None:
+    parser = LogParser(log_format=LOG_FORMAT)
+    with open(log_path, "rb") as f:
+        lines = f.readlines()
+    rejected = 0
+    for line in lines:
+        log = parser.parse_line(line)
+        for f in filters:
+            check = f.prefilter(LOG_FORMAT)
+            assert check is not None
+            if not check(line):
+                rejected += 1
+                assert log is None or not f.accepts(log), line
+    assert rejected > 0
+
+
+@PARAMIZER.paramize("filters")
+def test_positive_filtered_stats(
+        tmp_path, log_path: str, all_logs: List[LogEntry], filters: List[LogFilter]
+) -> None:
+    since = START + timedelta(minutes=1)
+    until = START + timedelta(minutes=5)
+    expected = Stats()
+    for log in all_logs:
+        if since.timestamp() <= log.t < until.timestamp() and all(f.accepts(log) for f in filters):
+            expected.update(log)
+    expected.end()
+    assert expected.requests > 0
+
+    parser = LogParser(Stats.FIELDS, LOG_FORMAT, filters=filters)
+    assert parser.stats(log_path, since, until, OrderEnum.asc) == expected
+    assert parser.stats(log_path, since, until, OrderEnum.asc, jobs=2) == expected
+    assert parser.stats_many([log_path], since, until, OrderEnum.asc) == expected
+    converted = str(tmp_path / "access.gpcol")
+    LogParser(log_format=LOG_FORMAT).convert(log_path, converted)
+    assert parser.stats(converted, since, until, OrderEnum.asc) == expected
+
+
+def test_positive_filters_stop_at_the_end_of_the_range(log_path: str) -> None:
+    parser = LogParser(Stats.FIELDS, LOG_FORMAT, filters=[StatusFilter("5xx")])
+    parser.BLOCK_SIZE = 4096
+    parser.PROBE_INTERVAL = 10
+    until = START + timedelta(minutes=1)
+    with open(log_path, "rb") as f:
+        assert list(parser._read_columns(f, None, None, int(until.timestamp()), OrderEnum.asc))
+        assert f.tell() < 150000  # of about 700000
+        f.seek(0)
+        logs = list(parser._read_lines(f, None, None, int(until.timestamp()), OrderEnum.asc))
+        assert logs and all(log.s // 100 == 5 for log in logs)
+        assert f.tell() < 150000  # of about 700000
+
+
+PARAMIZER = Paramizer(
+    ParamizerItem("microseconds", duration="1500", expected=1500),
+    ParamizerItem("milliseconds", duration="500ms", expected=500000),
+    ParamizerItem("fraction of seconds", duration="1.5s", expected=1500000),
+    ParamizerItem("minutes", duration="2m", expected=120000000),
+)
+
+
+@PARAMIZER.paramize("duration, expected")
+def test_positive_parse_duration(duration: str, expected: int) -> None:
+    assert parse_duration(duration) == expected
+
+
+PARAMIZER = Paramizer(
+    ParamizerItem("status", make=StatusFilter, spec="6xx"),
+    ParamizerItem("status not a number", make=StatusFilter, spec="ok"),
+    ParamizerItem("method", make=MethodFilter, spec="GET /"),
+    ParamizerItem("path prefix", make=PathPrefixFilter, spec="internal/"),
+    ParamizerItem("client", make=ClientFilter, spec="10.0.0.0/33"),
+    ParamizerItem("duration", make=MinDurationFilter, spec="5 hours"),
+)
+
+
+@PARAMIZER.paramize("make, spec")
+def test_negative_invalid_filter(make: Any, spec: str) -> None:
+    with pytest.raises(ValueError):
+        make(spec)
+
+
+def test_negative_filter_without_accepts() -> None:
+    class EmptyFilter(LogFilter):
+        pass
+
+    with pytest.raises(TypeError):
+        EmptyFilter()
+
+
+PARAMIZER = Paramizer(
+    ParamizerItem(
+        "duration not at the end",
+        log_format="""%(D)s %(h)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s" %(l)s %(u)s""",
+        log_filter=MinDurationFilter("1s"),
+    ),
+    ParamizerItem("client in IPv6 network", log_format=LOG_FORMAT, log_filter=ClientFilter("2001:db8::/32")),
+    ParamizerItem("client network shorter than an octet", log_format=LOG_FORMAT, log_filter=ClientFilter("10.0.0.0/7")),
+)
+
+
+@PARAMIZER.paramize("log_format, log_filter")
+def test_positive_no_prefilter(log_format: str, log_filter: LogFilter) -> None:
+    assert log_filter.prefilter(log_format) is None
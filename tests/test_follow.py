@@ -0,0 +1,65 @@
+import os
+from typing import List
+
+from guniparse.follow import LogFollower, SlidingWindow
+from guniparse.parser import LogParser
+from guniparse.stats import Stats
+from tests.constants import PATH_ASC
+
+
+def read_lines() -> List[bytes]:
+    with open(PATH_ASC, "rb") as f:
+        return f.readlines()
+
+
+def test_positive_sliding_window() -> None:
+    window = SlidingWindow(10)
+    for t in [100, 100, 105, 109, 110, 50]:
+        window.add(t)
+    assert window.rate(110, 10) == 3 / 10  # 100 fell out of the window
+    assert window.rate(110, 5) == 2 / 5
+    assert window.rate(125, 10) == 0
+
+
+def test_positive_follow_appended_lines(tmp_path) -> None:
+    lines = read_lines()
+    path = str(tmp_path / "access.log")
+    with open(path, "wb") as f:
+        f.writelines(lines[:3])
+    follower = LogFollower(path, LogParser(fields=Stats.FIELDS))
+    assert follower.poll() == 0  # starts at the end of the file
+
+    with open(path, "ab") as f:
+        f.write(lines[3])
+        f.write(lines[4][:50])  # line that is not written whole yet
+    assert follower.poll() == 1
+    with open(path, "ab") as f:
+        f.write(lines[4][50:])
+    assert follower.poll() == 1
+    assert follower.stats.requests == 2
+    follower.close()
+
+
+def test_positive_follow_rotation_and_truncation(tmp_path) -> None:
+    lines = read_lines()
+    path = str(tmp_path / "access.log")
+    with open(path, "wb") as f:
+        f.writelines(lines[:3])
+    follower = LogFollower(path, LogParser(fields=Stats.FIELDS), from_start=True)
+    assert follower.poll() == 2
+
+    with open(path, "ab") as f:
+        f.write(lines[3])
+    os.rename(path, path + ".1")
+    with open(path, "wb") as f:
+        f.writelines(lines[4:6])
+    assert follower.poll() == 3  # rest of the rotated file and the new one
+
+    with open(path, "wb") as f:
+        f.write(lines[6])
+    assert follower.poll() == 1
+
+    assert follower.stats.requests == 6
+    report = follower.report(now=follower.stats._last_date)
+    assert "requests: 6\n" in report
+    follower.close()
@@ -0,0 +1,139 @@
+import sys
+
+from guniparse.format_compiler import compile_format, prepare_fast_exp
+from guniparse.log_entry import LogEntry
+from guniparse.parser import LogLineParser
+from tests.constants import LOG_ENTRY, LOG_ENTRY2
+from tests.helpers import Paramizer, ParamizerItem
+
+PARAMIZER = Paramizer(
+    ParamizerItem(
+        "default log format",
+        log_format="""%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s" %(D)s""",
+        captured=("h", "t", "s"),
+        expected=r'(?:^|(?<= ))(?P<h>[^\ ]*)\ (?:[^\ ]*)\ (?:[^\ ]*)\ \[(?P<t>[^\]]*)\]\ "(?:[^"]*(?:"[^"]*)*?)"\ (?P<s>\d+)\ (?:\d+|-)\ "(?:[^"]*(?:"[^"]*)*?)"\ "(?:[^"]*(?:"[^"]*)*?)"\ (?:\d+)$',
+    ),
+    ParamizerItem(
+        "format with header and two fields next to each other",
+        log_format="""%(h)s%({x-header-in}i)s %(L)s""",
+        captured=("h", "x_header_ini"),
+        expected=r'(?:^|(?<= ))(?P<h>.*?)(?P<x_header_ini>[^\ ]*)\ (?:\d+\.\d+)$',
+    ),
+)
+
+
+@PARAMIZER.paramize("log_format, captured, expected")
+def test_positive_fast_exp(log_format: str, captured: tuple, expected: str) -> None:
+    assert prepare_fast_exp(log_format, captured) == expected
+
+
+PARAMIZER = Paramizer(
+    ParamizerItem(
+        "default log format",
+        log_format="""%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s" %(D)s""",
+        line="""Dec 01 11:06:05 app3-test-vm1 gunicorn[53253]: 172.16.3.14 - - [01/Dec/2019:11:06:05 +0100] "GET /internal/user/5fdbb021-eebd-4156-a8a7-132289cef8a4/agenda/2019-12-01/2019-12-02 HTTP/1.1" 200 720 "-" "python-requests/2.22.0" 72680
+""",
+        expected=LOG_ENTRY,
+    ),
+    ParamizerItem(
+        "'-' as response length",
+        log_format="""%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s" %(D)s""",
+        line="""Dec 01 11:06:05 app3-test-vm1 gunicorn[53253]: 172.16.3.14 - - [01/Dec/2019:11:06:05 +0100] "GET /internal/user/5fdbb021-eebd-4156-a8a7-132289cef8a4/agenda/2019-12-01/2019-12-02 HTTP/1.1" 200 - "-" "python-requests/2.22.0" 72680
+""",
+        expected=LOG_ENTRY2,
+    ),
+    ParamizerItem(
+        "custom format with request time and header",
+        log_format="""%(t)s %(L)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s" %(D)s %(h)s %(l)s %(u)s "%({x-request-id}i)s\"""",
+        line="""Dec 01 11:06:05 app3-test-vm1 gunicorn[53253]: [01/Dec/2019:11:06:05 +0100] 0.072680 "GET /internal/user/5fdbb021-eebd-4156-a8a7-132289cef8a4/agenda/2019-12-01/2019-12-02 HTTP/1.1" 200 720 "-" "python-requests/2.22.0" 72680 172.16.3.14 - - "d2f1c5d0"
+""",
+        expected=LOG_ENTRY,
+    ),
+    ParamizerItem(
+        "not a log line",
+        log_format="""%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s" %(D)s""",
+        line="""some kind of header that is not actual log
+""",
+        expected=None,
+    ),
+)
+
+
+@PARAMIZER.paramize("log_format, line, expected")
+def test_positive_compiled_parse_line(log_format: str, line: str, expected: LogEntry) -> None:
+    parse_line = compile_format(log_format)
+    assert parse_line(line) == expected
+
+
+def test_negative_compile_format_missing_field() -> None:
+    assert compile_format("""%(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s" %(D)s""") is None
+    assert compile_format('%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s"', ("t", "D")) is None
+
+
+def test_positive_compile_format_missing_field_not_needed() -> None:
+    log_format = '%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s"'
+    line = """172.16.3.14 - - [01/Dec/2019:11:06:05 +0100] "GET / HTTP/1.1" 200 720 "-" "python-requests/2.22.0"\n"""
+    for binary in [False, True]:
+        parse_line = compile_format(log_format, ("t", "s"), binary)
+        assert parse_line(line.encode() if binary else line) == LogEntry(
+            h=None, l=None, u=None, t=LOG_ENTRY.t, r=None, s=200, b=None, f=None, a=None, D=None  # type: ignore
+        )
+    parser = LogLineParser(log_format, ("t", "s"))
+    assert parser._compiled is not None
+    assert parser.parse_line(line).s == 200
+
+
+PARAMIZER = Paramizer(
+    ParamizerItem("user agent", request_line="GET / HTTP/1.1", agent='agent "quoted" 1.0'),
+    ParamizerItem("user agent ending with a quote", request_line="GET / HTTP/1.1", agent='agent "quoted"'),
+    ParamizerItem("request line", request_line='GET /search?q="a" 200 "b" HTTP/1.1', agent="curl/7.68.0"),
+)
+
+
+@PARAMIZER.paramize("request_line, agent")
+def test_positive_compiled_quotes_inside_of_quoted_values(log_line_parser, request_line: str, agent: str) -> None:
+    parser = log_line_parser("""%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s" %(D)s""")
+    line = f'gunicorn[53253]: 172.16.3.14 - - [01/Dec/2019:11:06:05 +0100] "{request_line}" 200 720 "-" "{agent}" 72680\n'
+    parsed = parser._compiled(line)
+    assert parsed is not None  # no fallback to line_exp
+    assert parsed == parser._parse_slow(line)
+    assert (parsed.r, parsed.a) == (request_line, agent)
+
+
+def test_positive_parse_line_falls_back(log_line_parser) -> None:
+    parser = log_line_parser("""%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s" %(D)s""")
+    line = """gunicorn[53253]: 172.16.3.14 - - [01/Dec/2019:11:06:05 +0100] "GET / HTTP/1.1" 200 7k "-" "curl" 72680\n"""
+    assert parser._compiled(line) is None
+    assert parser.parse_line(line).b is None
+
+
+def test_positive_compiled_parse_line_projection() -> None:
+    parse_line = compile_format("""%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s" %(D)s""", ("t", "s"))
+    parsed = parse_line(
+        """172.16.3.14 - - [01/Dec/2019:11:06:05 +0100] "GET / HTTP/1.1" 200 720 "-" "python-requests/2.22.0" 72680\n"""
+    )
+    assert parsed == LogEntry(
+        h=None, l=None, u=None, t=LOG_ENTRY.t, r=None, s=200, b=None, f=None, a=None, D=None  # type: ignore
+    )
+
+
+def test_positive_compiled_parse_bytes() -> None:
+    parse_line = compile_format("""%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s" %(D)s""", binary=True)
+    parsed = parse_line(
+        b"""Dec 01 11:06:05 app3-test-vm1 gunicorn[53253]: 172.16.3.14 - - [01/Dec/2019:11:06:05 +0100] "GET /internal/user/5fdbb021-eebd-4156-a8a7-132289cef8a4/agenda/2019-12-01/2019-12-02 HTTP/1.1" 200 720 "-" "python-requests/2.22.0" 72680
+"""
+    )
+    assert LogEntry.a.__get__(parsed) == b"python-requests/2.22.0"  # not decoded until accessed
+    assert parsed == LOG_ENTRY
+    assert LogEntry.a.__get__(parsed) == "python-requests/2.22.0"
+    assert parsed.a is sys.intern("python-requests/2.22.0")
+
+
+def test_positive_compiled_parse_bytes_invalid_utf8() -> None:
+    parse_line = compile_format("""%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s" %(D)s""", binary=True)
+    parsed = parse_line(
+        b"""172.16.3.14 - - [01/Dec/2019:11:06:05 +0100] "GET / HTTP/1.1" 200 - "-" "agent \xff\xfe" 72680\n"""
+    )
+    assert parsed.s == 200
+    assert parsed.b is None
+    assert parsed.a == "agent ��"
@@ -0,0 +1,144 @@
+import copy
+from typing import List
+
+import pytest
+
+from guniparse.checkpoint import stats_layout
+from guniparse.columns import LogColumns
+from guniparse.endpoints import EndpointNormalizer
+from guniparse.groups import OTHER, GroupedStats
+from guniparse.log_entry import LogEntry
+from guniparse.order import OrderEnum
+from guniparse.parser import LogParser
+from guniparse.stats import Stats
+from tests.constants import LOG_ENTRY, LOG_ENTRY_LATER, LOG_FORMAT
+from tests.helpers import Paramizer, ParamizerItem
+
+
+@pytest.fixture(scope="module")
+def log_path(generated_log) -> str:
+    return generated_log(7)
+
+
+def test_positive_update(all_logs: List[LogEntry]) -> None:
+    groups = GroupedStats("status")
+    for log in all_logs:
+        groups.update(log)
+    rows = dict(groups.rows())
+    assert sum(group.requests for group in rows.values()) == len(all_logs)
+    assert rows["2xx"].requests == sum(1 for log in all_logs if log.s // 100 == 2)
+    assert rows["2xx"].bytes == sum(log.b or 0 for log in all_logs if log.s // 100 == 2)
+    assert rows["2xx"].latency.max == max(log.D for log in all_logs if log.s // 100 == 2)
+    assert OTHER not in rows
+
+
+PARAMIZER = Paramizer(
+    ParamizerItem("endpoint", by="endpoint"),
+    ParamizerItem("method", by="method"),
+    ParamizerItem("status", by="status"),
+    ParamizerItem("client", by="client"),
+    ParamizerItem("hour", by="hour"),
+)
+
+
+@PARAMIZER.paramize("by")
+def test_positive_update_columns_same_as_update(all_logs: List[LogEntry], by: str) -> None:
+    expected = GroupedStats(by, max_groups=1000)
+    for log in all_logs:
+        expected.update(log)
+
+    groups = GroupedStats(by, max_groups=1000)
+    for start in range(0, len(all_logs), 500):
+        columns = LogColumns(("r", "h"))
+        for log in all_logs[start:start + 500]:
+            columns.append(log)
+        groups.update_columns(columns)
+    assert groups == expected
+
+
+def test_positive_groups_are_bounded(all_logs: List[LogEntry]) -> None:
+    groups = GroupedStats("client", max_groups=5)
+    for log in all_logs:
+        groups.update(log)
+        assert len(groups.groups) <= 10
+    rows = list(groups.rows())
+    assert len(rows) == 6
+    assert rows[-1][0] == OTHER
+    assert groups.folded > 0
+    assert sum(group.requests for _, group in rows) == len(all_logs)
+
+
+def test_positive_merge_same_as_single_pass(all_logs: List[LogEntry]) -> None:
+    expected = GroupedStats("endpoint", max_groups=1000)
+    for log in all_logs:
+        expected.update(log)
+
+    first, second = GroupedStats("endpoint", max_groups=1000), GroupedStats("endpoint", max_groups=1000)
+    half = len(all_logs) // 2
+    for log in all_logs[:half]:
+        first.update(log)
+    for log in all_logs[half:]:
+        second.update(log)
+    first.merge(second)
+    assert first == expected
+
+
+def test_negative_merge_different_keys() -> None:
+    with pytest.raises(ValueError):
+        GroupedStats("endpoint").merge(GroupedStats("client"))
+    with pytest.raises(ValueError):
+        GroupedStats("endpoint").merge(GroupedStats("endpoint", normalizer=EndpointNormalizer([("{v}", r"v\d+")])))
+
+
+def test_negative_unknown_key() -> None:
+    with pytest.raises(ValueError):
+        GroupedStats("user agent")
+
+
+def test_positive_stats_need_group_field() -> None:
+    assert "h" in Stats.configured(group_by="client").fields
+    assert "r" in Stats.configured(group_by="endpoint").fields
+    assert "r" not in Stats.configured(group_by="hour").fields
+
+
+def test_positive_stats_merge_and_print(capsys) -> None:
+    stats, other = Stats.configured(group_by="status"), Stats.configured(group_by="status")
+    stats.update(LOG_ENTRY)
+    other.update(LOG_ENTRY_LATER)
+    stats.merge(other)
+    stats.end()
+    stats.print()
+    printed = capsys.readouterr().out
+    assert "by status:\n  2xx: 1 requests" in printed
+    assert "  4xx: 1 requests" in printed
+
+
+@pytest.mark.parametrize("jobs", [1, 3])
+def test_positive_stats_single_pass(log_path: str, all_logs: List[LogEntry], jobs: int) -> None:
+    stats_obj = Stats.configured(group_by="endpoint", max_groups=1000)
+    parser = LogParser(fields=stats_obj.fields, log_format=LOG_FORMAT)
+    stats = parser.stats(log_path, None, None, OrderEnum.asc, jobs, stats_obj)
+    expected = GroupedStats("endpoint", max_groups=1000)
+    for log in all_logs:
+        expected.update(log)
+    assert stats.groups == expected
+    assert stats.groups.normalizer is not None
+    assert stats.groups.normalizer.hits + stats.groups.normalizer.misses == len(all_logs)
+
+
+def test_positive_stats_with_other(log_path: str, all_logs: List[LogEntry]) -> None:
+    stats_obj = Stats.configured(group_by="endpoint", max_groups=5)
+    parser = LogParser(fields=stats_obj.fields, log_format=LOG_FORMAT)
+    stats = parser.stats(log_path, None, None, OrderEnum.asc, 3, stats_obj)
+    assert stats.groups is not None
+    rows = list(stats.groups.rows())
+    assert len(rows) == 6
+    assert rows[-1][0] == OTHER
+    assert sum(group.requests for _, group in rows) == len(all_logs)
+
+
+def test_positive_checkpoint_layout() -> None:
+    stats = Stats.configured(group_by="client")
+    assert stats_layout(stats) == stats_layout(copy.deepcopy(stats))
+    assert stats_layout(stats) != stats_layout(Stats.configured(group_by="client", max_groups=10))
+    assert stats_layout(stats) != stats_layout(Stats())
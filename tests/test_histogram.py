@@ -0,0 +1,67 @@
+import random
+from array import array
+
+from guniparse.histogram import BUCKETS, MAX_VALUE, LatencyHistogram, bucket_bounds, bucket_index
+from tests.helpers import Paramizer, ParamizerItem
+
+PARAMIZER = Paramizer(
+    ParamizerItem("zero", value=0),
+    ParamizerItem("exact bucket", value=63),
+    ParamizerItem("first shared bucket", value=64),
+    ParamizerItem("typical request time", value=72680),
+    ParamizerItem("biggest value", value=2 ** 64 - 1),
+)
+
+
+@PARAMIZER.paramize("value")
+def test_positive_bucket_bounds(value: int) -> None:
+    index = bucket_index(value)
+    low, high = bucket_bounds(index)
+    assert index < BUCKETS
+    assert low <= value <= high
+    assert high - low <= max(1, value / 32)
+
+
+def test_positive_quantiles_relative_error() -> None:
+    rnd = random.Random(42)
+    values = [int(rnd.lognormvariate(11, 1.5)) for _ in range(20000)]
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.add(value)
+    values.sort()
+    for q, estimate in histogram.quantiles().items():
+        exact = values[max(0, int(q * len(values) + 0.999999) - 1)]
+        assert abs(estimate - exact) <= exact * 0.02 + 1
+    assert histogram.max == values[-1]
+    assert histogram.min == values[0]
+
+
+def test_positive_merge_is_exact() -> None:
+    rnd = random.Random(7)
+    values = [rnd.randrange(0, 10 ** 7) for _ in range(5000)]
+    whole, first, second = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+    for i, value in enumerate(values):
+        whole.add(value)
+        (first if i % 3 else second).add(value)
+    first.merge(second)
+    assert first == whole
+
+
+def test_positive_empty() -> None:
+    histogram = LatencyHistogram()
+    assert histogram.quantile(0.5) is None
+    histogram.merge(LatencyHistogram())
+    assert histogram.max is None and histogram.count == 0
+
+
+def test_positive_values_out_of_range_are_clamped() -> None:
+    one_by_one, at_once, clamped = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+    for value in [-5, 0, 72680]:
+        one_by_one.add(value)
+    at_once.add_many(array("q", [-5, 0, 72680]))  # e.g. a column of request times
+    for value in [0, 0, 72680]:
+        clamped.add(value)
+    assert one_by_one == at_once == clamped
+    assert (clamped.min, clamped.counts[0]) == (0, 2)
+    one_by_one.add(2 ** 70)
+    assert one_by_one.max == MAX_VALUE
@@ -0,0 +1,51 @@
+import pytest
+
+from guniparse.hll import HyperLogLog
+from tests.helpers import Paramizer, ParamizerItem
+
+PARAMIZER = Paramizer(
+    ParamizerItem("empty", n=0, precision=14),
+    ParamizerItem("few values", n=10, precision=14),
+    ParamizerItem("linear counting range", n=5000, precision=14),
+    ParamizerItem("many values", n=200000, precision=14),
+    ParamizerItem("small registers", n=50000, precision=10),
+)
+
+
+@PARAMIZER.paramize("n, precision")
+def test_positive_count(n: int, precision: int) -> None:
+    counter = HyperLogLog(precision)
+    for i in range(n):
+        counter.add(f"10.{i >> 16}.{(i >> 8) & 255}.{i & 255}")
+        counter.add(f"10.{i >> 16}.{(i >> 8) & 255}.{i & 255}")  # repeated values are not counted twice
+    assert abs(counter.count() - n) <= 4 * counter.error * n + 1
+
+
+def test_positive_merge_and_serialize() -> None:
+    whole, first, second = HyperLogLog(), HyperLogLog(), HyperLogLog()
+    for i in range(30000):
+        whole.add(str(i))
+        (first if i % 3 else second).add(str(i))
+        if i % 5 == 0:
+            second.add(str(i))  # overlapping parts
+            whole.add(str(i))
+    first.merge(HyperLogLog.from_bytes(second.to_bytes()))
+    assert first == whole
+    assert first.count() == whole.count()
+
+
+def test_positive_bytes_and_str() -> None:
+    counter = HyperLogLog()
+    counter.add("172.16.3.14")
+    counter.add(b"172.16.3.14")
+    assert counter.count() == 1
+
+
+def test_negative_merge_different_precision() -> None:
+    with pytest.raises(ValueError):
+        HyperLogLog(12).merge(HyperLogLog(14))
+
+
+def test_negative_from_bytes() -> None:
+    with pytest.raises(ValueError):
+        HyperLogLog.from_bytes(HyperLogLog(10).to_bytes()[:-1])
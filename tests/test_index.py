@@ -0,0 +1,77 @@
+import os
+import shutil
+from datetime import datetime, timezone
+
+from guniparse.index import TimestampIndex
+from guniparse.order import OrderEnum
+from guniparse.parser import LogParser
+from tests.constants import PATH_ASC, PATH_DESC
+from tests.helpers import Paramizer, ParamizerItem
+
+DATES = [datetime(2019, 12, 1, 10, 5, second, tzinfo=timezone.utc) for second in range(55, 60)] + [
+    datetime(2019, 12, 1, 10, 6, second, tzinfo=timezone.utc) for second in range(0, 8)
+]
+
+PARAMIZER = Paramizer(
+    ParamizerItem("ascending order", path=PATH_ASC, order=OrderEnum.asc),
+    ParamizerItem("descending order", path=PATH_DESC, order=OrderEnum.desc),
+)
+
+
+@PARAMIZER.paramize("path, order")
+def test_positive_indexed_find_offset(tmp_path, monkeypatch, path: str, order: OrderEnum) -> None:
+    monkeypatch.setattr(TimestampIndex, "INTERVAL", 300)
+    log_path = str(tmp_path / "access.log")
+    shutil.copy(path, log_path)
+    plain, indexed = LogParser(), LogParser(use_index=True)
+    for since in DATES:
+        assert indexed.find_offset(log_path, since, order) == plain.find_offset(log_path, since, order)
+    assert os.path.isfile(log_path + TimestampIndex.SUFFIX)
+
+
+def test_positive_save_load(tmp_path) -> None:
+    log_path = str(tmp_path / "access.log")
+    shutil.copy(PATH_ASC, log_path)
+    index = TimestampIndex.for_file(log_path, LogParser()._line_time, interval=300)
+    loaded = TimestampIndex.load(log_path + TimestampIndex.SUFFIX)
+    assert len(index) > 1
+    assert loaded is not None
+    assert (loaded.interval, loaded.size, loaded.dates, loaded.offsets) == (
+        index.interval, index.size, index.dates, index.offsets
+    )
+
+
+def test_positive_appended_file_extends_index(tmp_path) -> None:
+    log_path = str(tmp_path / "access.log")
+    with open(PATH_ASC, "rb") as f:
+        lines = f.readlines()
+    with open(log_path, "wb") as f:
+        f.writelines(lines[:5])
+    line_time = LogParser()._line_time
+    before = TimestampIndex.for_file(log_path, line_time, interval=300)
+
+    with open(log_path, "ab") as f:
+        f.writelines(lines[5:])
+    after = TimestampIndex.for_file(log_path, line_time, interval=300)
+    assert len(after) > len(before)
+    assert after.offsets[:len(before)] == before.offsets
+    assert after.size == os.path.getsize(log_path)
+
+
+def test_positive_rewritten_file_rebuilds_index(tmp_path) -> None:
+    log_path = str(tmp_path / "access.log")
+    shutil.copy(PATH_ASC, log_path)
+    line_time = LogParser()._line_time
+    TimestampIndex.for_file(log_path, line_time, interval=300)
+
+    with open(PATH_DESC, "rb") as src, open(log_path, "r+b") as f:
+        f.write(src.read())  # same size, different content
+    os.utime(log_path, ns=(0, 0))
+    index = TimestampIndex.for_file(log_path, line_time, interval=300)
+    assert list(index.dates) == sorted(index.dates, reverse=True)
+
+
+def test_negative_load_garbage(tmp_path) -> None:
+    path = tmp_path / ("access.log" + TimestampIndex.SUFFIX)
+    path.write_bytes(b"not an index")
+    assert TimestampIndex.load(str(path)) is None
@@ -141,3 +141,41 @@ def test_negative_parse_line(log_line_parser, log_format: str, line: str, except
     parser = log_line_parser(log_format)
     with pytest.raises(exception):
         parser.parse_line(line)
+
+
+def test_positive_parsed_entries_are_compact(log_line_parser) -> None:
+    parser = log_line_parser("""%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s" %(D)s""")
+    line = """Dec 01 11:06:05 app3-test-vm1 gunicorn[53253]: 172.16.3.14 - - [01/Dec/2019:11:06:05 +0100] "GET /internal/user/5fdbb021-eebd-4156-a8a7-132289cef8a4/agenda/2019-12-01/2019-12-02 HTTP/1.1" 200 720 "-" "python-requests/2.22.0" 72680"""
+    quoted = line.replace('"python-requests/2.22.0"', '"agent "quoted" inside"')  # parsed by line_exp
+    for first, second in [
+        (parser.parse_line(line), parser.parse_line(line)),
+        (parser.parse_bytes(line.encode()), parser.parse_bytes(line.encode())),
+        (parser.parse_line(quoted), parser.parse_line(quoted)),
+    ]:
+        assert not hasattr(first, "__dict__")
+        assert first == second
+        assert first.a is second.a and first.h is second.h  # interned
+        assert first.r is not second.r
+
+
+PARAMIZER = Paramizer(
+    ParamizerItem("all fields", only=None, expected=LOG_ENTRY),
+    ParamizerItem(
+        "some fields", only=("t", "s"),
+        expected=LogEntry(None, None, None, LOG_ENTRY.t, None, 200, None, None, None, None),  # type: ignore
+    ),
+)
+
+
+@PARAMIZER.paramize("only, expected")
+def test_positive_from_strings(only: Any, expected: LogEntry) -> None:
+    values = {"prefix": "Dec 01 11:06:05 app3-test-vm1 gunicorn[53253]:", **vars(RAW_LOG_ENTRY)}
+    assert LogEntry.from_strings(values, only) == expected
+    assert LogEntry.from_raw(RAW_LOG_ENTRY, only) == expected
+
+
+def test_negative_from_strings_missing_field() -> None:
+    values = vars(RAW_LOG_ENTRY).copy()
+    del values["h"]
+    with pytest.raises(TypeError):
+        LogEntry.from_strings(values)
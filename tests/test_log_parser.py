@@ -1,7 +1,10 @@
 from datetime import datetime, timezone
 from typing import Optional
 
+import pytest
+
 from guniparse.parser import OrderEnum, LogParser
+from guniparse.stats import Stats
 from tests.constants import PATH_DESC, PATH_ASC
 from tests.helpers import Paramizer, ParamizerItem
 
@@ -76,3 +79,66 @@ def test_positive_open(path: str, since: Optional[datetime], order: OrderEnum, e
     parser = LogParser()
     f = parser._open(path, since, order)
     assert f.readline() == expected
+
+
+def test_positive_stats_projection():
+    parser = LogParser(fields=Stats.FIELDS)
+    stats = parser.stats(PATH_ASC, order=OrderEnum.asc)
+    assert stats.requests == 10
+    assert stats.avg_resp_size == 720
+
+
+def test_negative_stats_missing_fields():
+    parser = LogParser(fields=("s",))
+    with pytest.raises(ValueError):
+        parser.stats(PATH_ASC, order=OrderEnum.asc)
+
+
+def test_negative_unknown_fields():
+    with pytest.raises(ValueError):
+        LogParser(fields=("s", "not_a_field"))
+
+
+PARAMIZER = Paramizer(
+    ParamizerItem("whole file, descending order", path=PATH_DESC, _from=None, to=None, order=OrderEnum.desc),
+    ParamizerItem("whole file, ascending order", path=PATH_ASC, _from=None, to=None, order=OrderEnum.asc),
+    ParamizerItem(
+        "time range, descending order",
+        path=PATH_DESC,
+        _from=datetime(2019, 12, 1, 10, 5, 59, tzinfo=timezone.utc),
+        to=datetime(2019, 12, 1, 10, 6, 3, tzinfo=timezone.utc),
+        order=OrderEnum.desc,
+    ),
+    ParamizerItem(
+        "time range, ascending order",
+        path=PATH_ASC,
+        _from=datetime(2019, 12, 1, 10, 5, 59, tzinfo=timezone.utc),
+        to=datetime(2019, 12, 1, 10, 6, 3, tzinfo=timezone.utc),
+        order=OrderEnum.asc,
+    ),
+)
+
+
+@PARAMIZER.paramize("path, _from, to, order")
+def test_positive_parallel_stats(
+        monkeypatch, path: str, _from: Optional[datetime], to: Optional[datetime], order: OrderEnum
+):
+    monkeypatch.setattr(LogParser, "CHUNK_MIN_SIZE", 1)
+    parser = LogParser(fields=Stats.FIELDS)
+    assert len(parser._plan_chunks(path, None, None, order, 3)) > 1
+    assert parser.stats(path, _from, to, order, jobs=3) == parser.stats(path, _from, to, order)
+
+
+def test_positive_parallel_top_and_distinct(monkeypatch):
+    monkeypatch.setattr(LogParser, "CHUNK_MIN_SIZE", 1)
+    fields = Stats.configured(top=("r", "h"), distinct=("h",)).fields
+    parser = LogParser(fields=fields)
+    serial, parallel = [
+        parser.stats(
+            PATH_ASC, order=OrderEnum.asc, jobs=jobs, stats_obj=Stats.configured(top=("r", "h"), distinct=("h",))
+        )
+        for jobs in (1, 3)
+    ]
+    assert parallel == serial
+    assert sum(count for _, count, _ in serial.top["r"].top(10)) == serial.requests
+    assert serial.distinct["h"].count() == 1
@@ -0,0 +1,146 @@
+from typing import List
+
+import pytest
+
+from benchmarks.generator import MALFORMED
+from guniparse.format_compiler import format_literals
+from guniparse.malformed import MalformedLines
+from guniparse.order import OrderEnum
+from guniparse.parser import LogLineParser, LogParser
+from guniparse.stats import Stats
+from tests.constants import GENERATED_LINES, LOG_FORMAT
+from tests.helpers import Paramizer, ParamizerItem
+
+ERROR_LOG = [
+    "[2019-12-01 11:00:00 +0100] [53253] [ERROR] Exception in worker process",
+    "Traceback (most recent call last):",
+    '  File "/usr/lib/python3.8/site-packages/gunicorn/arbiter.py", line 583, in spawn_worker',
+    "ModuleNotFoundError: No module named 'app'",
+]
+
+
+@pytest.fixture(scope="module")
+def log_path(generated_log) -> str:
+    return generated_log(11, malformed_ratio=0.4)
+
+
+@pytest.fixture(scope="module")
+def malformed_lines(log_path: str) -> List[bytes]:
+    with open(log_path, "rb") as f:
+        return [line.rstrip(b"\n") for line in f if line.rstrip(b"\n").decode() in MALFORMED]
+
+
+PARAMIZER = Paramizer(
+    ParamizerItem(
+        "default format", log_format=LOG_FORMAT, expected=[" ", " ", " [", '] "', '" ', " ", ' "', '" "', '" '],
+    ),
+    ParamizerItem("date first", log_format='%(t)s "%(r)s" %(s)s', expected=["[", '] "', '" ']),
+    ParamizerItem("only fields", log_format="%(h)s%(D)s", expected=[]),
+)
+
+
+@PARAMIZER.paramize("log_format, expected")
+def test_positive_format_literals(log_format: str, expected: List[str]) -> None:
+    assert format_literals(log_format) == expected
+
+
+@pytest.mark.parametrize("line", ERROR_LOG + MALFORMED)
+def test_positive_lines_that_are_not_logs(line: str) -> None:
+    class Unused:
+        def match(self, line: str) -> None:
+            raise AssertionError("line_exp should not be tried")
+
+    parser = LogLineParser(LOG_FORMAT)
+    parser.line_exp = Unused()  # type: ignore
+    assert parser.parse_line(line) is None
+    assert parser.parse_bytes(line.encode()) is None
+
+
+def test_positive_sample() -> None:
+    malformed = MalformedLines(sample_size=3, seed=1)
+    lines = [f"line {i}".encode() for i in range(100)]
+    for line in lines:
+        malformed.add(line)
+    assert malformed.count == 100
+    assert len(malformed.samples) == 3
+    assert set(malformed.samples) <= set(lines)
+    assert malformed.samples != lines[:3]  # not just the first ones
+
+
+def test_positive_merge() -> None:
+    first, second = MalformedLines(sample_size=5, seed=1), MalformedLines(sample_size=5, seed=2)
+    first.lines, second.lines = 10, 20
+    first.add(b"first")
+    for i in range(10):
+        second.add(f"second {i}".encode())
+    first.merge(second)
+    assert (first.lines, first.count) == (30, 11)
+    assert len(first.samples) == 5
+    assert first.rate == pytest.approx(11 / 30)
+    assert first.report().startswith("skipped 11 malformed lines (36.7% of 30 lines)\n  ")
+
+
+def test_positive_nothing_to_report() -> None:
+    malformed = MalformedLines()
+    malformed.lines = 10
+    assert malformed.report() == malformed.summary() == ""
+
+
+@pytest.mark.parametrize("jobs", [1, 3])
+def test_positive_stats_count_malformed(log_path: str, malformed_lines: List[bytes], jobs: int) -> None:
+    parser = LogParser(Stats.FIELDS, LOG_FORMAT, malformed=MalformedLines(sample_size=4))
+    stats = parser.stats(log_path, None, None, OrderEnum.asc, jobs)
+    assert parser.malformed.lines == GENERATED_LINES
+    assert parser.malformed.count == len(malformed_lines) == GENERATED_LINES - stats.requests
+    assert 0.3 < parser.malformed.rate < 0.5
+    assert len(parser.malformed.samples) == 4
+    assert set(parser.malformed.samples) <= set(malformed_lines)
+
+
+def test_positive_line_by_line_count_malformed(log_path: str, malformed_lines: List[bytes]) -> None:
+    parser = LogParser(Stats.FIELDS, LOG_FORMAT)
+    stats = parser.stats_many([log_path, log_path], order=OrderEnum.asc)
+    assert parser.malformed.lines == 2 * GENERATED_LINES
+    assert parser.malformed.count == 2 * len(malformed_lines) == 2 * GENERATED_LINES - stats.requests
+    assert parser.malformed.samples == []
+
+
+def test_positive_seeking_does_not_count(log_path: str) -> None:
+    parser = LogParser(Stats.FIELDS, LOG_FORMAT)
+    assert parser.time_span(log_path)[0] is not None
+    parser.find_offset(log_path, parser.time_span(log_path)[0] + 60, OrderEnum.asc)  # type: ignore
+    assert (parser.malformed.lines, parser.malformed.count) == (0, 0)
+
+
+PARAMIZER = Paramizer(
+    ParamizerItem("status", line=b'10.0.0.1 - - [01/Dec/2019:11:00:05 +0100] "GET / HTTP/1.1" 99999 720 "-" "curl" 5'),
+    ParamizerItem(
+        "size", line=b'10.0.0.1 - - [01/Dec/2019:11:00:05 +0100] "GET / HTTP/1.1" 200 %d "-" "curl" 5' % 10 ** 20
+    ),
+    ParamizerItem(
+        "request time", line=b'10.0.0.1 - - [01/Dec/2019:11:00:05 +0100] "GET / HTTP/1.1" 200 720 "-" "a" %d' % 10 ** 20
+    ),
+    ParamizerItem(
+        "through the fallback",
+        line=b'10.0.0.1 - - [01/Dec/2019:11:00:05 +0100] "GET / HTTP/1.1" 99999 720 "-" "a "quoted" agent" 5',
+    ),
+)
+
+
+@PARAMIZER.paramize("line")
+def test_positive_numbers_out_of_range_are_malformed(tmp_path, log_path: str, line: bytes) -> None:
+    with open(log_path, "rb") as f:
+        lines = f.readlines()
+    path = tmp_path / "access.log"
+    path.write_bytes(b"".join(lines[:100]) + line + b"\n" + b"".join(lines[100:]))
+    expected = LogParser(Stats.FIELDS, LOG_FORMAT)
+    requests = expected.stats(log_path, None, None, OrderEnum.asc).requests
+    for read_lines in [False, True]:
+        parser = LogParser(Stats.FIELDS, LOG_FORMAT, malformed=MalformedLines(sample_size=GENERATED_LINES))
+        if read_lines:
+            stats = parser.stats_many([str(path)], order=OrderEnum.asc)
+        else:
+            stats = parser.stats(str(path), None, None, OrderEnum.asc)
+        assert stats.requests == requests
+        assert parser.malformed.count == expected.malformed.count + 1
+        assert line in parser.malformed.samples
@@ -0,0 +1,85 @@
+import bz2
+import gzip
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import pytest
+
+from guniparse.compressed import open_log
+from guniparse.order import OrderEnum
+from guniparse.parser import LogParser
+from guniparse.stats import Stats
+from tests.constants import PATH_ASC, PATH_DESC
+from tests.helpers import Paramizer, ParamizerItem
+
+LOG_FORMAT = """%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s" %(D)s"""
+
+
+def split(tmp_path, path: str) -> List[str]:
+    """Deals lines of the log to a plain, a gzip and a bz2 file, like logs of three workers."""
+    with open(path, "rb") as f:
+        lines = f.readlines()
+    paths = [str(tmp_path / name) for name in ("access.log", "access.log.1.gz", "access.log.2.bz2")]
+    for i, (part, compress) in enumerate(zip(paths, (bytes, gzip.compress, bz2.compress))):
+        with open(part, "wb") as f:
+            f.write(compress(b"".join(lines[i::3])))
+    return paths
+
+
+PARAMIZER = Paramizer(
+    ParamizerItem("descending order", path=PATH_DESC, order=OrderEnum.desc, _from=None, to=None),
+    ParamizerItem("ascending order", path=PATH_ASC, order=OrderEnum.asc, _from=None, to=None),
+    ParamizerItem(
+        "descending order, time range",
+        path=PATH_DESC,
+        order=OrderEnum.desc,
+        _from=datetime(2019, 12, 1, 10, 5, 59, tzinfo=timezone.utc),
+        to=datetime(2019, 12, 1, 10, 6, 3, tzinfo=timezone.utc),
+    ),
+    ParamizerItem(
+        "ascending order, time range",
+        path=PATH_ASC,
+        order=OrderEnum.asc,
+        _from=datetime(2019, 12, 1, 10, 5, 59, tzinfo=timezone.utc),
+        to=datetime(2019, 12, 1, 10, 6, 3, tzinfo=timezone.utc),
+    ),
+)
+
+
+@PARAMIZER.paramize("path, order, _from, to")
+def test_positive_merged_stats(
+        tmp_path, path: str, order: OrderEnum, _from: Optional[datetime], to: Optional[datetime]
+) -> None:
+    parser = LogParser(log_format=LOG_FORMAT)
+    paths = split(tmp_path, path)
+    merged = list(parser.merged_lines(paths, _from, to, order))
+    times = [log.t for log in merged]
+    assert times == sorted(times, reverse=order == OrderEnum.desc)
+    expected = parser.stats(path, _from, to, order, stats_obj=Stats.configured(bucket=1))
+    assert parser.stats_many(paths, _from, to, order, Stats.configured(bucket=1)) == expected
+
+
+def test_positive_time_span(tmp_path) -> None:
+    parser = LogParser(log_format=LOG_FORMAT)
+    plain, gz, bz = split(tmp_path, PATH_DESC)
+    assert parser.time_span(plain) == (1575194760, 1575194758)
+    assert parser.time_span(gz) == (1575194765, 1575194757)
+    assert parser.time_span(bz) == (1575194762, None)  # last log of bz2 can't be found without reading everything
+
+
+def test_positive_skips_files_out_of_range(tmp_path, monkeypatch) -> None:
+    parser = LogParser(log_format=LOG_FORMAT)
+    paths = split(tmp_path, PATH_ASC)
+    opened = []
+    monkeypatch.setattr(parser, "_open", lambda path, *args: opened.append(path) or open_log(path))
+    _from = datetime(2019, 12, 1, 10, 6, 4, tzinfo=timezone.utc)
+    assert [log.t for log in parser.merged_lines(paths, _from, None, OrderEnum.asc)] == [1575194765]
+    assert opened == paths[1:]  # the plain file ends too early, the end of bz2 file is not known
+
+
+def test_positive_no_time_spans_without_range(tmp_path, monkeypatch) -> None:
+    parser = LogParser(log_format=LOG_FORMAT)
+    paths = split(tmp_path, PATH_ASC)
+    monkeypatch.setattr(parser, "time_span", lambda path: pytest.fail("every file is read anyway"))
+    assert parser.stats_many(paths, order=OrderEnum.asc) == parser.stats(PATH_ASC, order=OrderEnum.asc)
+    assert not parser._gzip_checkpoints(paths[1]).built  # the gzip file was only streamed
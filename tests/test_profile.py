@@ -0,0 +1,81 @@
+import json
+from datetime import datetime, timezone
+from typing import Optional
+
+from guniparse.parser import LogParser
+from guniparse.order import OrderEnum
+from guniparse.profile import STAGES, ScanProfile
+from guniparse.stats import Stats
+from tests.constants import PATH_ASC, PATH_DESC
+from tests.helpers import Paramizer, ParamizerItem
+
+LOG_FORMAT = """%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s" %(D)s"""
+
+PARAMIZER = Paramizer(
+    ParamizerItem("descending, whole file", path=PATH_DESC, order=OrderEnum.desc, since=None, jobs=1),
+    ParamizerItem("ascending, whole file", path=PATH_ASC, order=OrderEnum.asc, since=None, jobs=1),
+    ParamizerItem(
+        "ascending, since", path=PATH_ASC, order=OrderEnum.asc,
+        since=datetime(2019, 12, 1, 10, 6, 0, tzinfo=timezone.utc), jobs=1,
+    ),
+    ParamizerItem("ascending, parallel", path=PATH_ASC, order=OrderEnum.asc, since=None, jobs=2),
+)
+
+
+@PARAMIZER.paramize("path, order, since, jobs")
+def test_positive_profiled_stats(path: str, order: OrderEnum, since: Optional[datetime], jobs: int) -> None:
+    profile = ScanProfile()
+    profiled = LogParser(Stats.FIELDS, LOG_FORMAT, profile=profile).stats(path, since, None, order, jobs)
+    expected = LogParser(Stats.FIELDS, LOG_FORMAT).stats(path, since, None, order, jobs)
+    assert profiled == expected
+
+    with open(path, "rb") as f:
+        data = f.read()
+    counters = profile.counters
+    assert counters["logs"] == counters["lines"] - counters["malformed"] >= expected.requests
+    if since is None:
+        assert counters["lines"] == data.count(b"\n")
+        assert counters["bytes"] == len(data)
+        assert counters["malformed"] == 1  # header line
+        assert counters["seeks"] == 0
+    else:
+        assert counters["seeks"] == 1
+        assert counters["bisection_steps"] > 0 and counters["probes"] > 0
+        assert profile.times["seek"] > 0
+    assert profile.total > 0
+    assert profile.total >= sum(profile.times.values()) or jobs > 1
+    assert profile.lines_per_sec > 0 and profile.mb_per_sec > 0
+    assert json.loads(json.dumps(profile.as_dict()))["counters"] == counters
+
+
+def test_positive_profiled_many_files() -> None:
+    profile = ScanProfile()
+    stats = LogParser(Stats.FIELDS, LOG_FORMAT, profile=profile).stats_many([PATH_ASC, PATH_DESC], order=OrderEnum.asc)
+    assert profile.counters["logs"] == stats.requests
+    assert profile.times["parse"] > 0 and profile.times["stats"] > 0
+
+
+def test_positive_merge_and_report() -> None:
+    first, second = ScanProfile(), ScanProfile()
+    first.count("lines", 3)
+    second.count("lines", 4)
+    second.times["io"] = 0.5
+    second.total = 10.0
+    first.total = 2.0
+    first.merge(second)
+    assert first.counters["lines"] == 7
+    assert first.times["io"] == 0.5
+    assert first.total == 2.0
+    report = first.report()
+    assert report.startswith("profile: 2.000s, 4 lines/sec")
+    assert "reading (and decompressing)" in report and "25.0%" in report
+    assert set(first.as_dict()["times"]) == set(STAGES)
+
+
+def test_positive_only_malformed_lines_fall_back(generated_log) -> None:
+    # the generated log has user agents with quotes inside, they are parsed by the fast pattern too
+    profile = ScanProfile()
+    parser = LogParser(Stats.FIELDS, LOG_FORMAT, profile=profile)
+    stats = parser.stats(generated_log(13, malformed_ratio=0.01), order=OrderEnum.asc)
+    assert stats.requests > 0
+    assert profile.counters["fallback"] == profile.counters["malformed"] == parser.malformed.count > 0
@@ -0,0 +1,117 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+from guniparse.order import OrderEnum
+from guniparse.parser import LogParser
+from guniparse.seek import TimeSeeker
+from guniparse.timestamp import Timestamp
+from tests.constants import PATH_ASC, PATH_DESC
+from tests.helpers import Paramizer, ParamizerItem
+
+
+def line_time(line: bytes) -> Optional[Timestamp]:
+    return Timestamp(int(line)) if line.strip().isdigit() else None
+
+
+ASC = b"header\n1\n2\n2\n3\nnot a log\n5\n8\n"
+DESC = b"header\n8\n5\nnot a log\n3\n2\n2\n1\n"
+# a block of garbage much longer than a couple of lines right where the bisection starts, e.g. a traceback
+GARBAGE = b"not a log\n" * 200
+GARBAGE_ASC = b"".join(b"%d\n" % t for t in range(500)) + GARBAGE + b"".join(b"%d\n" % t for t in range(500, 1000))
+GARBAGE_DESC = b"".join(b"%d\n" % t for t in range(999, 499, -1)) + GARBAGE + b"".join(
+    b"%d\n" % t for t in range(499, -1, -1)
+)
+
+PARAMIZER = Paramizer(
+    ParamizerItem("ascending, exact date", buf=ASC, order=OrderEnum.asc, since=2, expected=ASC.index(b"2\n")),
+    ParamizerItem("ascending, missing date", buf=ASC, order=OrderEnum.asc, since=4, expected=ASC.index(b"5\n")),
+    ParamizerItem("ascending, before all", buf=ASC, order=OrderEnum.asc, since=0, expected=ASC.index(b"1\n")),
+    ParamizerItem("ascending, after all", buf=ASC, order=OrderEnum.asc, since=9, expected=len(ASC)),
+    ParamizerItem("descending, exact date", buf=DESC, order=OrderEnum.desc, since=2, expected=DESC.index(b"1\n")),
+    ParamizerItem("descending, missing date", buf=DESC, order=OrderEnum.desc, since=4, expected=DESC.index(b"3\n")),
+    ParamizerItem("descending, before all", buf=DESC, order=OrderEnum.desc, since=0, expected=len(DESC)),
+    ParamizerItem("descending, after all", buf=DESC, order=OrderEnum.desc, since=9, expected=DESC.index(b"8\n")),
+    ParamizerItem("no newline at the end", buf=b"1\n2\n3", order=OrderEnum.asc, since=3, expected=4),
+    ParamizerItem("nothing but garbage", buf=b"not a log\n" * 1000, order=OrderEnum.asc, since=3, expected=10000),
+    ParamizerItem(
+        "ascending, garbage in the middle",
+        buf=GARBAGE_ASC,
+        order=OrderEnum.asc,
+        since=700,
+        expected=GARBAGE_ASC.index(b"\n700\n") + 1,
+    ),
+    ParamizerItem(
+        "descending, garbage in the middle",
+        buf=GARBAGE_DESC,
+        order=OrderEnum.desc,
+        since=300,
+        expected=GARBAGE_DESC.index(b"\n299\n") + 1,
+    ),
+)
+
+
+@PARAMIZER.paramize("buf, order, since, expected")
+def test_positive_find_offset(buf: bytes, order: OrderEnum, since: int, expected: int) -> None:
+    seeker = TimeSeeker(buf, line_time, order)
+    assert seeker.find_offset(since) == expected
+    # a log per bisection step and every line that is not a log at most once, never the whole file
+    assert seeker.probes <= len(buf).bit_length() + buf.count(b"not a log")
+
+
+PARAMIZER = Paramizer(
+    ParamizerItem(
+        "descending order",
+        path=PATH_DESC,
+        since=datetime(2019, 12, 1, 10, 5, 59, tzinfo=timezone.utc),
+        order=OrderEnum.desc,
+        expected=b"Dec 01 11:05:58",
+    ),
+    ParamizerItem(
+        "ascending order",
+        path=PATH_ASC,
+        since=datetime(2019, 12, 1, 10, 5, 59, tzinfo=timezone.utc),
+        order=OrderEnum.asc,
+        expected=b"Dec 01 11:05:59",
+    ),
+)
+
+
+@PARAMIZER.paramize("path, since, order, expected")
+def test_positive_log_parser_find_offset(path: str, since: datetime, order: OrderEnum, expected: bytes) -> None:
+    offset = LogParser().find_offset(path, since, order)
+    with open(path, "rb") as f:
+        f.seek(offset)
+        assert f.readline().startswith(expected)
+
+
+def test_positive_open_garbage_file(tmp_path) -> None:
+    path = tmp_path / "garbage.log"
+    path.write_bytes(b"some kind of header that is not actual log\n" * 10000)
+    with LogParser()._open(str(path), 0, OrderEnum.desc) as f:
+        assert f.readline() == b""
+
+
+PARAMIZER = Paramizer(
+    ParamizerItem("descending order", path=PATH_DESC, order=OrderEnum.desc),
+    ParamizerItem("ascending order", path=PATH_ASC, order=OrderEnum.asc),
+)
+
+
+@PARAMIZER.paramize("path, order")
+def test_positive_log_parser_find_offset_after_traceback(tmp_path, path: str, order: OrderEnum) -> None:
+    with open(path, "rb") as f:
+        lines = f.readlines()
+    middle = len(lines) // 2
+    traceback = [b"Traceback (most recent call last):\n"] + [b'  File "app.py", line %d, in view\n' % i for i in range(200)]
+    lines[middle:middle] = traceback
+    log_path = tmp_path / "access.log"
+    log_path.write_bytes(b"".join(lines))
+    parser = LogParser()
+    since = parser.parse_line(lines[middle + len(traceback) + 1]).t  # type: ignore
+    expected = 0
+    for line in lines:  # the first matching log found line by line
+        log = parser.parse_line(line)
+        if log is not None and (log.t < since if order == OrderEnum.desc else log.t >= since):
+            break
+        expected += len(line)
+    assert parser.find_offset(str(log_path), since, order) == expected
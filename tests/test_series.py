@@ -0,0 +1,82 @@
+import csv
+import random
+
+import pytest
+
+from guniparse.main import guniparse_start
+from guniparse.order import OrderEnum
+from guniparse.parser import LogParser
+from guniparse.series import TimeSeries, parse_bucket
+from guniparse.stats import Stats
+from tests.constants import PATH_ASC, PATH_DESC
+from tests.helpers import Paramizer, ParamizerItem
+
+PARAMIZER = Paramizer(
+    ParamizerItem("seconds", value="30s", expected=30),
+    ParamizerItem("minute", value="1m", expected=60),
+    ParamizerItem("hours", value="6h", expected=6 * 3600),
+    ParamizerItem("day", value="1d", expected=86400),
+)
+
+
+@PARAMIZER.paramize("value, expected")
+def test_positive_parse_bucket(value: str, expected: int) -> None:
+    assert parse_bucket(value) == expected
+
+
+@pytest.mark.parametrize("value", ["", "m", "0m", "1w", "-1m", "1.5h"])
+def test_negative_parse_bucket(value: str) -> None:
+    with pytest.raises(ValueError):
+        parse_bucket(value)
+
+
+def test_positive_rows() -> None:
+    series = TimeSeries(60)
+    # descending order and a gap, the gap is reported as an empty bucket
+    series.add(1575194830, 200, 720, 1000)
+    series.add(1575194700, 404, None, 3000)
+    series.add(1575194701, 500, 10, 2000)
+    assert list(series.rows()) == [
+        (1575194700 // 60 * 60, (2, 0, 0, 0, 1, 1, 10, 5000)),
+        (1575194700 // 60 * 60 + 60, (0, 0, 0, 0, 0, 0, 0, 0)),
+        (1575194700 // 60 * 60 + 120, (1, 0, 1, 0, 0, 0, 720, 1000)),
+    ]
+
+
+def test_positive_merge() -> None:
+    rnd = random.Random(3)
+    logs = [(rnd.randrange(0, 10 ** 6), rnd.choice([200, 302, 404, 503]), rnd.randrange(100), 7) for _ in range(3000)]
+    whole, first, second = TimeSeries(300), TimeSeries(300), TimeSeries(300)
+    for i, log in enumerate(logs):
+        whole.add(*log)
+        (first if i < 1000 else second).add(*log)
+    first.merge(second)
+    assert first == whole
+    with pytest.raises(ValueError):
+        first.merge(TimeSeries(60))
+
+
+PARAMIZER = Paramizer(
+    ParamizerItem("descending order", path=PATH_DESC, order=OrderEnum.desc),
+    ParamizerItem("ascending order", path=PATH_ASC, order=OrderEnum.asc),
+)
+
+
+@PARAMIZER.paramize("path, order")
+def test_positive_stats_series(monkeypatch, path: str, order: OrderEnum) -> None:
+    monkeypatch.setattr(LogParser, "CHUNK_MIN_SIZE", 1)
+    parser = LogParser(fields=Stats.FIELDS)
+    serial = parser.stats(path, order=order, stats_obj=Stats.configured(bucket=2))
+    parallel = parser.stats(path, order=order, jobs=3, stats_obj=Stats.configured(bucket=2))
+    assert parallel == serial
+    assert sum(values[0] for _, values in serial.series.rows()) == serial.requests
+    assert serial.series.csv().count("\n") == 6
+
+
+def test_positive_csv_output_can_be_piped(capsys) -> None:
+    guniparse_start([PATH_ASC], order=OrderEnum.asc, bucket=2)
+    captured = capsys.readouterr()
+    rows = list(csv.reader(captured.out.splitlines()))
+    assert rows[0][:2] == ["time", "requests"]
+    assert sum(int(row[1]) for row in rows[1:]) == 10
+    assert "requests: 10" in captured.err  # progress
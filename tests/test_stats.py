@@ -3,7 +3,7 @@ from typing import List
 
 from guniparse.log_entry import LogEntry
 from guniparse.stats import Stats
-from tests.constants import LOG_ENTRY, LOG_ENTRY2
+from tests.constants import LOG_ENTRY, LOG_ENTRY2, LOG_ENTRY_LATER
 from tests.helpers import Paramizer, ParamizerItem
 
 PARAMIZER = Paramizer(
@@ -54,3 +54,40 @@ def test_positive_stats(
     assert stats.reqs_per_sec == reqs_per_sec
     assert stats.statuses_counts == statuses_counts
     assert stats.avg_resp_size == avg_resp_size
+
+
+PARAMIZER = Paramizer(
+    ParamizerItem("nothing to merge", first=[LOG_ENTRY, LOG_ENTRY2], second=[]),
+    ParamizerItem("merge into empty", first=[], second=[LOG_ENTRY, LOG_ENTRY2]),
+    ParamizerItem("both with logs", first=[LOG_ENTRY], second=[LOG_ENTRY2, LOG_ENTRY_LATER]),
+    ParamizerItem("later logs first", first=[LOG_ENTRY_LATER], second=[LOG_ENTRY, LOG_ENTRY2]),
+)
+
+
+@PARAMIZER.paramize("first, second")
+def test_positive_merge(first: List[LogEntry], second: List[LogEntry]):
+    expected = Stats()
+    for log in first + second:
+        expected.update(log)
+    expected.end()
+
+    stats, other = Stats(), Stats()
+    for log in first:
+        stats.update(log)
+    for log in second:
+        other.update(log)
+    stats.merge(other)
+    stats.end()
+    assert stats == expected
+
+
+def test_positive_latency_by_status_class():
+    stats = Stats()
+    for log in [LOG_ENTRY, LOG_ENTRY2, LOG_ENTRY_LATER]:
+        stats.update(log)
+    stats.end()
+    assert stats.latency.count == 3
+    assert sorted(stats.latency_by_class) == [2, 4]
+    assert stats.latency_by_class[4].count == 1
+    assert stats.latency.max == LOG_ENTRY.D
+    assert abs(stats.latency.quantile(0.5) - LOG_ENTRY.D) <= LOG_ENTRY.D * 0.02
@@ -0,0 +1,126 @@
+import asyncio
+import socket
+from typing import List
+
+from guniparse.order import OrderEnum
+from guniparse.parser import LogParser
+from guniparse.stats import Stats
+from guniparse.stream import LogStream, is_stream
+from tests.constants import PATH_ASC
+from tests.helpers import Paramizer, ParamizerItem
+
+LOG_FORMAT = """%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s" %(D)s"""
+
+
+def read_lines() -> List[bytes]:
+    with open(PATH_ASC, "rb") as f:
+        return f.readlines()
+
+
+def expected_stats() -> Stats:
+    return LogParser(Stats.FIELDS, LOG_FORMAT).stats(PATH_ASC, order=OrderEnum.asc)
+
+
+def make_stream(queue_size: int = LogStream.QUEUE_SIZE) -> LogStream:
+    return LogStream(LogParser(Stats.FIELDS, LOG_FORMAT), queue_size=queue_size)
+
+
+PARAMIZER = Paramizer(
+    ParamizerItem("stdin", source="-", expected=True),
+    ParamizerItem("stream socket", source="unix:/run/guniparse.sock", expected=True),
+    ParamizerItem("datagram socket", source="unixgram:/dev/log", expected=True),
+    ParamizerItem("file", source="access.log", expected=False),
+)
+
+
+@PARAMIZER.paramize("source, expected")
+def test_positive_is_stream(source: str, expected: bool) -> None:
+    assert is_stream(source) == expected
+
+
+PARAMIZER = Paramizer(
+    ParamizerItem("whole data at once", chunk_size=1 << 20),
+    ParamizerItem("lines cut between chunks", chunk_size=100),
+)
+
+
+@PARAMIZER.paramize("chunk_size")
+def test_positive_read_stream(chunk_size: int) -> None:
+    stream = make_stream()
+    stream.CHUNK_SIZE = chunk_size
+    data = b"".join(read_lines()).rstrip(b"\n")  # the last line has no newline
+
+    async def ingest() -> Stats:
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        stream._queue = asyncio.Queue(stream.queue_size)
+        consumer = asyncio.ensure_future(stream._consume())
+        await stream.read(reader)
+        await stream._queue.put(None)
+        await consumer
+        return stream.stats
+
+    stats = asyncio.run(ingest())
+    stats.end()
+    assert stats == expected_stats()
+    assert stream.received == len(data) + 1
+    assert stream.dropped_lines == 0
+
+
+def test_positive_full_queue_drops_blocks() -> None:
+    stream = make_stream(queue_size=2)
+    lines = read_lines()
+
+    async def offer() -> List[bool]:
+        stream._queue = asyncio.Queue(stream.queue_size)
+        return [stream.offer(b"".join(lines[i:i + 2])) for i in range(0, 8, 2)]  # nothing parses meanwhile
+
+    assert asyncio.run(offer()) == [True, True, False, False]
+    assert stream.dropped_blocks == 2
+    assert stream.dropped_lines == 4
+    assert "dropped lines: 4" in stream.report()
+
+
+PARAMIZER = Paramizer(
+    ParamizerItem("stream socket", scheme="unix", kind=socket.SOCK_STREAM),
+    ParamizerItem("datagram socket", scheme="unixgram", kind=socket.SOCK_DGRAM),
+)
+
+
+@PARAMIZER.paramize("scheme, kind")
+def test_positive_socket(tmp_path, scheme: str, kind: int) -> None:
+    path = str(tmp_path / "guniparse.sock")
+    stream = make_stream()
+    lines = read_lines()
+
+    async def send_and_stop(stop: asyncio.Event) -> None:
+        loop = asyncio.get_running_loop()
+        while stream._queue is None:
+            await asyncio.sleep(0.01)
+        for _ in range(100):  # the socket is created after the queue
+            try:
+                with socket.socket(socket.AF_UNIX, kind) as client:
+                    client.connect(path)
+                    break
+            except OSError:
+                await asyncio.sleep(0.01)
+        with socket.socket(socket.AF_UNIX, kind) as client:
+            client.connect(path)
+            if kind == socket.SOCK_STREAM:
+                await loop.run_in_executor(None, client.sendall, b"".join(lines))
+            else:
+                for line in lines:  # a line per datagram, like syslog
+                    client.send(line.rstrip(b"\n"))
+        while stream.received < sum(map(len, lines)):
+            await asyncio.sleep(0.01)
+        stop.set()
+
+    async def run() -> Stats:
+        stop = asyncio.Event()
+        sender = asyncio.ensure_future(send_and_stop(stop))
+        stats = await stream.ingest(f"{scheme}:{path}", stop)
+        await sender
+        return stats
+
+    assert asyncio.run(run()) == expected_stats()
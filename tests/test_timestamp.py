@@ -0,0 +1,72 @@
+from datetime import datetime, timezone, timedelta
+from typing import Any, Union
+
+import pytest
+
+from guniparse.timestamp import DATETIME_FORMAT, TimestampDecoder, to_epoch
+from tests.helpers import Paramizer, ParamizerItem
+
+PARAMIZER = Paramizer(
+    ParamizerItem("positive offset", value="01/Dec/2019:11:06:05 +0100"),
+    ParamizerItem("negative offset", value="31/Dec/2019:23:59:59 -0530"),
+    ParamizerItem("utc", value="29/Feb/2020:00:00:00 +0000"),
+)
+
+
+@PARAMIZER.paramize("value")
+def test_positive_decode(value: str) -> None:
+    decoder = TimestampDecoder()
+    assert decoder(value) == int(datetime.strptime(value, DATETIME_FORMAT).timestamp())
+
+
+def test_positive_decode_memoized_prefix_changes() -> None:
+    decoder = TimestampDecoder()
+    values = [
+        "01/Dec/2019:23:59:59 +0100",
+        "02/Dec/2019:00:00:00 +0100",
+        "02/Dec/2019:00:00:01 +0000",
+        "02/Dec/2019:00:00:02 +0000",
+    ]
+    assert [decoder(v) for v in values] == [int(datetime.strptime(v, DATETIME_FORMAT).timestamp()) for v in values]
+
+
+PARAMIZER = Paramizer(
+    ParamizerItem("bad separators", value="01-Dec-2019:11:06:05 +0100", exception=ValueError),
+    ParamizerItem("bad time", value="01/Dec/2019:11-06-05 +0100", exception=ValueError),
+    ParamizerItem("hour out of range", value="01/Dec/2019:25:06:05 +0100", exception=ValueError),
+    ParamizerItem("signed hour", value="01/Dec/2019:-1:06:05 +0100", exception=ValueError),
+    ParamizerItem("signed minute", value="01/Dec/2019:11:+6:05 +0100", exception=ValueError),
+    ParamizerItem("space padded fields", value="01/Dec/2019: 1:06: 5 +0100", exception=ValueError),
+    ParamizerItem("leap second", value="30/Jun/2015:23:59:60 +0000", exception=ValueError),
+    ParamizerItem("bad month", value="01/Abc/2019:11:06:05 +0100", exception=ValueError),
+    ParamizerItem("bad offset", value="01/Dec/2019:11:06:05 CEST!", exception=ValueError),
+)
+
+
+@PARAMIZER.paramize("value, exception")
+def test_negative_decode(value: str, exception: Any) -> None:
+    with pytest.raises(exception):
+        TimestampDecoder()(value)
+    with pytest.raises(exception):
+        TimestampDecoder(binary=True)(value.encode())
+
+
+PARAMIZER = Paramizer(
+    ParamizerItem("naive datetime is utc", moment=datetime(2019, 12, 1, 10, 6, 5), expected=1575194765),
+    ParamizerItem(
+        "aware datetime",
+        moment=datetime(2019, 12, 1, 11, 6, 5, tzinfo=timezone(timedelta(hours=1))),
+        expected=1575194765,
+    ),
+    ParamizerItem(
+        "fraction of a second rounds up",
+        moment=datetime(2019, 12, 1, 10, 6, 4, 500000, tzinfo=timezone.utc),
+        expected=1575194765,
+    ),
+    ParamizerItem("epoch seconds pass through", moment=1575194765, expected=1575194765),
+)
+
+
+@PARAMIZER.paramize("moment, expected")
+def test_positive_to_epoch(moment: Union[datetime, int], expected: int) -> None:
+    assert to_epoch(moment) == expected
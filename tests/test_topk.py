@@ -0,0 +1,70 @@
+import random
+from collections import Counter
+
+import pytest
+
+from guniparse.topk import SpaceSaving
+from tests.helpers import Paramizer, ParamizerItem
+
+
+def zipf_items(seed: int, n: int) -> list:
+    rnd = random.Random(seed)
+    # few heavy hitters and a long tail of values seen once, like request lines with UUIDs
+    return [f"/popular/{int(rnd.paretovariate(1.2))}" if rnd.random() < 0.6 else f"/uuid/{i}" for i in range(n)]
+
+
+PARAMIZER = Paramizer(
+    ParamizerItem("fits in capacity", capacity=1000, n=500),
+    ParamizerItem("long tail", capacity=50, n=20000),
+    ParamizerItem("tiny capacity", capacity=1, n=100),
+)
+
+
+@PARAMIZER.paramize("capacity, n")
+def test_positive_guarantees(capacity: int, n: int) -> None:
+    items = zipf_items(1, n)
+    exact = Counter(items)
+    summary = SpaceSaving(capacity)
+    for item in items:
+        summary.add(item)
+    assert summary.total == n
+    assert len(summary.counts) <= capacity
+    assert summary.max_error <= n / capacity
+    for item, count in summary.counts.items():
+        assert exact[item] <= count <= exact[item] + summary.errors[item]
+        assert summary.errors[item] <= summary.max_error
+    for item, count in exact.items():
+        if count > n / capacity:
+            assert item in summary.counts
+
+
+def test_positive_exact_below_capacity() -> None:
+    summary = SpaceSaving(10)
+    for item in "abacabad":
+        summary.add(item)
+    assert summary.top(2) == [("a", 4, 0), ("b", 2, 0)]
+    assert summary.max_error == 0
+
+
+def test_positive_merge() -> None:
+    items = zipf_items(2, 20000)
+    exact = Counter(items)
+    first, second = SpaceSaving(100), SpaceSaving(100)
+    for i, item in enumerate(items):
+        (first if i % 2 else second).add(item)
+    first.merge(second)
+    assert first.total == len(items)
+    assert len(first.counts) <= 100
+    for item, count in first.counts.items():
+        assert exact[item] <= count <= exact[item] + first.errors[item]
+    heavy = [item for item, count in exact.items() if count > 2 * len(items) / 100]
+    assert heavy and all(item in first.counts for item in heavy)
+
+
+def test_positive_from_error() -> None:
+    assert SpaceSaving.from_error(0.001).capacity == 1000
+
+
+def test_negative_capacity() -> None:
+    with pytest.raises(ValueError):
+        SpaceSaving(0)